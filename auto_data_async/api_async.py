@@ -7,33 +7,54 @@
 
 
 import json
+import time
 import httpx
 import asyncio
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from llm_cache import CACHE_BYPASS, cache_lookup, cache_store
 
 API_URL = "http://192.168.2.233:58000/v1/chat/completions"
 
 
-async def call_local_model_async(prompt: str, stream: bool = True) -> str:
+def build_payload(prompt: str, stream: bool = True, n: int = 1, seed: Optional[int] = None) -> dict:
+    """构造 chat/completions 请求体，n > 1 时请求服务端一次返回多个补全，seed 固定服务端采样"""
+    payload = {
+        "model": "qwen3_32b",
+        "messages": [{"role": "user", "content": prompt}],
+        "chat_template_kwargs": {"enable_thinking": False},
+        "temperature": 1.1,
+        "top_k": 50,
+        "top_p": 0.99,
+        "stream": stream,
+    }
+    if n > 1:
+        payload["n"] = n
+    if seed is not None:
+        payload["seed"] = seed
+    return payload
+
+
+async def call_local_model_async(prompt: str, stream: bool = True, cache_mode: str = CACHE_BYPASS,
+                                 seed: Optional[int] = None, validate: Optional[Callable[[str], bool]] = None) -> str:
     """
     异步调用本地 Qwen3-32B 模型生成文本。
 
     参数：
         prompt (str): 输入提示词
         stream (bool): 是否启用流式返回，默认 True
+        cache_mode (str): 响应缓存模式，见 llm_cache，默认不走缓存
+        seed (int): 采样种子，相同提示词与种子可复现同一输出
+        validate: 判断输出是否可用；返回 False 的输出不写入缓存，命中的缓存不可用时重新请求
 
     返回：
         str: 模型最终生成的文本内容
     """
-    payload = {
-        "model": "qwen3_32b",
-        "messages": [{"role": "user", "content": prompt}],
-        "chat_template_kwargs": {"enable_thinking": False},
-        "temperature": 1.1,
-        "top_k": 50,
-        "top_p": 0.99,
-        "stream": stream,
-    }
+    payload = build_payload(prompt, stream=stream, seed=seed)
+    cache_key, cached = cache_lookup(payload, cache_mode)
+    if cached is not None and (validate is None or validate(cached)):
+        return cached
 
+    start = time.perf_counter()
     result_text = ""
 
     async with httpx.AsyncClient(timeout=180.0) as client:
@@ -56,7 +77,103 @@ async def call_local_model_async(prompt: str, stream: bool = True) -> str:
             result_json = response.json()
             result_text = result_json["choices"][0]["message"]["content"]
 
-    return result_text.strip()
+    result_text = result_text.strip()
+    if validate is None or validate(result_text):
+        cache_store(cache_key, prompt, result_text, time.perf_counter() - start)
+    return result_text
+
+
+# 后端是否支持 n 参数：None 表示尚未探测，探测失败后不再发送 n，避免每批都白跑一次
+_n_supported: Optional[bool] = None
+
+# 单个请求失败（非 2xx、响应里没有 choices）时的重试次数，用尽后抛出异常
+MAX_RETRIES = 2
+
+
+async def _request_choices(client: httpx.AsyncClient, prompt: str, n: int, seed: Optional[int] = None) -> List[str]:
+    """
+    非流式请求同一提示词的 n 个补全，后端不支持 n 时返回的条数可能少于 n
+    非 2xx 或响应缺少 choices 时重试，仍失败则抛出异常，不把错误当作空文本返回
+    """
+    global _n_supported
+    use_n = n if _n_supported is not False else 1
+    payload = build_payload(prompt, stream=False, n=use_n, seed=seed)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await client.post(API_URL, json=payload)
+            response.raise_for_status()
+            body = response.json()
+            choices = body.get("choices") if isinstance(body, dict) else None
+            if not choices:
+                raise ValueError(f"响应中没有 choices: {response.text[:200]}")
+            break
+        except (httpx.HTTPError, ValueError):
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+    texts = [c["message"]["content"].strip() for c in sorted(choices, key=lambda c: c.get("index", 0))]
+    # 只根据成功的响应判断是否支持 n，出错的请求不能让后续批次永久退回逐条请求
+    if use_n > 1 and _n_supported is None:
+        _n_supported = len(texts) >= use_n
+    return texts
+
+
+async def call_local_model_batch_async(prompts: Union[str, List[str]], n: int = 1,
+                                       max_concurrency: int = 16,
+                                       seeds: Optional[List[Optional[int]]] = None) -> List[str]:
+    """
+    批量调用本地模型，共用一个连接池。
+
+    参数：
+        prompts: 单个提示词，或提示词列表
+        n (int): prompts 为单个提示词时需要的补全条数
+        max_concurrency (int): 同时在途的请求数上限
+        seeds: 与 prompts 一一对应的采样种子
+
+    说明：
+        - 不带种子的相同提示词合并为一次带 n 的请求，服务端只做一次 prefill；
+          后端不支持 n（返回条数不足）时，缺少的部分用单条请求补齐
+        - 带种子的提示词一律逐条请求，每条只由自己的种子决定、可单独复现（同一种子得到同一结果）。
+          generate_finetune_sample_async 每条样本都有自己的种子，因此只受益于并发提交，不走 n 合并
+        - 请求失败时按 MAX_RETRIES 重试，仍失败则整批抛出异常
+        - 不同提示词一起并发提交，由服务端连续批处理并复用公共前缀缓存
+
+    返回：
+        List[str]: 与输入顺序一致的补全文本列表
+    """
+    if isinstance(prompts, str):
+        prompts = [prompts] * n
+
+    if seeds is None:
+        seeds = [None] * len(prompts)
+
+    # 不带种子的相同提示词归为一组，记录它们在结果中的位置；带种子的每条单独一组，
+    # 避免一个种子对应多条补全（补齐时重复同一种子只会得到相同的结果）
+    groups: Dict[Tuple[str, Optional[int], Optional[int]], List[int]] = {}
+    for idx, (prompt, seed) in enumerate(zip(prompts, seeds)):
+        groups.setdefault((prompt, seed, None if seed is None else idx), []).append(idx)
+
+    results: List[str] = [""] * len(prompts)
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async with httpx.AsyncClient(timeout=180.0) as client:
+
+        async def run_group(key: Tuple[str, Optional[int], Optional[int]], positions: List[int]):
+            prompt, seed, _ = key
+            async with sem:
+                texts = await _request_choices(client, prompt, len(positions), seed=seed)
+            missing = len(positions) - len(texts)
+            if missing > 0:
+                async def single():
+                    async with sem:
+                        return (await _request_choices(client, prompt, 1, seed=seed))[0]
+                texts += await asyncio.gather(*[single() for _ in range(missing)])
+            for pos, text in zip(positions, texts):
+                results[pos] = text
+
+        await asyncio.gather(*[run_group(key, pos) for key, pos in groups.items()])
+
+    return results
 
 
 # 测试入口
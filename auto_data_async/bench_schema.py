@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : bench_schema.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import copy
+import json
+import random
+import re
+import time
+
+from company_schema import COMPANY_SCHEMA, enforce_field_types
+from demo1_async import filter_generated_company_fields_batch
+
+
+# -------------------------- 旧实现（作为基线） --------------------------
+def legacy_enforce_field_types(data: dict) -> dict:
+    for field, meta in COMPANY_SCHEMA.items():
+        if field not in data:
+            continue
+        val = data[field]
+        if meta["type"] == "list[str]":
+            if isinstance(val, str):
+                data[field] = [s.strip() for s in re.split(r"[，,;；]", val) if s.strip()]
+            elif isinstance(val, list):
+                data[field] = [str(s).strip() for s in val]
+        elif meta["type"] == "int":
+            try:
+                data[field] = int(val)
+            except (ValueError, TypeError):
+                data[field] = 0
+        elif meta["type"] == "float":
+            try:
+                data[field] = float(val)
+            except (ValueError, TypeError):
+                data[field] = 0.0
+    return data
+
+
+def legacy_filter_generated_company_fields(data: dict) -> dict:
+    INVALID_VALUES = {"", "无", "未知", "不详", "None", "无相关", "未填写", "未说明", "未提供"}
+    result = {}
+    for k, v in data.items():
+        if k not in COMPANY_SCHEMA:
+            continue
+        if v is None:
+            continue
+        if isinstance(v, (int, float)) and v == 0:
+            continue
+        if isinstance(v, str):
+            if v.strip() in INVALID_VALUES:
+                continue
+            result[k] = v.strip()
+            continue
+        if isinstance(v, list):
+            filtered_list = []
+            for item in v:
+                if isinstance(item, str) and item.strip() not in INVALID_VALUES:
+                    filtered_list.append(item.strip())
+                elif isinstance(item, (int, float)) and item != 0:
+                    filtered_list.append(item)
+            if filtered_list:
+                result[k] = filtered_list
+            continue
+        result[k] = v
+    return result
+
+
+# -------------------------- 模拟模型输出 --------------------------
+def fake_value(meta: dict, rng: random.Random):
+    if meta.get("choices"):
+        picked = rng.sample(meta["choices"], k=min(2, len(meta["choices"])))
+        if rng.random() < 0.1:
+            picked.append("其他")
+        return picked if meta["type"].startswith("list") else picked[0]
+    if meta["type"] == "int":
+        return rng.choice([rng.randint(1, 500), str(rng.randint(1, 500)), "约100人", None])
+    if meta["type"] == "float":
+        return rng.choice([round(rng.uniform(0, 1e4), 1), f"{rng.uniform(0, 1e4):.1f}", "未知"])
+    if meta["type"] == "list[str]":
+        items = [f"项目{rng.randint(0, 99)}" for _ in range(rng.randint(1, 4))]
+        return "，".join(items) if rng.random() < 0.5 else items
+    return rng.choice(["上海云智科技有限公司", " 上海市_浦东新区 ", "无", "2018-05-20"])
+
+
+def make_records(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    fields = list(COMPANY_SCHEMA.items())
+    records = []
+    for _ in range(n):
+        picked = rng.sample(fields, k=rng.randint(8, len(fields)))
+        records.append({k: fake_value(meta, rng) for k, meta in picked})
+    return records
+
+
+def timeit(fn, records) -> float:
+    data = copy.deepcopy(records)
+    start = time.perf_counter()
+    fn(data)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="COMPANY_SCHEMA 字段校验基准")
+    parser.add_argument("-n", type=int, default=100_000, help="模拟记录条数")
+    args = parser.parse_args()
+
+    records = make_records(args.n)
+    results = {
+        "records": args.n,
+        "enforce_legacy_s": timeit(lambda rs: [legacy_enforce_field_types(r) for r in rs], records),
+        "enforce_compiled_s": timeit(lambda rs: [enforce_field_types(r) for r in rs], records),
+        "filter_legacy_s": timeit(lambda rs: [legacy_filter_generated_company_fields(r) for r in rs], records),
+        "filter_compiled_s": timeit(filter_generated_company_fields_batch, records),
+    }
+    results = {k: round(v, 3) if isinstance(v, float) else v for k, v in results.items()}
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import json
+import os
 import re
+import sys
 from api_async import call_local_model_async
-from policy_loader import get_policy_info_struct
+from llm_cache import CACHE_READ_THROUGH
+from policy_loader import get_policy_info
+from seeding import derive_seed
+
+# 模型输出的容错解析与政企接口服务共用一份实现
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from tolerant_parser import parse_tolerant
 
 
 COMPANY_SCHEMA = {
@@ -202,17 +210,8 @@ def build_company_prompt(policy_info: dict) -> str:
 
 
 def parse_json_response(text: str) -> dict:
-    """提取模型输出 JSON"""
-    match = re.search(r"\{[\s\S]*\}", text)
-    if not match:
-        return {}
-    try:
-        data = json.loads(match.group(0))
-        if isinstance(data, dict):
-            return data
-    except json.JSONDecodeError:
-        return {}
-    return {}
+    """提取模型输出中的字段，兼容 JSON 对象与无大括号的 "k": v 逐行格式，并修复常见格式问题"""
+    return parse_tolerant(text).data
 
 
 def filter_company_fields(data: dict) -> dict:
@@ -220,40 +219,107 @@ def filter_company_fields(data: dict) -> dict:
     return {k: v for k, v in data.items() if k in COMPANY_SCHEMA}
 
 
+# -------------------------- 预编译字段校验表 --------------------------
+_LIST_SEP = re.compile(r"[，,;；]")
+_NESTED_LIST_SEP = re.compile(r"[，,;；\n]")
+
+# 校验器返回 DROP 表示该字段不合法，应从记录中删除（目前仅用于枚举值不在 choices 中）
+DROP = object()
+
+
+def _coerce_int(val):
+    if type(val) is int:
+        return val
+    try:
+        return int(val)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _coerce_float(val):
+    if type(val) is float:
+        return val
+    try:
+        return float(val)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _coerce_list_str(val):
+    if isinstance(val, str):
+        # 按逗号、顿号、分号分割成列表
+        return [s.strip() for s in _LIST_SEP.split(val) if s.strip()]
+    if isinstance(val, list):
+        return [str(s).strip() for s in val]
+    return val
+
+
+def _coerce_nested_list_str(val):
+    if isinstance(val, str):
+        lines = [s.strip() for s in _NESTED_LIST_SEP.split(val) if s.strip()]
+        return [lines] if lines else []
+    if isinstance(val, list):
+        return [[str(s).strip() for s in item] if isinstance(item, list) else [str(item).strip()]
+                for item in val]
+    return val
+
+
+_TYPE_COERCERS = {
+    "int": _coerce_int,
+    "float": _coerce_float,
+    "list[str]": _coerce_list_str,
+    "list[list[str]]": _coerce_nested_list_str,
+}
+
+
+def _with_choices(coerce, field_type: str, choices: frozenset):
+    """在类型转换之后追加枚举校验：标量不在 choices 中整字段丢弃，列表只保留合法元素"""
+    if field_type.startswith("list"):
+        def check(val):
+            val = coerce(val)
+            if isinstance(val, list):
+                return [v for v in val if v in choices]
+            return DROP
+    else:
+        def check(val):
+            val = coerce(val)
+            if isinstance(val, list) and len(val) == 1:
+                val = val[0]  # 模型有时把单选字段写成单元素列表，如 {"size": ["小型企业"]}
+            # choices 都是字符串；列表、字典等不可哈希的值直接丢弃，不能拿去做集合查找
+            return val if isinstance(val, str) and val in choices else DROP
+    return check
+
+
+def compile_schema(schema: dict) -> dict:
+    """
+    把字段定义编译成 {字段名: 校验转换函数}，只在导入时执行一次
+    既不需要类型转换也没有 choices 的字段（普通字符串）不进入表，校正时直接跳过
+    """
+    compiled = {}
+    for field, meta in schema.items():
+        coerce = _TYPE_COERCERS.get(meta["type"])
+        if meta.get("choices"):
+            coerce = _with_choices(coerce or (lambda v: v), meta["type"], frozenset(meta["choices"]))
+        if coerce is not None:
+            compiled[field] = coerce
+    return compiled
+
+
+COMPILED_SCHEMA = compile_schema(COMPANY_SCHEMA)
+FIELD_CHOICES = {field: frozenset(meta["choices"]) for field, meta in COMPANY_SCHEMA.items() if meta.get("choices")}
+
+
 def enforce_field_types(data: dict) -> dict:
-    """校正 list 和数值字段类型"""
-    for field, meta in COMPANY_SCHEMA.items():
-        if field not in data:
+    """校正 list 和数值字段类型，并剔除不在枚举范围内的值"""
+    for field in list(data):
+        coerce = COMPILED_SCHEMA.get(field)
+        if coerce is None:
             continue
-        val = data[field]
-        if meta["type"] == "list[str]":
-            if isinstance(val, str):
-                # 按逗号、顿号、分号分割成列表
-                data[field] = [s.strip() for s in re.split(r"[，,;；]", val) if s.strip()]
-            elif isinstance(val, list):
-                data[field] = [str(s).strip() for s in val]
-        elif meta["type"] == "list[list[str]]":
-            if isinstance(val, str):
-                lines = [s.strip() for s in re.split(r"[，,;；\n]", val) if s.strip()]
-                data[field] = [lines] if lines else []
-            elif isinstance(val, list):
-                new_list = []
-                for item in val:
-                    if isinstance(item, list):
-                        new_list.append([str(s).strip() for s in item])
-                    else:
-                        new_list.append([str(item).strip()])
-                data[field] = new_list
-        elif meta["type"] == "int":
-            try:
-                data[field] = int(val)
-            except (ValueError, TypeError):
-                data[field] = 0
-        elif meta["type"] == "float":
-            try:
-                data[field] = float(val)
-            except (ValueError, TypeError):
-                data[field] = 0.0
+        val = coerce(data[field])
+        if val is DROP:
+            del data[field]
+        else:
+            data[field] = val
     return data
 
 
@@ -280,17 +346,22 @@ async def generate_company_info_from_policy(part_id: str) -> dict:
     """
     核心函数：根据 part_id.txt 获取政策信息，并生成公司完整结构化字段
     """
-    result = get_policy_info_struct(part_id)
-    policy_info = result.get("policy_info", {})
+    policy_info = get_policy_info(part_id)
     if not policy_info:
         return {"error": f"policy_info not found for part_id.txt {part_id}"}
 
     prompt = build_company_prompt(policy_info)
-    response = await call_local_model_async(prompt)
-    parsed = parse_json_response(response)
+    # 每个 part_id 的企业画像是后续所有样本的上游，重跑或改下游提示词时直接复用
+    # 种子只由 part_id 决定，缓存清空后也能重新得到同一份画像
+    # 截断或解析不出字段的画像不写入缓存，否则之后每次运行都会复用这份坏数据
+    response = await call_local_model_async(prompt, cache_mode=CACHE_READ_THROUGH, seed=derive_seed(part_id),
+                                            validate=lambda text: bool(_parse_company_info(text)))
+    return _parse_company_info(response)
+
 
-    filtered = filter_company_fields(parsed)
-    return enforce_field_types(filtered)
+def _parse_company_info(response: str) -> dict:
+    """模型输出 → 校正过类型的企业画像字段（解析不出任何字段时为空 dict）"""
+    return enforce_field_types(filter_company_fields(parse_json_response(response)))
 
 
 # 测试
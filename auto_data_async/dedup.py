@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : dedup.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import hashlib
+import re
+from itertools import combinations
+from math import comb
+from typing import Dict, List
+
+import numpy as np
+
+FP_BITS = 64
+_BIT_SHIFTS = np.arange(FP_BITS, dtype=np.uint64)
+_WHITESPACE = re.compile(r"\s+")
+MAX_TABLES = 64             # 分表数上限，每条记录在每张表里占一个桶下标
+KEY_BITS = 16               # 键宽达到该位数后不再增加表数，百万条记录时每个桶约十几条
+LINEAR_SCAN_FRACTION = 1 / 8  # 预计候选超过全集的这个比例时，分表不如直接全表扫描
+
+
+def sample_text(input_text: str) -> str:
+    """
+    input 中参与去重的部分：企业信息 + 口语化描述
+    同一 part_id 的所有记录共用相同的 [政策信息]，这部分会把相似度整体抬高，因此不参与比较
+    """
+    return input_text.split("[政策信息]", 1)[0]
+
+
+def record_text(record: dict) -> str:
+    """参与去重的文本：input（不含政策信息）+ output"""
+    return sample_text(record.get("input", "")) + "\n" + record.get("output", "")
+
+
+def simhash(text: str, ngram: int = 2) -> int:
+    """字符 n-gram 的 64 位 SimHash 指纹；中文文本用二元组区分度最好"""
+    text = _WHITESPACE.sub("", text)
+    if len(text) < ngram:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + ngram] for i in range(len(text) - ngram + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    fp = 0
+    for i in np.nonzero(votes > 0)[0]:
+        fp |= 1 << int(i)
+    return fp
+
+
+def _popcount(x: np.ndarray) -> np.ndarray:
+    """逐元素统计 uint64 中 1 的个数"""
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def plan_tables(max_distance: int, max_tables: int = MAX_TABLES) -> List[int]:
+    """
+    分表方案（Manku 等，WWW 2007）：指纹切成 k+m 块，距离不超过 k 的两条记录至少有 m 块完全相同，
+    每种 m 块组合建一张表，以这 m 块拼成的掩码作为键。m 越大键越宽、桶越小，但表数 C(k+m, m) 增长很快
+    取键宽达到 KEY_BITS 的最少表数方案；达不到时在表数不超过 max_tables 的方案中选预计候选比例
+    表数 / 2^键宽 最小的一个。返回各表的掩码，候选比例仍超过 LINEAR_SCAN_FRACTION 时返回空列表，表示直接全表扫描
+    """
+    best, best_cost = [], LINEAR_SCAN_FRACTION
+    for m in range(1, FP_BITS - max_distance + 1):
+        num_blocks = max_distance + m
+        if comb(num_blocks, m) > max_tables:
+            break
+        bounds = np.linspace(0, FP_BITS, num_blocks + 1).astype(int)
+        block_masks = [((1 << int(hi - lo)) - 1) << int(lo) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        masks = [sum(block_masks[i] for i in chosen) for chosen in combinations(range(num_blocks), m)]
+        key_bits = min(bin(mask).count("1") for mask in masks)
+        if key_bits >= KEY_BITS:
+            return masks
+        cost = len(masks) / 2.0 ** key_bits
+        if cost < best_cost:
+            best, best_cost = masks, cost
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    流式近重复检测（SimHash + 分表索引）：
+    - 相似度 = 1 - 汉明距离 / 64，阈值换算成最大汉明距离 k
+    - 按 plan_tables 建若干张表，只在与新指纹同键的桶里比较候选
+    - 分表只在 k 较小时有效：阈值 0.9（k=6）时 28 张 16 位键的表，候选约占全集的 1/2000；
+      阈值 0.8（k=12）时任何不超过 MAX_TABLES 张表的方案候选都占全集的三成以上，
+      此时不建表，每次查询对全部指纹做一次向量化异或 + popcount，百万级记录单次约数毫秒
+    - 每条记录占一个 uint64 指纹和每张表一个桶下标
+    """
+
+    def __init__(self, threshold: float = 0.9):
+        self.threshold = threshold
+        self.max_distance = int((1 - threshold) * FP_BITS)
+        self._masks = plan_tables(self.max_distance)
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._masks]
+        self._fps = np.zeros(1024, dtype=np.uint64)
+        self.size = 0
+        self.duplicates = 0
+
+    def _add(self, fp: int):
+        if self.size == len(self._fps):
+            self._fps = np.concatenate([self._fps, np.zeros_like(self._fps)])
+        self._fps[self.size] = fp
+        for table, mask in zip(self._tables, self._masks):
+            table.setdefault(fp & mask, []).append(self.size)
+        self.size += 1
+
+    def contains_near(self, fp: int) -> bool:
+        """索引中是否已有与 fp 的汉明距离不超过 max_distance 的指纹"""
+        if not self._tables:
+            diff = self._fps[:self.size] ^ np.uint64(fp)
+            return bool((_popcount(diff) <= self.max_distance).any())
+        for table, mask in zip(self._tables, self._masks):
+            bucket = table.get(fp & mask)
+            if not bucket:
+                continue
+            diff = self._fps[np.asarray(bucket)] ^ np.uint64(fp)
+            if (_popcount(diff) <= self.max_distance).any():
+                return True
+        return False
+
+    def check_and_add(self, text: str) -> bool:
+        """新文本返回 True 并加入索引；近重复返回 False，不加入"""
+        fp = simhash(text)
+        if self.contains_near(fp):
+            self.duplicates += 1
+            return False
+        self._add(fp)
+        return True
+
+
+class DedupSink:
+    """
+    在输出端之前过滤近重复记录；write 返回该记录是否真正写出
+    另外按已写出记录的 input 维护一个索引，is_novel_input 可在调用模型判断之前先排除近重复的企业样本
+    """
+
+    def __init__(self, sink, index: NearDuplicateIndex):
+        self.sink = sink
+        self.index = index
+        self.input_index = NearDuplicateIndex(threshold=index.threshold)
+
+    @property
+    def count(self) -> int:
+        return self.sink.count
+
+    def is_novel_input(self, input_text: str) -> bool:
+        """input 与某条已写出记录的 input 近重复时返回 False，并计入 index.duplicates"""
+        if self.input_index.contains_near(simhash(sample_text(input_text))):
+            self.index.duplicates += 1
+            return False
+        return True
+
+    async def write(self, record: dict) -> bool:
+        if not self.index.check_and_add(record_text(record)):
+            return False
+        self.input_index.check_and_add(sample_text(record.get("input", "")))
+        return await self.sink.write(record)
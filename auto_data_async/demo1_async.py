@@ -7,23 +7,27 @@
 
 import random
 import json
-import re
 import asyncio
-from api_async import call_local_model_async
-from policy_loader import get_policy_info_struct
-from company_schema import COMPANY_SCHEMA, generate_company_info_from_policy
+from typing import Optional
+from api_async import call_local_model_async, call_local_model_batch_async
+from policy_loader import get_policy_info
+from company_schema import COMPANY_SCHEMA, FIELD_CHOICES, generate_company_info_from_policy, parse_json_response
+from seeding import derive_seed, new_run_id
 
 
-async def company_info_to_text_async(company_info: dict, ratio: float = 0.6) -> str:
+def build_company_text_prompt(company_info: dict, ratio: float = 0.6, rng: Optional[random.Random] = None) -> str:
     """
-    从完整 company_info 随机抽取比例字段，生成自然口语化描述（异步版）
+    从完整 company_info 随机抽取比例字段，构造口语化改写提示词
+    传入 rng 时用它抽取字段，同一种子得到同一组字段
     """
     available_keys = [k for k, v in company_info.items() if v and k in COMPANY_SCHEMA]
     if not available_keys:
         return ""
 
     num_fields = max(1, int(len(available_keys) * ratio))
-    selected_keys = random.sample(available_keys, num_fields)
+    # 抽中的字段按原顺序排列，抽到相同字段集合的样本提示词完全一致，可合并为一次 n 请求
+    sampled = set((rng or random).sample(available_keys, num_fields))
+    selected_keys = [k for k in available_keys if k in sampled]
 
     template_parts = []
     for k in selected_keys:
@@ -55,55 +59,86 @@ async def company_info_to_text_async(company_info: dict, ratio: float = 0.6) ->
 
 请直接输出改写后的自然语言描述，不要解释或附加说明。
 """
-    natural_text = await call_local_model_async(prompt)
+    return prompt
+
+
+async def company_info_to_text_async(company_info: dict, ratio: float = 0.6, seed: Optional[int] = None) -> str:
+    """
+    从完整 company_info 随机抽取比例字段，生成自然口语化描述（异步版）
+    seed 同时决定字段抽取和模型采样
+    """
+    rng = random.Random(seed) if seed is not None else None
+    prompt = build_company_text_prompt(company_info, ratio=ratio, rng=rng)
+    if not prompt:
+        return ""
+    natural_text = await call_local_model_async(prompt, seed=seed)
     return natural_text.strip()
 
 
+INVALID_VALUES = frozenset({"", "无", "未知", "不详", "None", "无相关", "未填写", "未说明", "未提供"})
+
+
+def _clean_value(v):
+    """清洗单个字段值，无效时返回 None"""
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return None if v == 0 else v
+    if isinstance(v, str):
+        v = v.strip()
+        return None if v in INVALID_VALUES else v
+    if isinstance(v, list):
+        filtered_list = []
+        for item in v:
+            if isinstance(item, str):
+                item = item.strip()
+                if item not in INVALID_VALUES:
+                    filtered_list.append(item)
+            elif isinstance(item, (int, float)) and item != 0:
+                filtered_list.append(item)
+        return filtered_list or None
+    if isinstance(v, dict):
+        return filter_generated_company_fields(v) or None
+    return v
+
+
 def filter_generated_company_fields(data: dict) -> dict:
-    INVALID_VALUES = {"", "无", "未知", "不详", "None", "无相关", "未填写", "未说明", "未提供"}
+    """
+    过滤生成字段：
+    1. 仅保留 COMPANY_SCHEMA 定义的字段
+    2. 丢弃值为空、None、空字符串、"无"、"未知"、"不详"、"None"、0 等无效值
+    3. 列表逐个元素过滤，字典递归处理
+    4. 有 choices 的字段只保留枚举范围内的值
+    """
     result = {}
     for k, v in data.items():
         if k not in COMPANY_SCHEMA:
             continue
+        v = _clean_value(v)
         if v is None:
             continue
-        if isinstance(v, (int, float)) and v == 0:
-            continue
-        if isinstance(v, str):
-            if v.strip() in INVALID_VALUES:
+        choices = FIELD_CHOICES.get(k)
+        if choices is not None:
+            if isinstance(v, list):
+                v = [i for i in v if i in choices]
+                if not v:
+                    continue
+            elif not (isinstance(v, str) and v in choices):  # 字典等不可哈希的值不做集合查找
                 continue
-            result[k] = v.strip()
-            continue
-        if isinstance(v, list):
-            filtered_list = [i for i in v if i not in INVALID_VALUES and i != 0]
-            if filtered_list:
-                result[k] = filtered_list
-            continue
-        if isinstance(v, dict):
-            cleaned = filter_generated_company_fields(v)
-            if cleaned:
-                result[k] = cleaned
-            continue
         result[k] = v
     return result
 
 
-async def generate_finetune_sample_async(part_id: str, ratio: float = 0.6, num_samples: int = 1) -> list:
-    """
-    异步版本：生成微调样本
-    """
-    policy_info_res = get_policy_info_struct(part_id)
-    policy_info = policy_info_res.get("policy_info", {})
-    if not policy_info:
-        return {"error": f"policy_info not found for part_id {part_id}"}
-
-    company_info_full = await generate_company_info_from_policy(part_id)
-    all_samples = []
+def filter_generated_company_fields_batch(records: list) -> list:
+    """批量过滤一组模型生成的 company_info"""
+    return [filter_generated_company_fields(data) for data in records]
 
-    for _ in range(num_samples):
-        company_text = await company_info_to_text_async(company_info_full, ratio=ratio)
 
-        prompt = f"""
+def build_text_to_company_prompt(company_text: str) -> str:
+    """
+    构造"口语化描述 -> 结构化 company_info"的抽取提示词
+    """
+    prompt = f"""
 请根据以下口语化描述，生成一个完整的公司结构化信息（company_info）。
     
     【任务要求】：
@@ -249,16 +284,53 @@ async def generate_finetune_sample_async(part_id: str, ratio: float = 0.6, num_s
 ...
 {company_text}
 """
-        response = await call_local_model_async(prompt)
-        try:
-            parsed_json = json.loads(re.search(r"\{[\s\S]*\}", response).group(0))
-        except:
-            parsed_json = {}
+    return prompt
+
+
+async def generate_finetune_sample_async(part_id: str, ratio: float = 0.6, num_samples: int = 1,
+                                         run_id: Optional[str] = None, start_index: int = 0) -> list:
+    """
+    异步版本：生成微调样本
+    num_samples 条样本的口语化改写、结构化抽取各自批量提交一次，而不是逐条往返
 
-        company_info_from_text = filter_generated_company_fields(parsed_json)
+    第 i 条样本的编号为 start_index + i，种子由 (part_id, 编号, run_id) 派生，
+    字段抽取和模型采样都由它决定；传入相同的 run_id 与 start_index 可单独重新生成任意一条
+    """
+    run_id = run_id or new_run_id()
+    policy_info = get_policy_info(part_id)
+    if not policy_info:
+        return {"error": f"policy_info not found for part_id {part_id}"}
+
+    company_info_full = await generate_company_info_from_policy(part_id)
+
+    seeds = [derive_seed(part_id, start_index + i, run_id) for i in range(num_samples)]
+
+    # 1. 口语化改写：每条样本用自己的种子抽取字段，全部提示词一次提交
+    text_prompts = [build_company_text_prompt(company_info_full, ratio=ratio, rng=random.Random(seed))
+                    for seed in seeds]
+    valid_idx = [i for i, p in enumerate(text_prompts) if p]
+    company_texts = [""] * num_samples
+    texts = await call_local_model_batch_async([text_prompts[i] for i in valid_idx], seeds=[seeds[i] for i in valid_idx])
+    for i, text in zip(valid_idx, texts):
+        company_texts[i] = text
+
+    # 2. 结构化抽取：同样整批提交
+    responses = await call_local_model_batch_async(
+        [build_text_to_company_prompt(text) for text in company_texts], seeds=seeds
+    )
+
+    parsed_list = [parse_json_response(response) for response in responses]
+
+    all_samples = []
+    filtered_list = filter_generated_company_fields_batch(parsed_list)
+    for i, (company_text, company_info_from_text) in enumerate(zip(company_texts, filtered_list)):
         sample = {
-            "part_id.txt": part_id,
-            "policy_info": policy_info,
+            "part_id": part_id,
+            "run_id": run_id,
+            "sample_index": start_index + i,
+            "seed": seeds[i],
+            "ratio": ratio,
+            "policy_info": dict(policy_info),  # 只读映射转成普通 dict，样本可直接序列化
             "company_info_full": company_info_full,
             "company_text": company_text,
             "company_info_from_text": company_info_from_text,
@@ -5,78 +5,36 @@
 @Date    : 2025/10/27 15:08
 """
 
-import json
 import asyncio
-from typing import List
-from tqdm.asyncio import tqdm_asyncio, tqdm
+from typing import List, Optional
 from api_async import call_local_model_async
+from dedup import DedupSink
 from demo1_async import generate_finetune_sample_async
+from output_sink import JsonlSink
+from seeding import new_run_id
+from sample_scorer import ACCEPT, REJECT, record_verdict, score_sample
 
 
-async def verify_output_async(cleaned_output: str, policy_text: str, company_info: str) -> str:
-    prompt = f"""
-你是一位政策合规审查专家，请对以下【模型初次输出】进行复核，只保留判断**合理且有充分依据**的条目。
+INSTRUCTION = "你是一位精通政府政策解读和企业合规分析的专家，请根据企业信息和政策信息，判断该企业是否符合申报条件，并输出“满足项”、“不满足项”和“不确定项”。"
 
-请严格根据【政策原文】和【企业信息】逐条核实【模型初次输出】中的“满足项”、“不满足项”、“不确定项”是否合理。
 
-复核规则：
-1. 仅保留有明确事实依据、且与政策条款相符的内容；
-2. 删除不合理、重复、或无充分依据的条目；
-3. 不新增任何内容，不修改原句表述；
-4. 不生成分析说明或总结性语言；
-5. 输出格式必须与模型初次输出完全一致，只对条目做删减。
+def build_policy_text(policy_info: dict) -> str:
+    return "\n".join([f"{k}：{v}" for k, v in policy_info.items()])
 
-【政策原文】
-{policy_text}
 
-【企业信息】
-{company_info}
+def build_input_text(base_sample: dict) -> str:
+    """拼接微调记录的 input：结构化企业信息 + 口语化描述 + 政策信息"""
+    policy_text = build_policy_text(base_sample["policy_info"])
+    return (
+        f"[企业信息]\n{base_sample['company_info_from_text']}\n\n"
+        f"[企业信息(口语化描述)]：\n{base_sample['company_text']}\n\n"
+        f"[政策信息]\n{policy_text}"
+    )
 
-【模型初次输出】
-{cleaned_output}
 
-输出格式：
-请保持与模型初次输出完全一致的三部分结构：
-满足项：
-...
-不满足项：
-...
-不确定项：
-...
-
-只删除不合理的内容，其他内容保持原样，不添加任何额外说明。
-"""
-    result = await call_local_model_async(prompt, stream=False)
-    return result.strip()
-
-
-async def generate_finetune_policy_match_samples_async(
-    part_id: str,
-    ratio: float = 0.6,
-    num_samples: int = 3,
-    enable_verify: bool = True,
-    output_path: str = "finetune_samples.jsonl"
-) -> List[dict]:
-
-    samples = await generate_finetune_sample_async(part_id, ratio=ratio, num_samples=num_samples)
-    if not isinstance(samples, list):
-        print("generate_finetune_sample 返回异常:", samples)
-        return []
-
-    all_records = []
-
-    for base_sample in samples:
-        policy_info = base_sample["policy_info"]
-        company_text = base_sample["company_text"]
-        company_info_from_text = base_sample["company_info_from_text"]
-        policy_text = "\n".join([f"{k}：{v}" for k, v in policy_info.items()])
-        input_text = (
-            f"[企业信息]\n{company_info_from_text}\n\n"
-            f"[企业信息(口语化描述)]：\n{company_text}\n\n"
-            f"[政策信息]\n{policy_text}"
-        )
-
-        prompt = f"""
+def build_judgment_prompt(input_text: str) -> str:
+    """构造合规判断提示词"""
+    prompt = f"""
 你是一位精通政府政策解读和企业合规分析的专家，请根据输入信息{input_text}，包含企业信息和政策内容，判断该企业是否符合政策的申报条件。
 
 请输出三个部分：
@@ -121,56 +79,171 @@ async def generate_finetune_policy_match_samples_async(
 以下是输入信息：
 {input_text}
 """
-        response = await call_local_model_async(prompt)
-        cleaned_output = response.strip()
+    return prompt
+
+
+def build_verify_prompt(cleaned_output: str, policy_text: str, company_info: str) -> str:
+    """构造复核提示词：只删减初次输出中依据不足的条目"""
+    prompt = f"""
+你是一位政策合规审查专家，请对以下【模型初次输出】进行复核，只保留判断**合理且有充分依据**的条目。
+
+请严格根据【政策原文】和【企业信息】逐条核实【模型初次输出】中的“满足项”、“不满足项”、“不确定项”是否合理。
+
+复核规则：
+1. 仅保留有明确事实依据、且与政策条款相符的内容；
+2. 删除不合理、重复、或无充分依据的条目；
+3. 不新增任何内容，不修改原句表述；
+4. 不生成分析说明或总结性语言；
+5. 输出格式必须与模型初次输出完全一致，只对条目做删减。
+
+【政策原文】
+{policy_text}
+
+【企业信息】
+{company_info}
+
+【模型初次输出】
+{cleaned_output}
+
+输出格式：
+请保持与模型初次输出完全一致的三部分结构：
+满足项：
+...
+不满足项：
+...
+不确定项：
+...
+
+只删除不合理的内容，其他内容保持原样，不添加任何额外说明。
+"""
+    return prompt
+
+
+async def verify_output_async(cleaned_output: str, policy_text: str, company_info: str,
+                              seed: Optional[int] = None) -> str:
+    prompt = build_verify_prompt(cleaned_output, policy_text, company_info)
+    result = await call_local_model_async(prompt, stream=False, seed=seed)
+    return result.strip()
 
-        if enable_verify:
-            verified_output = await verify_output_async(cleaned_output, policy_text, company_info_from_text)
-        else:
-            verified_output = cleaned_output
 
-        record = {
-            "instruction": "你是一位精通政府政策解读和企业合规分析的专家，请根据企业信息和政策信息，判断该企业是否符合申报条件，并输出“满足项”、“不满足项”和“不确定项”。",
-            "input": input_text,
-            "output": verified_output,
-        }
+async def judge_sample_async(base_sample: dict, enable_verify: bool = True, prescore: bool = True) -> Optional[dict]:
+    """
+    对一条企业样本做合规判断（可选复核），返回一条微调记录
+    prescore 为 True 且开启复核时先本地打分：明显合格的跳过复核，明显不合格的直接丢弃（返回 None），其余再交给模型复核；
+    关闭复核时不打分，也不丢弃样本
+    判断与复核沿用样本的种子，记录的 meta 足以单独重新生成这一条，见 regenerate_record_async
+    """
+    policy_text = build_policy_text(base_sample["policy_info"])
+    input_text = build_input_text(base_sample)
+    seed = base_sample.get("seed")
+
+    response = await call_local_model_async(build_judgment_prompt(input_text), seed=seed)
+    cleaned_output = response.strip()
+
+    need_verify = enable_verify
+    if enable_verify and prescore:
+        score = score_sample(cleaned_output, policy_text, base_sample["company_info_from_text"])
+        record_verdict(score.verdict)
+        if score.verdict == REJECT:
+            print(f"part_id={base_sample['part_id']} 判断结果被丢弃：{score.reason}")
+            return None
+        need_verify = score.verdict != ACCEPT
+
+    if need_verify:
+        verified_output = await verify_output_async(cleaned_output, policy_text, base_sample["company_info_from_text"],
+                                                    seed=seed)
+    else:
+        verified_output = cleaned_output
+
+    return {
+        "instruction": INSTRUCTION,
+        "input": input_text,
+        "output": verified_output,
+        "meta": {k: base_sample[k] for k in ("part_id", "run_id", "sample_index", "seed", "ratio") if k in base_sample},
+    }
+
+
+async def regenerate_record_async(meta: dict, enable_verify: bool = True, prescore: bool = True) -> Optional[dict]:
+    """按输出记录中的 meta 单独重新生成一条记录，无需重跑整批"""
+    samples = await generate_finetune_sample_async(
+        meta["part_id"], ratio=meta["ratio"], num_samples=1,
+        run_id=meta["run_id"], start_index=meta["sample_index"]
+    )
+    if not isinstance(samples, list):
+        print("generate_finetune_sample 返回异常:", samples)
+        return None
+    return await judge_sample_async(samples[0], enable_verify=enable_verify, prescore=prescore)
 
-        async with asyncio.Lock():
-            with open(output_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
-        all_records.append(record)
+async def generate_finetune_policy_match_samples_async(
+    part_id: str,
+    ratio: float = 0.6,
+    num_samples: int = 3,
+    enable_verify: bool = True,
+    output_path: str = "finetune_samples.jsonl",
+    sink: Optional[JsonlSink] = None,
+    round_size: Optional[int] = None,
+    patience: Optional[int] = None,
+    prescore: bool = True,
+    run_id: Optional[str] = None
+) -> List[dict]:
+    """
+    单个 part_id 的完整流程：生成企业样本 → 合规判断 → 写出
+    并发调用时应传入共享的 sink，保证所有任务写同一个文件时串行追加
 
-    return all_records
+    sink 为 DedupSink 时，企业描述与已写出记录近重复的样本在判断之前就丢弃，不再调用模型判断和复核
 
+    早停：按 round_size 条一轮生成，sink 为 DedupSink 时统计每轮写出的新样本，
+    连续 patience 轮没有新样本就不再为该 part_id 采样
 
-async def process_part_id(part_id: str, num_samples: int, ratio: float, sem, output_path: str):
-    async with sem:
-        return await generate_finetune_policy_match_samples_async(
-            part_id=part_id, ratio=ratio, num_samples=num_samples, output_path=output_path
-        )
+    样本编号跨轮连续，与 run_id 一起决定每条样本的种子
+    """
+    if sink is None:
+        sink = JsonlSink(output_path)
+    round_size = round_size or num_samples
+    run_id = run_id or new_run_id()
 
+    all_records = []
+    remaining = num_samples
+    stale_rounds = 0
+    while remaining > 0:
+        batch = min(round_size, remaining)
+        remaining -= batch
+
+        samples = await generate_finetune_sample_async(part_id, ratio=ratio, num_samples=batch,
+                                                       run_id=run_id, start_index=num_samples - remaining - batch)
+        if not isinstance(samples, list):
+            print("generate_finetune_sample 返回异常:", samples)
+            return all_records
+
+        novel = 0
+        for base_sample in samples:
+            if isinstance(sink, DedupSink) and not sink.is_novel_input(build_input_text(base_sample)):
+                continue
+            record = await judge_sample_async(base_sample, enable_verify=enable_verify, prescore=prescore)
+            if record is not None and await sink.write(record):
+                all_records.append(record)
+                novel += 1
+
+        stale_rounds = 0 if novel else stale_rounds + 1
+        if patience and stale_rounds >= patience:
+            break
 
-async def main(max_concurrency: int = 5):
+    return all_records
 
-    with open("part_id.txt", "r", encoding="utf-8") as f:
-        part_id_list = [i.strip() for i in f if i.strip()][:20]
-        num_samples = 15
-        ratio = 0.8
-        output_path = "finetune-4-0.8.jsonl"
-        sem = asyncio.Semaphore(max_concurrency)
-        tasks = [process_part_id(pid, num_samples, ratio, sem, output_path) for pid in part_id_list]
 
-        results = []
-        total_samples = num_samples * len(part_id_list)
-        with tqdm_asyncio(total=total_samples, desc="总样本生成进度：") as pbar:
-            for coro in asyncio.as_completed(tasks):
-                res = await coro
-                results.extend(res)
-                pbar.update(len(res))
+async def main(max_concurrency: int = 10):
+    # 批量生成统一走 engine，保留原先的默认参数
+    from engine import load_part_ids, run_pipeline_async
 
-        total = len(results)
-        print(f"全部处理完成！共处理{len(part_id_list)}个part_id，生成{total}条样本")
+    part_id_list = load_part_ids("part_id.txt", limit=20)
+    await run_pipeline_async(
+        part_id_list,
+        num_samples=15,
+        ratio=0.8,
+        max_concurrency=max_concurrency,
+        output_path="finetune-4-0.8.jsonl",
+    )
 
 
 if __name__ == "__main__":
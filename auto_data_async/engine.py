@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : engine.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import asyncio
+import functools
+import time
+from typing import List, Optional
+
+from tqdm.asyncio import tqdm_asyncio
+
+from api_async import call_local_model_async
+from company_schema import generate_company_info_from_policy as _generate_company_info_async
+from demo1_async import company_info_to_text_async, generate_finetune_sample_async
+from dedup import DedupSink, NearDuplicateIndex
+from demo2_async import generate_finetune_policy_match_samples_async, regenerate_record_async, verify_output_async
+from llm_cache import cache_report
+from output_sink import JsonlSink
+from sample_scorer import scorer_report
+from seeding import new_run_id
+
+
+# -------------------------- 异步内核 --------------------------
+def load_part_ids(path: str, start: int = 0, limit: Optional[int] = None) -> List[str]:
+    """读取 part_id 文件，去掉空行，按 start/limit 截取"""
+    with open(path, "r", encoding="utf-8") as f:
+        part_ids = [i.strip() for i in f if i.strip()]
+    end = start + limit if limit is not None else None
+    return part_ids[start:end]
+
+
+async def run_pipeline_async(
+    part_ids: List[str],
+    num_samples: int = 15,
+    ratio: float = 0.8,
+    max_concurrency: int = 10,
+    output_path: str = "finetune_samples.jsonl",
+    enable_verify: bool = True,
+    dedup_threshold: Optional[float] = None,
+    round_size: Optional[int] = None,
+    patience: Optional[int] = None,
+    prescore: bool = True,
+    run_id: Optional[str] = None,
+) -> dict:
+    """
+    批量生成微调数据：最多 max_concurrency 个 part_id 同时处理，所有记录写入同一个 jsonl
+    dedup_threshold 不为空时，相似度达到阈值的近重复记录在写出前丢弃，并可配合 round_size/patience 早停
+    prescore 为 True 且 enable_verify 为 True 时判断结果先经本地打分，只有边界样本才调用模型复核；不复核时不做打分
+    run_id 与 part_id、样本编号一起派生每条样本的种子，传入旧的 run_id 可复现该次运行
+    返回本次运行的统计信息
+    """
+    run_id = run_id or new_run_id()
+    sem = asyncio.Semaphore(max_concurrency)
+    sink = JsonlSink(output_path)
+    index = None
+    if dedup_threshold is not None:
+        index = NearDuplicateIndex(threshold=dedup_threshold)
+        sink = DedupSink(sink, index)
+    start = time.perf_counter()
+
+    async def process_part_id(part_id: str) -> List[dict]:
+        async with sem:
+            return await generate_finetune_policy_match_samples_async(
+                part_id=part_id, ratio=ratio, num_samples=num_samples,
+                enable_verify=enable_verify, sink=sink,
+                round_size=round_size, patience=patience, prescore=prescore, run_id=run_id
+            )
+
+    tasks = [process_part_id(pid) for pid in part_ids]
+    total = 0
+    with tqdm_asyncio(total=num_samples * len(part_ids), desc="总样本生成进度：") as pbar:
+        for coro in asyncio.as_completed(tasks):
+            res = await coro
+            total += len(res)
+            pbar.update(len(res))
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "run_id": run_id,
+        "part_ids": len(part_ids),
+        "records": total,
+        "output_path": output_path,
+        "elapsed_seconds": round(elapsed, 2),
+        "samples_per_hour": round(total / elapsed * 3600, 1) if elapsed > 0 else 0.0,
+    }
+    print(f"全部处理完成！运行编号{run_id}，共处理{len(part_ids)}个part_id，生成{total}条样本，保存至：{output_path}")
+    if index is not None:
+        stats["duplicates_dropped"] = index.duplicates
+        print(f"近重复过滤：丢弃{index.duplicates}条")
+
+    scorer_stats = scorer_report()
+    if scorer_stats:
+        stats["prescore"] = scorer_stats
+        print(f"复核前打分：直接采用{scorer_stats['accepted']}条，复核{scorer_stats['verified']}条，"
+              f"丢弃{scorer_stats['rejected']}条，复核调用减少{scorer_stats['verify_call_reduction']:.0%}")
+
+    cache_stats = cache_report()
+    if cache_stats:
+        stats["cache"] = cache_stats
+        print(f"模型响应缓存：命中{cache_stats['hits']}次，未命中{cache_stats['misses']}次，"
+              f"节省约{cache_stats['saved_tokens']}个token、{cache_stats['saved_seconds']}秒")
+    return stats
+
+
+# -------------------------- 同步外观 --------------------------
+def _sync(async_fn):
+    """把异步内核函数包装成阻塞调用，供同步脚本直接使用"""
+    @functools.wraps(async_fn)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(async_fn(*args, **kwargs))
+    return wrapper
+
+
+call_local_model = _sync(call_local_model_async)
+generate_company_info_from_policy = _sync(_generate_company_info_async)
+company_info_to_text = _sync(company_info_to_text_async)
+generate_finetune_sample = _sync(generate_finetune_sample_async)
+verify_output = _sync(verify_output_async)
+generate_finetune_policy_match_samples = _sync(generate_finetune_policy_match_samples_async)
+run_pipeline = _sync(run_pipeline_async)
+regenerate_record = _sync(regenerate_record_async)
+
+
+# -------------------------- 命令行 --------------------------
+def main():
+    parser = argparse.ArgumentParser(description="政策匹配微调数据生成")
+    parser.add_argument("--part-id-file", default="part_id.txt", help="part_id 列表文件，每行一个")
+    parser.add_argument("--start", type=int, default=0, help="从第几个 part_id 开始")
+    parser.add_argument("--limit", type=int, default=None, help="最多处理多少个 part_id")
+    parser.add_argument("--num-samples", type=int, default=15, help="每个 part_id 生成的样本数")
+    parser.add_argument("--ratio", type=float, default=0.8, help="口语化描述抽取的字段比例")
+    parser.add_argument("--concurrency", type=int, default=10, help="同时处理的 part_id 数")
+    parser.add_argument("--output", default="finetune_samples.jsonl", help="输出 jsonl 路径（追加写入）")
+    parser.add_argument("--no-verify", action="store_true", help="跳过二次复核")
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="近重复过滤的相似度阈值（0~1），不设置则不去重")
+    parser.add_argument("--round-size", type=int, default=None, help="每轮为一个 part_id 生成的样本数")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="连续多少轮没有新样本就停止该 part_id 的采样（需配合 --dedup-threshold）")
+    parser.add_argument("--no-prescore", action="store_true",
+                        help="关闭复核前的本地打分，所有判断结果都交给模型复核")
+    parser.add_argument("--run-id", default=None, help="运行编号，决定每条样本的种子；不设置则新生成一个")
+    args = parser.parse_args()
+
+    part_ids = load_part_ids(args.part_id_file, start=args.start, limit=args.limit)
+    run_pipeline(
+        part_ids,
+        num_samples=args.num_samples,
+        ratio=args.ratio,
+        max_concurrency=args.concurrency,
+        output_path=args.output,
+        enable_verify=not args.no_verify,
+        dedup_threshold=args.dedup_threshold,
+        round_size=args.round_size,
+        patience=args.patience,
+        prescore=not args.no_prescore,
+        run_id=args.run_id,
+    )
+
+
+if __name__ == "__main__":
+    main()
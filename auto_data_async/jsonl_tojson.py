@@ -4,23 +4,239 @@
 @Author  : qy
 @Date    : 2025/10/15 15:07
 """
+import argparse
+import gzip
+import io
 import json
 import os
+import struct
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
-def jsonl_tojson(jsonl_path, json_path):
-    with open(jsonl_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    data = [json.loads(line) for line in lines]
+# 微调记录必须包含的字段
+REQUIRED_KEYS = ("instruction", "input", "output")
+_LEN = struct.Struct("<Q")
 
 
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def validate_record(line: str, required_keys=REQUIRED_KEYS) -> Optional[dict]:
+    """解析并校验一行 jsonl，合法返回 dict，否则返回 None"""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    if any(not isinstance(record.get(k), str) for k in required_keys):
+        return None
+    return record
+
+
+def format_element(record: dict) -> str:
+    """单条记录按 json.dump(list, indent=2) 的数组元素格式输出（整体缩进两格）"""
+    return "  " + json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+
+def open_output(path: str, compress: Optional[str]):
+    """按压缩方式打开输出文件（文本模式，utf-8）"""
+    if compress is None:
+        return open(path, "w", encoding="utf-8")
+    if compress == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8")
+    if compress == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd 压缩需要先安装 zstandard：pip install zstandard")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, "wb")), encoding="utf-8")
+    raise ValueError(f"不支持的压缩方式: {compress}")
+
+
+class JsonArrayWriter:
+    """
+    增量写 JSON 数组：逐条追加元素，不在内存中保留整个数组
+    shard_size 不为空时每 shard_size 条切一个分片：xxx-00000.json、xxx-00001.json ...
+    """
+
+    def __init__(self, json_path: str, shard_size: Optional[int] = None, compress: Optional[str] = None):
+        self.json_path = json_path
+        self.shard_size = shard_size
+        self.compress = compress
+        self.paths: List[str] = []
+        self.count = 0
+        self._f = None
+        self._in_shard = 0
+
+    def _shard_path(self, index: int) -> str:
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(self.compress, "")
+        if self.shard_size is None:
+            return self.json_path + suffix
+        stem, ext = os.path.splitext(self.json_path)
+        return f"{stem}-{index:05d}{ext or '.json'}{suffix}"
+
+    def _open_shard(self):
+        path = self._shard_path(len(self.paths))
+        self.paths.append(path)
+        self._f = open_output(path, self.compress)
+        self._f.write("[")
+        self._in_shard = 0
+
+    def _close_shard(self):
+        self._f.write("\n]" if self._in_shard else "]")
+        self._f.close()
+        self._f = None
+
+    def write_element(self, element: str):
+        """写入一条已格式化的数组元素"""
+        if self._f is None:
+            self._open_shard()
+        elif self.shard_size is not None and self._in_shard >= self.shard_size:
+            self._close_shard()
+            self._open_shard()
+        self._f.write(",\n" if self._in_shard else "\n")
+        self._f.write(element)
+        self._in_shard += 1
+        self.count += 1
+
+    def close(self):
+        if self._f is None:
+            self._open_shard()
+        self._close_shard()
+
+    def abort(self):
+        """转换中途失败：关闭当前分片并删除已写出的全部分片，不留下不完整的输出"""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.paths = []
 
-if __name__ == '__main__':
-    jsonl_path = 'finetune-4-0.8.jsonl'
-    json_path = 'finetune-4-0.8.json'
-    jsonl_tojson(jsonl_path, json_path)
 
+def iter_lines(jsonl_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """逐行读取 [start, end) 字节范围内的行，返回 (行首字节偏移, 行内容)"""
+    with open(jsonl_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for raw in f:
+            if end is not None and offset >= end:
+                break
+            line_offset = offset
+            offset += len(raw)
+            if raw.strip():
+                yield line_offset, raw.decode("utf-8")
 
 
+def chunk_ranges(jsonl_path: str, num_chunks: int) -> List[Tuple[int, int]]:
+    """把文件切成 num_chunks 个字节范围，边界对齐到行首"""
+    size = os.path.getsize(jsonl_path)
+    bounds = [0]
+    with open(jsonl_path, "rb") as f:
+        for i in range(1, num_chunks):
+            f.seek(max(size * i // num_chunks, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(s, e) for s, e in zip(bounds[:-1], bounds[1:]) if e > s]
+
+
+def _convert_chunk(args) -> Tuple[str, int, List[int]]:
+    """
+    子进程：解析、校验、格式化一个字节范围，结果写到临时分段文件
+    分段文件格式为 [8 字节长度 + utf-8 元素文本] 的序列，合并时无需再解析 JSON
+    """
+    jsonl_path, start, end, tmp_dir = args
+    fd, frag_path = tempfile.mkstemp(suffix=".frag", dir=tmp_dir)
+    count, invalid = 0, []
+    with os.fdopen(fd, "wb") as out:
+        for offset, line in iter_lines(jsonl_path, start, end):
+            record = validate_record(line)
+            if record is None:
+                invalid.append(offset)
+                continue
+            data = format_element(record).encode("utf-8")
+            out.write(_LEN.pack(len(data)))
+            out.write(data)
+            count += 1
+    return frag_path, count, invalid
+
+
+def _read_fragment(frag_path: str) -> Iterator[str]:
+    with open(frag_path, "rb") as f:
+        while True:
+            head = f.read(_LEN.size)
+            if not head:
+                break
+            yield f.read(_LEN.unpack(head)[0]).decode("utf-8")
+
+
+def jsonl_tojson(jsonl_path, json_path, shard_size: Optional[int] = None, compress: Optional[str] = None,
+                 workers: int = 1, strict: bool = False) -> dict:
+    """
+    流式把 jsonl 转成 JSON 数组文件，内存占用与数据集大小无关
+
+    参数：
+        shard_size: 每个分片的记录数，不设置则输出单个文件
+        compress: None / "gzip" / "zstd"
+        workers: 大于 1 时按字节范围切块，多进程并行解析和格式化
+        strict: 遇到非法行时抛出 ValueError 并删除已写出的部分输出，默认跳过并计数
+
+    返回：
+        dict: 写出条数、非法行的字节偏移、输出文件列表
+    """
+    writer = JsonArrayWriter(json_path, shard_size=shard_size, compress=compress)
+    invalid: List[int] = []
+
+    try:
+        if workers <= 1:
+            for offset, line in iter_lines(jsonl_path):
+                record = validate_record(line)
+                if record is None:
+                    if strict:
+                        raise ValueError(f"{jsonl_path} 字节偏移 {offset} 处的记录非法")
+                    invalid.append(offset)
+                    continue
+                writer.write_element(format_element(record))
+        else:
+            tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(json_path)))
+            ranges = chunk_ranges(jsonl_path, workers * 4)
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # map 按提交顺序返回，分段依次合并即可保持原始记录顺序
+                    results = pool.map(_convert_chunk, [(jsonl_path, s, e, tmp_dir) for s, e in ranges])
+                    for frag_path, _, frag_invalid in results:
+                        if frag_invalid and strict:
+                            raise ValueError(f"{jsonl_path} 字节偏移 {frag_invalid[0]} 处的记录非法")
+                        invalid.extend(frag_invalid)
+                        for element in _read_fragment(frag_path):
+                            writer.write_element(element)
+                        os.remove(frag_path)
+            finally:
+                for name in os.listdir(tmp_dir):
+                    os.remove(os.path.join(tmp_dir, name))
+                os.rmdir(tmp_dir)
+
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    if invalid:
+        print(f"跳过 {len(invalid)} 条非法记录，首个位于字节偏移 {invalid[0]}")
+    return {"records": writer.count, "invalid_offsets": invalid, "outputs": writer.paths}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="jsonl 流式转换为 JSON 数组")
+    parser.add_argument("jsonl_path", nargs="?", default="finetune-4-0.8.jsonl")
+    parser.add_argument("json_path", nargs="?", default="finetune-4-0.8.json")
+    parser.add_argument("--shard-size", type=int, default=None, help="每个分片的记录数")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=None)
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--strict", action="store_true", help="遇到非法记录直接报错")
+    args = parser.parse_args()
 
+    stats = jsonl_tojson(args.jsonl_path, args.json_path, shard_size=args.shard_size,
+                         compress=args.compress, workers=args.workers, strict=args.strict)
+    print(f"转换完成，共 {stats['records']} 条，输出：{', '.join(stats['outputs'])}")
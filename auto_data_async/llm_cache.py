@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : llm_cache.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# 缓存模式
+CACHE_READ_THROUGH = "read_through"  # 先查缓存，未命中再调模型并写回（确定性环节，如按政策生成企业画像）
+CACHE_REFRESH = "refresh"            # 不读旧值，调模型后覆盖写入
+CACHE_BYPASS = "bypass"              # 完全不经过缓存（有意随机采样的环节，如 temperature=1.1 的改写）
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite")
+CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "2048"))
+
+# 参与缓存键的请求字段：模型、提示词、采样参数、种子；stream 只影响传输方式，不参与
+KEY_FIELDS = ("model", "messages", "chat_template_kwargs", "temperature", "top_k", "top_p", "n", "seed",
+              "max_tokens")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其余字符约 4 个 1 token"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def make_cache_key(payload: Dict[str, Any]) -> str:
+    """按 hash(model, prompt, 采样参数, seed) 生成内容寻址的缓存键"""
+    key_data = {k: payload[k] for k in KEY_FIELDS if k in payload}
+    raw = json.dumps(key_data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    基于 SQLite 的模型响应缓存：
+    1. 以请求内容哈希为键，命中时直接返回历史输出
+    2. 总大小超过上限时按最近访问时间淘汰到 90%
+    3. 统计本次运行节省的 token 数与耗时
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                tokens INTEGER NOT NULL,
+                elapsed REAL NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self.saved_seconds = 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, tokens, elapsed FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            value, tokens, elapsed = row
+            self.hits += 1
+            self.saved_tokens += tokens
+            self.saved_seconds += elapsed
+            return value
+
+    def put(self, key: str, value: str, tokens: int, elapsed: float):
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, tokens, elapsed, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, value, size, tokens, elapsed, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._conn.commit()
+
+    def _evict(self, target_bytes: int):
+        """按最近访问时间从旧到新淘汰，直到总大小降到 target_bytes 以下"""
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target_bytes:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "saved_tokens": self.saved_tokens,
+            "saved_seconds": round(self.saved_seconds, 2),
+            "entries": entries,
+            "size_mb": round(self._total_bytes / 1024 / 1024, 2),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_cache() -> LLMCache:
+    """进程内共享的缓存实例，首次使用时创建"""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+def cache_report() -> Optional[Dict[str, Any]]:
+    """本次运行的缓存命中与节省统计，未使用过缓存时返回 None"""
+    return _cache.report() if _cache is not None else None
+
+
+def cache_lookup(payload: Dict[str, Any], mode: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    按模式查缓存，返回 (缓存键, 命中的文本)
+    bypass 模式返回 (None, None)，调用方据此跳过写回
+    """
+    if mode == CACHE_BYPASS:
+        return None, None
+    key = make_cache_key(payload)
+    if mode == CACHE_READ_THROUGH:
+        return key, get_cache().get(key)
+    return key, None
+
+
+def cache_store(key: Optional[str], prompt: str, text: str, elapsed: float):
+    """写回一次模型调用结果；空输出视为失败，不缓存"""
+    if key is None or not text:
+        return
+    get_cache().put(key, text, estimate_tokens(prompt) + estimate_tokens(text), elapsed)
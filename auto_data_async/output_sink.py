@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : output_sink.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import asyncio
+import json
+
+
+class JsonlSink:
+    """
+    微调记录的 jsonl 输出端：
+    所有并发任务共用同一个实例，由同一把锁串行追加写入，避免多协程交错写坏行
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.count = 0
+        self._lock = asyncio.Lock()
+
+    async def write(self, record: dict) -> bool:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        async with self._lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.count += 1
+        return True
@@ -6,7 +6,26 @@
 """
 
 import json
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+
+# 政策信息中参与提示词的三个字段
+POLICY_FIELDS = ("申报对象", "扶持领域", "申报条件")
+
+
+def normalize_policy_value(value: Any) -> str:
+    """列表按行拼接，其余非字符串兜底转换，保证同一政策在所有提示词中的文本一致"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(str(v).strip() for v in value if str(v).strip())
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+def build_policy_info(struct_data: dict) -> Mapping[str, str]:
+    """从 struct_data 提取并规范化三个字段，返回只读映射"""
+    return MappingProxyType({k: normalize_policy_value(struct_data.get(k, "")) for k in POLICY_FIELDS})
+
 
 # 加载数据
 with open('../data/database.json', 'r', encoding='utf-8') as f:
@@ -22,37 +41,29 @@ for part_id, pdata in parts.items():
     file_name = policy_toolbox_parts.get(part_id, {}).get("file_name", "未知文件名")
     policy_cache[part_id] = {"file_name": file_name, "struct_data": struct_data}
 
+# 每个政策的 policy_info 在加载时构建一次，之后只读共享，调用方不得修改
+POLICY_INFO: Mapping[str, Mapping[str, str]] = MappingProxyType(
+    {part_id: build_policy_info(cached["struct_data"]) for part_id, cached in policy_cache.items()}
+)
+
+
+def get_policy_info(part_id: str) -> Optional[Mapping[str, str]]:
+    """按 part_id 取预先构建好的 policy_info，不存在时返回 None"""
+    return POLICY_INFO.get(part_id)
+
 
 # 获取政策信息并整理为 policy_info 结构
 def get_policy_info_struct(part_id: str) -> dict:
     """
-    获取政策信息并返回 policy_info 结构
+    获取政策信息并返回 policy_info 结构（兼容旧接口，内容来自 POLICY_INFO）
     """
-    cached = policy_cache.get(part_id)
-    if not cached:
+    policy_info = POLICY_INFO.get(part_id)
+    if policy_info is None:
         return {"error": "part_id.txt not found"}
-
-    struct_data = cached["struct_data"]
-
-    # 提取原文内容
-    policy_info = {
-        "申报对象": struct_data.get("申报对象", ""),
-        "扶持领域": struct_data.get("扶持领域", ""),
-        "申报条件": struct_data.get("申报条件", "")
+    return {
+        "policy_info": policy_info
     }
 
-    # 如果申报条件是列表，则 join 成字符串
-    for key in ["申报对象", "扶持领域", "申报条件"]:
-        value = policy_info.get(key, "")
-        if isinstance(value, list):
-            policy_info[key] = "\n".join(value)
-        elif not isinstance(value, str):
-            policy_info[key] = str(value)  # 兜底转换
-
-        return {
-            "policy_info": policy_info
-        }
-
 
 
 # # 测试输出
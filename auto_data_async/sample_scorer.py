@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : sample_scorer.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+SECTIONS = ("满足项", "不满足项", "不确定项")
+
+# 判定结果
+ACCEPT = "accept"    # 结构完整、无复述、覆盖充分，直接采用初次输出
+VERIFY = "verify"    # 介于两者之间，交给模型复核
+REJECT = "reject"    # 明显不合格，直接丢弃
+
+# 条目中与政策原文连续相同的字符数达到该值，视为复述政策
+ECHO_MIN_CHARS = 15
+# 复述条目占比超过该值直接丢弃
+REJECT_ECHO_RATIO = 0.5
+# 企业字段在输出中被提及的比例达到该值才算覆盖充分
+ACCEPT_COVERAGE = 0.5
+
+_SECTION_HEADER = re.compile(r"^\s*[#*]*\s*(满足项|不满足项|不确定项)\s*[*]*\s*[:：]?\s*(.*)$")
+_ITEM_PREFIX = re.compile(r"^\s*(\d+[.、．)）]|[-*•])\s*")
+# 提示词明确禁止的总结性语句
+_SUMMARY_PHRASE = re.compile(r"(符合|满足).{0,20}(要求|条件)")
+_EMPTY_ITEM = {"无", "暂无", "无。", "暂无。", "..."}
+
+
+@dataclass
+class SampleScore:
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    structure_ok: bool = False
+    echo_items: List[str] = field(default_factory=list)
+    coverage: float = 0.0
+    verdict: str = VERIFY
+    reason: str = ""
+
+
+def parse_sections(output: str) -> Dict[str, List[str]]:
+    """按 满足项/不满足项/不确定项 切分判断结果，返回各部分的条目列表（不含序号）"""
+    sections: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in output.splitlines():
+        header = _SECTION_HEADER.match(line)
+        if header:
+            current = header.group(1)
+            sections.setdefault(current, [])
+            line = header.group(2)
+        if current is None:
+            continue
+        item = _ITEM_PREFIX.sub("", line).strip()
+        if item and item not in _EMPTY_ITEM:
+            sections[current].append(item)
+    return sections
+
+
+def is_policy_echo(item: str, policy_text: str, min_chars: int = ECHO_MIN_CHARS) -> bool:
+    """条目是否复述政策原文：含总结性语句，或与政策原文有 min_chars 个连续相同字符"""
+    if _SUMMARY_PHRASE.search(item):
+        return True
+    if len(item) < min_chars:
+        return False
+    return any(item[i:i + min_chars] in policy_text for i in range(len(item) - min_chars + 1))
+
+
+def _field_mentions(key: str, value: Any) -> List[str]:
+    """一个企业字段可能在输出中出现的写法：字段名和各个取值"""
+    values = value if isinstance(value, list) else [value]
+    return [key] + [str(v) for v in values if len(str(v)) >= 2]
+
+
+def field_coverage(output: str, company_info: Dict[str, Any]) -> float:
+    """company_info_from_text 中被判断结果提及的字段比例"""
+    if not isinstance(company_info, dict) or not company_info:
+        return 0.0
+    hit = sum(1 for k, v in company_info.items() if any(m in output for m in _field_mentions(k, v)))
+    return hit / len(company_info)
+
+
+def score_sample(output: str, policy_text: str, company_info: Dict[str, Any]) -> SampleScore:
+    """
+    复核前的本地打分，不调用模型：
+    1. 结构：三个部分齐全且至少有一条内容，否则丢弃
+    2. 复述：复述政策原文的条目过半则丢弃，有任何一条则交给模型复核
+    3. 覆盖：企业字段提及比例不足则交给模型复核
+    """
+    score = SampleScore(sections=parse_sections(output))
+    items = [item for name in SECTIONS for item in score.sections.get(name, [])]
+    score.structure_ok = all(name in score.sections for name in SECTIONS) and bool(items)
+    if not score.structure_ok:
+        score.verdict, score.reason = REJECT, "缺少满足项/不满足项/不确定项结构"
+        return score
+
+    score.echo_items = [item for item in items if is_policy_echo(item, policy_text)]
+    score.coverage = field_coverage(output, company_info)
+    if len(score.echo_items) > len(items) * REJECT_ECHO_RATIO:
+        score.verdict, score.reason = REJECT, f"{len(score.echo_items)}/{len(items)} 条复述政策原文"
+    elif score.echo_items:
+        score.verdict, score.reason = VERIFY, f"{len(score.echo_items)} 条复述政策原文"
+    elif score.coverage < ACCEPT_COVERAGE:
+        score.verdict, score.reason = VERIFY, f"企业字段覆盖率 {score.coverage:.0%}"
+    else:
+        score.verdict = ACCEPT
+    return score
+
+
+class ScorerStats:
+    """统计预打分的分流结果，以及相对“每条都复核”节省的复核调用（只在开启复核时打分）"""
+
+    def __init__(self):
+        self.counts = {ACCEPT: 0, VERIFY: 0, REJECT: 0}
+
+    def add(self, verdict: str):
+        self.counts[verdict] += 1
+
+    def report(self) -> Dict[str, Any]:
+        total = sum(self.counts.values())
+        saved = self.counts[ACCEPT] + self.counts[REJECT]
+        return {
+            "scored": total,
+            "accepted": self.counts[ACCEPT],
+            "verified": self.counts[VERIFY],
+            "rejected": self.counts[REJECT],
+            "verify_calls_saved": saved,
+            "verify_call_reduction": round(saved / total, 3) if total else 0.0,
+        }
+
+
+_stats: Optional[ScorerStats] = None
+
+
+def record_verdict(verdict: str):
+    global _stats
+    if _stats is None:
+        _stats = ScorerStats()
+    _stats.add(verdict)
+
+
+def scorer_report() -> Optional[Dict[str, Any]]:
+    """本次运行的预打分统计，未启用预打分时返回 None"""
+    return _stats.report() if _stats is not None else None
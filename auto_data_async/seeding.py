@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : seeding.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import hashlib
+import time
+import uuid
+from typing import Optional
+
+
+def new_run_id() -> str:
+    """一次批量运行的编号：时间戳 + 随机后缀"""
+    return time.strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def derive_seed(part_id: str, sample_index: Optional[int] = None, run_id: str = "") -> int:
+    """
+    由 (part_id, sample_index, run_id) 派生的确定性种子，取 31 位以兼容各类后端的 seed 参数
+    sample_index 为空时得到与样本、运行无关的 part_id 级种子（如企业画像，需跨运行共用缓存）
+    """
+    raw = "\x1f".join([str(part_id), "" if sample_index is None else str(sample_index), run_id])
+    digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFF
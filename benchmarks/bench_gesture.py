@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : bench_gesture.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict
+
+from common import ROOT, compare_results, percentiles, write_results
+
+MODES = ("full", "roi")
+
+
+def bench_mode(video: str, mode: str, max_frames: int, roi_margin: float, redetect_interval: int) -> Dict[str, Any]:
+    """
+    用同一段视频逐帧跑一遍识别（不绘制），统计每帧墙钟耗时与 CPU 耗时
+    CPU 用 process_time 计量，包含 MediaPipe 内部线程的开销
+    """
+    import cv2
+    from gesture_recognizer import HandGestureRecognizer
+
+    recognizer = HandGestureRecognizer(roi_tracking=(mode == "roi"), roi_margin=roi_margin,
+                                       redetect_interval=redetect_interval)
+    cap = cv2.VideoCapture(video)
+    wall, cpu = [], []
+    detected = 0
+    try:
+        while cap.isOpened() and len(wall) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            hands, _ = recognizer.detect(frame)
+            cpu.append((time.process_time() - cpu_start) * 1000)
+            wall.append((time.perf_counter() - wall_start) * 1000)
+            detected += bool(hands)
+    finally:
+        cap.release()
+        recognizer.release()
+    result = {"frames": len(wall), "detected": detected,
+              "wall_ms": percentiles(wall), "cpu_ms": percentiles(cpu)}
+    if mode == "roi":
+        result["roi_stats"] = dict(recognizer.roi_stats)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="手势识别每帧耗时：整帧 vs ROI 跟踪")
+    parser.add_argument("video", help="包含手部动作的测试视频")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"逗号分隔，可选 {','.join(MODES)}")
+    parser.add_argument("--max-frames", type=int, default=600)
+    parser.add_argument("--roi-margin", type=float, default=0.5)
+    parser.add_argument("--redetect-interval", type=int, default=30)
+    parser.add_argument("--output", default=None, help="结果 JSON 路径，默认写到 benchmarks/results/")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {"video": os.path.abspath(args.video), "results": {}}
+    for mode in args.modes.split(","):
+        results["results"][mode] = r = bench_mode(args.video, mode, args.max_frames,
+                                                  args.roi_margin, args.redetect_interval)
+        print(f"{mode}: {r['frames']} 帧，检测到手 {r['detected']} 帧，"
+              f"CPU p50/p95 {r['cpu_ms'].get('p50')}/{r['cpu_ms'].get('p95')} ms，"
+              f"墙钟 p50/p95 {r['wall_ms'].get('p50')}/{r['wall_ms'].get('p95')} ms")
+    if set(MODES) <= set(results["results"]):
+        print("\n".join(compare_results(results["results"]["full"], results["results"]["roi"])))
+    print(f"结果已写入：{write_results('bench_gesture', results, args.output)}")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : bench_llm.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, List
+
+import httpx
+
+from common import ROOT, SAMPLE_METADATA, compare_results, load_service, percentiles, write_results
+from mock_llm_server import BackgroundServer, MockConfig, create_mock_app
+
+SCENARIOS = ("stream", "model", "check_policy", "generator")
+
+
+# -------------------------- 单项基准 --------------------------
+async def bench_stream(chat_url: str, policy_url: str, workdir: str, iterations: int) -> Dict[str, Any]:
+    """LLMClient.stream_model_response：首帧时间与输出帧率"""
+    service = load_service(chat_url, policy_url, os.path.join(workdir, "sessions.json"))
+    ttft, fps, total = [], [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        first, frames = None, 0
+        async for chunk in service.llm_client.stream_model_response("请简要介绍企业情况"):
+            if first is None and chunk.strip():
+                first = time.perf_counter() - start
+            frames += 1
+        elapsed = time.perf_counter() - start
+        ttft.append(first or elapsed)
+        total.append(elapsed)
+        fps.append(frames / elapsed)
+    return {"ttft_s": percentiles(ttft), "frames_per_s": percentiles(fps), "total_s": percentiles(total)}
+
+
+async def bench_model(chat_url: str, iterations: int) -> Dict[str, Any]:
+    """auto_data_async.call_local_model_async：流式与非流式的单次调用耗时"""
+    import api_async
+    api_async.API_URL = chat_url
+    result = {}
+    for stream in (True, False):
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await api_async.call_local_model_async("请简要介绍企业情况", stream=stream)
+            latencies.append(time.perf_counter() - start)
+        result["stream" if stream else "non_stream"] = {"latency_s": percentiles(latencies)}
+    return result
+
+
+async def _one_check(client: httpx.AsyncClient, url: str, part_id: str) -> Dict[str, Any]:
+    """发起一次 mode 1 的 /check_policy，记录首字节、首个内容帧、帧数与总耗时"""
+    body = {"part_id": part_id, "session_id": "bench-" + uuid.uuid4().hex, "metadata": SAMPLE_METADATA,
+            "user_input_text": "我们公司在浦东新区，员工120人，做人工智能", "check_mode": 1}
+    start = time.perf_counter()
+    ttfb = first_content = None
+    frames = 0
+    async with client.stream("POST", url, json=body) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            now = time.perf_counter() - start
+            if ttfb is None:
+                ttfb = now
+            frames += 1
+            frame = json.loads(line[len("data:"):])
+            content = frame["choices"][0]["message"].get("content")
+            if first_content is None and content:
+                first_content = now
+    total = time.perf_counter() - start
+    return {"ttfb": ttfb, "first_content": first_content, "frames": frames, "total": total}
+
+
+async def bench_check_policy(chat_url: str, policy_url: str, workdir: str,
+                             levels: List[int], requests_per_level: int) -> Dict[str, Any]:
+    """端到端 /check_policy：按并发级别统计首字节时间、帧率和吞吐"""
+    service = load_service(chat_url, policy_url, os.path.join(workdir, "sessions.json"))
+    result = {}
+    with BackgroundServer(service.app) as server:
+        url = server.base_url + "/check_policy"
+        async with httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=max(levels))) as client:
+            for level in levels:
+                sem = asyncio.Semaphore(level)
+                total_requests = max(level, requests_per_level)
+
+                async def run(i: int):
+                    async with sem:
+                        try:
+                            return await _one_check(client, url, f"BENCH{i:04d}")
+                        except (httpx.HTTPError, ValueError) as e:
+                            return {"error": repr(e)}
+
+                start = time.perf_counter()
+                runs = await asyncio.gather(*[run(i) for i in range(total_requests)])
+                wall = time.perf_counter() - start
+                ok = [r for r in runs if "error" not in r]
+                result[str(level)] = {
+                    "requests": total_requests,
+                    "errors": total_requests - len(ok),
+                    "ttfb_s": percentiles([r["ttfb"] for r in ok if r["ttfb"] is not None]),
+                    "first_content_s": percentiles([r["first_content"] for r in ok if r["first_content"] is not None]),
+                    "frames_per_s": percentiles([r["frames"] / r["total"] for r in ok]),
+                    "total_s": percentiles([r["total"] for r in ok]),
+                    "throughput_rps": round(len(ok) / wall, 3),
+                }
+                print(f"check_policy 并发 {level}: {json.dumps(result[str(level)]['ttfb_s'], ensure_ascii=False)}")
+    return result
+
+
+def _write_fake_database(path: str, num_parts: int) -> List[str]:
+    part_ids = [f"BENCH{i:04d}" for i in range(num_parts)]
+    parts = {pid: {"ext_data": {"struct_data": {
+        "申报对象": ["注册登记和税收户管地在浦东新区的企业"],
+        "扶持领域": "人工智能、集成电路",
+        "申报条件": ["成立满两年", "上年度研发投入不低于营收的 5%"],
+    }}} for pid in part_ids}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"parts": parts, "debug_data": {"policy_toolbox_parts": {}}}, f, ensure_ascii=False)
+    return part_ids
+
+
+async def bench_generator(chat_url: str, workdir: str, num_parts: int, num_samples: int,
+                          concurrency: int) -> Dict[str, Any]:
+    """微调数据生成流水线：samples/hour"""
+    # policy_loader 在导入时读取 ../data/database.json，先在临时目录里准备好目录结构
+    part_ids = _write_fake_database(os.path.join(workdir, "data", "database.json"), num_parts)
+    run_dir = os.path.join(workdir, "run")
+    os.makedirs(run_dir, exist_ok=True)
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite")
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        import api_async
+        api_async.API_URL = chat_url
+        from engine import run_pipeline_async
+        stats = await run_pipeline_async(part_ids, num_samples=num_samples, max_concurrency=concurrency,
+                                         output_path=os.path.join(run_dir, "bench.jsonl"))
+    finally:
+        os.chdir(cwd)
+    return {k: stats[k] for k in ("records", "elapsed_seconds", "samples_per_hour") if k in stats}
+
+
+# -------------------------- 命令行 --------------------------
+async def run_all(args) -> Dict[str, Any]:
+    cfg = MockConfig(token_rate=args.token_rate, ttft=args.ttft, jitter=args.jitter,
+                     error_rate=args.error_rate, disconnect_rate=args.disconnect_rate, seed=0)
+    scenarios = args.scenarios.split(",")
+    results: Dict[str, Any] = {"mock": asdict(cfg), "results": {}}
+    with BackgroundServer(create_mock_app(cfg)) as mock, tempfile.TemporaryDirectory() as workdir:
+        chat_url = mock.base_url + "/v1/chat/completions"
+        policy_url = mock.base_url + "/query/get_part"
+        if "stream" in scenarios:
+            results["results"]["stream"] = await bench_stream(chat_url, policy_url, workdir, args.iterations)
+        if "model" in scenarios:
+            results["results"]["model"] = await bench_model(chat_url, args.iterations)
+        if "check_policy" in scenarios:
+            levels = [int(x) for x in args.concurrency.split(",")]
+            results["results"]["check_policy"] = await bench_check_policy(
+                chat_url, policy_url, workdir, levels, args.requests_per_level)
+        if "generator" in scenarios:
+            results["results"]["generator"] = await bench_generator(
+                chat_url, workdir, args.gen_parts, args.gen_samples, args.gen_concurrency)
+        results["mock_stats"] = vars(mock.app.state.stats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于本地模拟模型服务的性能基准")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔，可选 {','.join(SCENARIOS)}")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="模拟服务每条流每秒 token 数")
+    parser.add_argument("--ttft", type=float, default=0.3, help="模拟服务首 token 延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.2, help="token 间隔抖动比例")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入 HTTP 500 的概率")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="注入中途断流的概率")
+    parser.add_argument("--iterations", type=int, default=5, help="stream/model 场景的重复次数")
+    parser.add_argument("--concurrency", default="1,4,16", help="check_policy 的并发级别，逗号分隔")
+    parser.add_argument("--requests-per-level", type=int, default=16, help="每个并发级别的请求总数")
+    parser.add_argument("--gen-parts", type=int, default=4, help="generator 场景的 part_id 数")
+    parser.add_argument("--gen-samples", type=int, default=3, help="generator 场景每个 part_id 的样本数")
+    parser.add_argument("--gen-concurrency", type=int, default=4, help="generator 场景的并发 part_id 数")
+    parser.add_argument("--output", default=None, help="结果 JSON 路径，默认写到 benchmarks/results/")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 对比并打印变化")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_all(args))
+    path = write_results("bench_llm", results, args.output)
+    print(f"结果已写入：{path}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print("\n".join(compare_results(previous.get("results", {}), results["results"])))
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.join(ROOT, "auto_data_async"))
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : common.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import importlib.util
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# /check_policy 请求中的企业画像（metadata），name 为必填
+SAMPLE_METADATA = {
+    "name": "上海云智科技有限公司", "org": "有限责任公司", "size": "中型企业",
+    "regist_loc": "上海市_浦东新区", "person_size": 120, "industry": ["人工智能"],
+}
+
+
+def percentiles(values: List[float], points=(50, 90, 95, 99)) -> Dict[str, Optional[float]]:
+    """最近秩法求分位数，另附 mean/max/count；单位与输入一致"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    result: Dict[str, Any] = {"count": len(ordered), "mean": round(sum(ordered) / len(ordered), 4)}
+    for p in points:
+        idx = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        result[f"p{p}"] = round(ordered[idx], 4)
+    result["max"] = round(ordered[-1], 4)
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, payload: Dict[str, Any], output: Optional[str] = None) -> str:
+    """结果连同提交号、时间一起写成 JSON，默认 benchmarks/results/<name>-<提交号>-<时间>.json"""
+    commit = git_commit()
+    payload = {"name": name, "commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **payload}
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{commit}-{time.strftime('%Y%m%d%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def compare_results(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> List[str]:
+    """逐项对比两份结果中的数值，返回 “路径: 旧 -> 新 (变化%)” 列表"""
+    lines = []
+    for key, value in new.items():
+        path = f"{prefix}{key}"
+        old_value = old.get(key) if isinstance(old, dict) else None
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            lines.extend(compare_results(old_value, value, path + "."))
+        elif isinstance(value, (int, float)) and isinstance(old_value, (int, float)) and not isinstance(value, bool):
+            change = f"{(value - old_value) / old_value:+.1%}" if old_value else "n/a"
+            lines.append(f"{path}: {old_value} -> {value} ({change})")
+    return lines
+
+
+def load_service(api_url: str, policy_url: str, sessions_file: str):
+    """
+    加载根目录的 qwen32b-class.py（文件名含连字符，只能按路径导入），
+    并把模型接口、政策接口、会话文件指向压测环境
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import policy_utils
+    policy_utils.API_URL = policy_url
+
+    spec = importlib.util.spec_from_file_location("qwen32b_class", os.path.join(ROOT, "qwen32b-class.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for upstream in module.llm_client.router.upstreams.values():
+        upstream.url = api_url
+    module.session_manager.file_path = sessions_file
+    # 服务按 INFO 级别记录每次模型请求，压测时只保留告警
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    module.logger.setLevel(logging.WARNING)
+    return module
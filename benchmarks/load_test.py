@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : load_test.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from common import SAMPLE_METADATA, load_service, percentiles, write_results
+from mock_llm_server import BackgroundServer, MockConfig, create_mock_app
+
+# 追问轮次中用户补充的口语化信息
+FOLLOW_UP_INPUTS = [
+    "我们公司成立于2019年，注册地和税收都在浦东新区",
+    "员工大概150人，其中研发人员40人左右",
+    "去年营收3000万，研发投入大概200万",
+    "公司是高新技术企业，有ISO9001认证",
+    "主要做工业软件和人工智能视觉检测",
+    "信用记录良好，没有失信记录",
+]
+
+
+@dataclass
+class CallResult:
+    kind: str                                   # first / follow_up / mode2
+    ttfb: Optional[float] = None                # 首个 SSE 帧的到达时间
+    gaps: List[float] = field(default_factory=list)  # 相邻帧的间隔
+    total: Optional[float] = None
+    error: Optional[str] = None
+
+
+async def sse_call(client: httpx.AsyncClient, url: str, body: Dict[str, Any], kind: str) -> CallResult:
+    result = CallResult(kind=kind)
+    start = time.perf_counter()
+    last = None
+    stop_seen = False
+    try:
+        async with client.stream("POST", url, json=body) as resp:
+            if resp.status_code != 200:
+                result.error = f"HTTP {resp.status_code}"
+                return result
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                now = time.perf_counter()
+                if result.ttfb is None:
+                    result.ttfb = now - start
+                else:
+                    result.gaps.append(now - last)
+                last = now
+                frame = json.loads(line[len("data:"):])
+                if frame["choices"][0].get("finish_reason") == "stop":
+                    stop_seen = True
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        result.error = type(e).__name__
+        return result
+    result.total = time.perf_counter() - start
+    if not stop_seen:
+        result.error = "no_stop_frame"
+    return result
+
+
+async def user_session(client: httpx.AsyncClient, url: str, part_id: str, follow_ups: int,
+                       think_time: float, rng: random.Random) -> List[CallResult]:
+    """
+    模拟一个用户的多轮会话：
+    mode 1 首次调用 → follow_ups 次带 user_input_text 的追问 → mode 2 收尾
+    每两次调用之间按均值 think_time 的指数分布停顿，模拟阅读与输入
+    """
+    session_id = "load-" + uuid.uuid4().hex
+    base = {"part_id": part_id, "session_id": session_id, "metadata": SAMPLE_METADATA}
+    plan = [("first", {"check_mode": 1})]
+    plan += [("follow_up", {"check_mode": 1, "user_input_text": text})
+             for text in rng.sample(FOLLOW_UP_INPUTS, k=min(follow_ups, len(FOLLOW_UP_INPUTS)))]
+    plan.append(("mode2", {"check_mode": 2}))
+
+    results = []
+    for i, (kind, extra) in enumerate(plan):
+        if i and think_time > 0:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+        results.append(await sse_call(client, url, {**base, **extra}, kind))
+    return results
+
+
+def summarize(results: List[CallResult]) -> Dict[str, Any]:
+    ok = [r for r in results if r.error is None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    return {
+        "calls": len(results),
+        "error_rate": round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+        "errors": errors,
+        "ttfb_s": percentiles([r.ttfb for r in ok]),
+        "frame_gap_s": percentiles([g for r in ok for g in r.gaps]),
+        "total_s": percentiles([r.total for r in ok]),
+    }
+
+
+async def run_level(url: str, users: int, args) -> Dict[str, Any]:
+    """users 个用户同时开始各自的会话，统计本级别的全部调用"""
+    rng = random.Random(args.seed + users)
+    limits = httpx.Limits(max_connections=users + 8, max_keepalive_connections=users + 8)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout), limits=limits) as client:
+        start = time.perf_counter()
+        sessions = await asyncio.gather(*[
+            user_session(client, url, rng.choice(args.part_ids), args.follow_ups, args.think_time,
+                         random.Random(rng.random()))
+            for _ in range(users)
+        ])
+        wall = time.perf_counter() - start
+    calls = [r for s in sessions for r in s]
+    level = {"users": users, "wall_s": round(wall, 2), "calls_per_s": round(len(calls) / wall, 3),
+             "all": summarize(calls)}
+    for kind in ("first", "follow_up", "mode2"):
+        level[kind] = summarize([r for r in calls if r.kind == kind])
+    return level
+
+
+def degraded(level: Dict[str, Any], args) -> Optional[str]:
+    """按 SLO 判断该级别是否已退化，返回原因"""
+    summary = level["all"]
+    if summary["error_rate"] > args.max_error_rate:
+        return f"错误率 {summary['error_rate']:.1%} 超过 {args.max_error_rate:.1%}"
+    p95 = summary["ttfb_s"].get("p95")
+    if p95 is not None and p95 > args.max_p95_ttfb:
+        return f"p95 首字节 {p95:.3f}s 超过 {args.max_p95_ttfb}s"
+    gap = summary["frame_gap_s"].get("p95")
+    if gap is not None and gap > args.max_p95_gap:
+        return f"p95 帧间隔 {gap:.3f}s 超过 {args.max_p95_gap}s"
+    return None
+
+
+async def main_async(args) -> Dict[str, Any]:
+    with ExitStack() as stack:
+        url = args.target
+        mock_cfg = None
+        if url is None:
+            # 未指定目标时在本进程内起模拟模型服务和 qwen32b-class 服务
+            mock_cfg = MockConfig(token_rate=args.token_rate, ttft=args.ttft, error_rate=args.error_rate, seed=args.seed)
+            mock = stack.enter_context(BackgroundServer(create_mock_app(mock_cfg)))
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+            service = load_service(mock.base_url + "/v1/chat/completions", mock.base_url + "/query/get_part",
+                                   f"{workdir}/sessions.json")
+            url = stack.enter_context(BackgroundServer(service.app)).base_url
+        url = url.rstrip("/") + "/check_policy"
+
+        levels, first_degraded = [], None
+        for users in [int(x) for x in args.users.split(",")]:
+            level = await run_level(url, users, args)
+            reason = degraded(level, args)
+            level["degraded"] = reason
+            levels.append(level)
+            s = level["all"]
+            print(f"用户数 {users}: 调用 {s['calls']} 次，错误率 {s['error_rate']:.1%}，"
+                  f"首字节 p50/p95 {s['ttfb_s'].get('p50')}/{s['ttfb_s'].get('p95')}s，"
+                  f"帧间隔 p95 {s['frame_gap_s'].get('p95')}s" + (f"  退化：{reason}" if reason else ""))
+            if reason and first_degraded is None:
+                first_degraded = users
+                if args.stop_on_degrade:
+                    break
+
+    return {
+        "target": args.target or "in-process",
+        "mock": asdict(mock_cfg) if mock_cfg else None,
+        "config": {k: getattr(args, k) for k in ("users", "follow_ups", "think_time", "part_ids",
+                                                 "max_error_rate", "max_p95_ttfb", "max_p95_gap")},
+        "levels": levels,
+        "first_degraded_users": first_degraded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/check_policy 多轮会话压测")
+    parser.add_argument("--target", default=None, help="服务地址，如 http://127.0.0.1:8002；不设置则在进程内起模拟环境")
+    parser.add_argument("--users", default="1,5,10,20", help="并发用户数阶梯，逗号分隔")
+    parser.add_argument("--follow-ups", type=int, default=2, help="每个会话的追问轮数")
+    parser.add_argument("--think-time", type=float, default=1.0, help="两轮调用之间的平均停顿（秒）")
+    parser.add_argument("--part-ids", default="LOAD0001,LOAD0002,LOAD0003", type=lambda s: s.split(","),
+                        help="会话随机选用的 part_id，逗号分隔")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单次调用超时（秒）")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="退化判定：错误率上限")
+    parser.add_argument("--max-p95-ttfb", type=float, default=1.0, help="退化判定：p95 首字节时间上限（秒）")
+    parser.add_argument("--max-p95-gap", type=float, default=0.5, help="退化判定：p95 帧间隔上限（秒）")
+    parser.add_argument("--stop-on-degrade", action="store_true", help="出现退化后不再加压")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="模拟模型每条流每秒 token 数")
+    parser.add_argument("--ttft", type=float, default=0.3, help="模拟模型首 token 延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟模型注入 HTTP 500 的概率")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="结果 JSON 路径，默认写到 benchmarks/results/")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if results["first_degraded_users"] is not None:
+        print(f"服务在 {results['first_degraded_users']} 个并发用户时开始退化")
+    else:
+        print("所有级别均未退化")
+    print(f"结果已写入：{write_results('load_test', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : mock_llm_server.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockConfig:
+    token_rate: float = 40.0        # 每条流每秒输出的 token 数
+    ttft: float = 0.3               # 首 token 延迟（秒）
+    jitter: float = 0.2             # token 间隔的随机抖动比例，0.2 表示 ±20%
+    error_rate: float = 0.0         # 直接返回 HTTP 500 的概率
+    disconnect_rate: float = 0.0    # 流式输出中途断开的概率
+    chars_per_token: int = 2        # 每个 token 对应的中文字符数
+    max_tokens: int = 200           # 通用回复的 token 数
+    seed: Optional[int] = None
+
+
+_COMPANY_JSON = {
+    "name": "上海云智科技有限公司", "org": "有限责任公司", "size": "中型企业", "cap": "民营企业",
+    "establish_time": "2018-05-20", "regist_loc": "上海市_浦东新区", "tax_loc": "上海市_浦东新区",
+    "person_size": 256, "industry": ["人工智能", "软件和信息技术服务业"], "r_d_staff_count": 85,
+    "revenue_last_year": 3850.5, "qualifications": ["高新技术企业证书"], "tags": ["企业级解决方案"],
+}
+_STANDARDIZED = '"name": "上海云智科技有限公司"\n"person_size": 120\n"industry": ["人工智能"]\n"regist_loc": "上海市_浦东新区"'
+_JUDGMENT = ("满足项：\n1. 注册地在浦东新区。\n2. 企业行业为人工智能。\n"
+             "不满足项：\n1. 成立时间不足两年。\n"
+             "不确定项：\n1. 信用记录未提及。\n2. 研发投入占比未提及。")
+_ELEMENTS = "专项名称：测试专项\n兑付金额: 500000 元\n申报期限: 2025-01-01 - 2025-12-31\n牵头部门: 区科经委"
+_FILLER = "企业主要从事人工智能软件研发与技术服务，近年来营收稳步增长，研发团队持续扩大。"
+
+
+def pick_reply(prompt: str, cfg: MockConfig) -> str:
+    """按提示词特征返回结构合理的回复，保证下游解析逻辑走真实路径"""
+    if "标准化专家" in prompt or "标准公司信息字段" in prompt:
+        return _STANDARDIZED
+    if "政策展示要素" in prompt:
+        return _ELEMENTS
+    if "满足项" in prompt or "不满足" in prompt:
+        return _JUDGMENT
+    if "JSON" in prompt or "json" in prompt or "结构化" in prompt:
+        return json.dumps(_COMPANY_JSON, ensure_ascii=False)
+    length = cfg.max_tokens * cfg.chars_per_token
+    return (_FILLER * (length // len(_FILLER) + 1))[:length]
+
+
+class MockStats:
+    def __init__(self):
+        self.requests = 0
+        self.streams = 0
+        self.errors = 0
+        self.disconnects = 0
+        self.active = 0
+        self.peak_active = 0
+
+
+def create_mock_app(cfg: MockConfig) -> FastAPI:
+    """
+    OpenAI 兼容的 /v1/chat/completions 模拟服务：
+    - stream=True 时按 token_rate 逐 token 输出 SSE delta，首 token 前等待 ttft
+    - 支持 n 参数（非流式）、按概率注入 500 错误和中途断流
+    另外提供政策查询接口 /query/get_part，供 policy_utils 在压测时使用
+    """
+    app = FastAPI()
+    rng = random.Random(cfg.seed)
+    app.state.stats = stats = MockStats()
+
+    def interval() -> float:
+        base = 1.0 / cfg.token_rate
+        return max(0.0, base * (1 + rng.uniform(-cfg.jitter, cfg.jitter)))
+
+    def tokens(text: str):
+        step = cfg.chars_per_token
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    @app.post("/v1/chat/completions")
+    async def chat(req: Request):
+        body = await req.json()
+        stats.requests += 1
+        if rng.random() < cfg.error_rate:
+            stats.errors += 1
+            return JSONResponse({"error": {"message": "injected error"}}, status_code=500)
+
+        prompt = body["messages"][-1]["content"]
+        reply = pick_reply(prompt, cfg)
+        completion_id = "chatcmpl-" + uuid.uuid4().hex
+        model = body.get("model", "mock")
+
+        if not body.get("stream"):
+            toks = tokens(reply)
+            await asyncio.sleep(cfg.ttft + sum(interval() for _ in toks))
+            n = body.get("n", 1)
+            return {
+                "id": completion_id, "object": "chat.completion", "model": model,
+                "choices": [{"index": i, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": reply}} for i in range(n)],
+            }
+
+        drop_at = len(reply) // 2 if rng.random() < cfg.disconnect_rate else None
+
+        async def gen():
+            stats.streams += 1
+            stats.active += 1
+            stats.peak_active = max(stats.peak_active, stats.active)
+            try:
+                await asyncio.sleep(cfg.ttft)
+                sent = 0
+                for tok in tokens(reply):
+                    if drop_at is not None and sent >= drop_at:
+                        stats.disconnects += 1
+                        return
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+                    yield "data: " + json.dumps(chunk, ensure_ascii=False) + "\n\n"
+                    sent += len(tok)
+                    await asyncio.sleep(interval())
+                end = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                       "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield "data: " + json.dumps(end) + "\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats.active -= 1
+
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model"}]}
+
+    @app.post("/query/get_part")
+    async def get_part(req: Request):
+        body = await req.json()
+        part_id = body.get("part_id", "")
+        return {
+            "success": True,
+            "data": [{
+                "file_name": f"测试专项 {part_id}",
+                "struct_data": {
+                    "申报对象": "注册登记和税收户管地在浦东新区的企业",
+                    "扶持领域": "人工智能、集成电路、生物医药",
+                    "申报条件": "1. 成立满两年；\n2. 上年度研发投入不低于营收的 5%；\n3. 信用记录良好。",
+                },
+            }],
+        }
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BackgroundServer:
+    """在后台线程里运行一个 ASGI 应用，with 语句结束时停止"""
+
+    def __init__(self, app, port: Optional[int] = None, host: str = "127.0.0.1"):
+        self.app = app
+        self.host = host
+        self.port = port or free_port()
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=self.port, log_level="error",
+                                                     lifespan="on"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError(f"服务启动超时: {self.base_url}")
+            time.sleep(0.02)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的流式模型模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--token-rate", type=float, default=40.0)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(token_rate=args.token_rate, ttft=args.ttft, jitter=args.jitter,
+                        error_rate=args.error_rate, disconnect_rate=args.disconnect_rate)
+    print(f"模拟服务配置：{json.dumps(asdict(config), ensure_ascii=False)}")
+    uvicorn.run(create_mock_app(config), host=args.host, port=args.port, log_level="warning")
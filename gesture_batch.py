@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_batch.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from gesture_recognizer import HandGestureRecognizer
+
+VIDEO_EXTS = {".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v"}
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+# 每个工作进程各自持有一个识别器（一个 MediaPipe Hands 实例），在进程初始化时创建
+_recognizer = None
+
+
+def _init_worker(recognizer_kwargs):
+    global _recognizer
+    cv2.setNumThreads(1)  # 并行度交给进程池，避免每个进程再各开一组 OpenCV 线程
+    _recognizer = HandGestureRecognizer(**recognizer_kwargs)
+
+
+def iter_frames(path, stride=1):
+    """
+    统一遍历视频文件或图片目录，产出 (帧序号, 时间戳毫秒, 画面)
+    图片目录按文件名排序，时间戳为空
+    """
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if os.path.splitext(n)[1].lower() in IMAGE_EXTS)
+        for index, name in enumerate(names):
+            if index % stride:
+                continue
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                yield index, None, frame
+        return
+
+    cap = cv2.VideoCapture(path)
+    try:
+        index = 0
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % stride == 0:
+                yield index, cap.get(cv2.CAP_PROP_POS_MSEC), frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def process_source(path, output_path, stride=1, round_digits=5):
+    """在工作进程中处理一个视频/图片目录，逐帧写出 JSONL，返回统计信息"""
+    start = time.perf_counter()
+    frames = detected = 0
+    _recognizer.reset_tracking()
+    with open(output_path, "w", encoding="utf-8") as f:
+        for index, timestamp_ms, frame in iter_frames(path, stride):
+            hands, _ = _recognizer.detect(frame)
+            for hand in hands:
+                hand["landmarks"] = [[round(v, round_digits) for v in point] for point in hand["landmarks"]]
+            record = {
+                "source": path,
+                "frame": index,
+                "timestamp_ms": timestamp_ms,
+                "gesture": hands[-1]["gesture"] if hands else None,
+                "hands": hands,
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            frames += 1
+            detected += bool(hands)
+    elapsed = time.perf_counter() - start
+    return {"source": path, "output": output_path, "frames": frames, "detected": detected,
+            "seconds": round(elapsed, 2), "fps": round(frames / elapsed, 1) if elapsed else 0.0}
+
+
+def jsonl_to_parquet(jsonl_path, parquet_path):
+    """把逐帧 JSONL 展平为每只手一行的 Parquet（21 个关键点存为长度 63 的列表）"""
+    import pandas as pd  # 可选依赖，仅在 --format parquet 时需要（另需 pyarrow）
+
+    rows = []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            base = {"source": record["source"], "frame": record["frame"], "timestamp_ms": record["timestamp_ms"]}
+            if not record["hands"]:
+                rows.append({**base, "hand_index": None, "handedness": None, "score": None,
+                             "finger_status": None, "gesture": None, "landmarks": None})
+            for i, hand in enumerate(record["hands"]):
+                rows.append({**base, "hand_index": i, "handedness": hand["handedness"], "score": hand["score"],
+                             "finger_status": hand["finger_status"], "gesture": hand["gesture"],
+                             "landmarks": [v for point in hand["landmarks"] for v in point]})
+    pd.DataFrame(rows).to_parquet(parquet_path, index=False)
+
+
+def collect_sources(inputs):
+    """展开命令行输入：视频文件、图片目录，或包含多个视频/子目录的目录"""
+    sources = []
+    for path in inputs:
+        if os.path.isfile(path):
+            sources.append(path)
+        elif os.path.isdir(path):
+            entries = sorted(os.listdir(path))
+            videos = [os.path.join(path, n) for n in entries if os.path.splitext(n)[1].lower() in VIDEO_EXTS]
+            if any(os.path.splitext(n)[1].lower() in IMAGE_EXTS for n in entries):
+                sources.append(path)
+            sources.extend(videos)
+            if not videos:
+                sources.extend(os.path.join(path, n) for n in entries if os.path.isdir(os.path.join(path, n)))
+        else:
+            print(f"跳过不存在的路径：{path}")
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面批量手势识别：视频文件/图片目录 → 逐帧手势与关键点")
+    parser.add_argument("inputs", nargs="+", help="视频文件、图片目录，或包含多个视频的目录")
+    parser.add_argument("--output-dir", default="gesture_output", help="输出目录，每个输入对应一个文件")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数，每个进程一个 Hands 实例")
+    parser.add_argument("--stride", type=int, default=1, help="每隔几帧处理一帧")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--min-detection-confidence", type=float, default=0.7)
+    parser.add_argument("--min-tracking-confidence", type=float, default=0.5)
+    parser.add_argument("--static", action="store_true", help="逐帧独立检测（图片集合不连续时使用）")
+    parser.add_argument("--roi", action="store_true", help="检测到手后只处理手部周围区域")
+    parser.add_argument("--roi-margin", type=float, default=0.5)
+    parser.add_argument("--redetect-interval", type=int, default=30)
+    parser.add_argument("--model", default=None, help="k 近邻手势模型（gesture_features.py 训练得到的 npz）")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        try:
+            import pandas  # noqa: F401
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet 需要安装 pandas 和 pyarrow")
+
+    sources = collect_sources(args.inputs)
+    if not sources:
+        parser.error("没有找到可处理的视频或图片目录")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    recognizer_kwargs = {
+        "static_image_mode": args.static,
+        "max_num_hands": args.max_hands,
+        "min_detection_confidence": args.min_detection_confidence,
+        "min_tracking_confidence": args.min_tracking_confidence,
+        "roi_tracking": args.roi and not args.static,
+        "roi_margin": args.roi_margin,
+        "redetect_interval": args.redetect_interval,
+        "model_path": args.model,
+    }
+    start = time.perf_counter()
+    total_frames = 0
+    workers = max(1, min(args.workers, len(sources)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(recognizer_kwargs,)) as pool:
+        futures = {}
+        for i, path in enumerate(sources):
+            name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+            output_path = os.path.join(args.output_dir, f"{i:04d}_{name}.jsonl")
+            futures[pool.submit(process_source, path, output_path, args.stride)] = path
+        for future in as_completed(futures):
+            try:
+                stats = future.result()
+            except Exception as e:
+                print(f"处理失败：{futures[future]}，原因：{e}")
+                continue
+            if args.format == "parquet":
+                parquet_path = os.path.splitext(stats["output"])[0] + ".parquet"
+                jsonl_to_parquet(stats["output"], parquet_path)
+                os.remove(stats["output"])
+                stats["output"] = parquet_path
+            total_frames += stats["frames"]
+            print(f"{stats['source']}: {stats['frames']} 帧，检测到手 {stats['detected']} 帧，"
+                  f"{stats['fps']} fps → {stats['output']}")
+
+    elapsed = time.perf_counter() - start
+    print(f"共处理 {len(sources)} 个输入、{total_frames} 帧，用时 {elapsed:.1f}s，"
+          f"整体 {total_frames / elapsed if elapsed else 0:.1f} fps（{workers} 个进程）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_dataset.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from gesture_features import apply_aspect
+
+# 文件头：魔数 + 版本号，之后是定长记录，只追加不改写；进程中断时末尾不完整的记录在读取时忽略
+MAGIC = b"GLMK"
+VERSION = 1
+HEADER_SIZE = 8
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # 采集时刻（Unix 时间，秒）
+    ("label", "<u2"),  # 标签编号，对应 <文件>.labels.json 中的下标
+    ("hand", "u1"),  # 0=未知，1=左手，2=右手
+    ("flags", "u1"),  # 保留
+    ("score", "<f4"),  # 左右手判断的置信度
+    ("aspect", "<f4"),  # 画面宽高比，归一化坐标还原几何时使用
+    ("landmarks", "<f4", (21, 3)),  # MediaPipe 归一化关键点
+])
+HAND_CODES = {"Left": 1, "Right": 2}
+HAND_NAMES = {code: name for name, code in HAND_CODES.items()}
+
+
+def labels_path(path):
+    return path + ".labels.json"
+
+
+class LandmarkRecorder:
+    """
+    带标签的关键点采集文件（追加写入，每条记录 272 字节）
+    标签名保存在同名的 .labels.json 中，新标签出现时整体重写这个小文件
+    append 可在任意线程调用
+    """
+
+    def __init__(self, path, flush_every=30):
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self.labels = self._load_labels()
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            check_header(path)
+            # 上次中断时末尾可能留下不完整的记录，截掉后再追加，否则之后的记录全部错位
+            size = os.path.getsize(path)
+            complete = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            if complete != size:
+                os.truncate(path, complete)
+        self._file = open(path, "ab")
+        if is_new:
+            self._file.write(MAGIC + np.array([VERSION], "<u2").tobytes() + b"\0\0")
+        self._buffer = []
+        self.count = 0  # 本次写入的记录数
+
+    def _load_labels(self):
+        if os.path.exists(labels_path(self.path)):
+            with open(labels_path(self.path), "r", encoding="utf-8") as f:
+                return json.load(f)["labels"]
+        return []
+
+    def label_id(self, label):
+        if label not in self.labels:
+            self.labels.append(label)
+            tmp = labels_path(self.path) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"labels": self.labels}, f, ensure_ascii=False)
+            os.replace(tmp, labels_path(self.path))
+        return self.labels.index(label)
+
+    def append(self, landmarks, label, handedness=None, score=None, timestamp=None, aspect=1.0):
+        record = np.zeros((), dtype=RECORD_DTYPE)
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["hand"] = HAND_CODES.get(handedness, 0)
+        record["score"] = score or 0.0
+        record["aspect"] = aspect
+        record["landmarks"] = landmarks
+        with self._lock:
+            if self._file.closed:
+                return  # 停止采集时仍在处理的帧
+            record["label"] = self.label_id(label)
+            self._buffer.append(record.tobytes())
+            self.count += 1
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._file.flush()
+            self._buffer.clear()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._file.close()
+
+
+def check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:4] != MAGIC:
+        raise ValueError(f"不是关键点采集文件：{path}")
+    version = int(np.frombuffer(header[4:6], "<u2")[0])
+    if version != VERSION:
+        raise ValueError(f"不支持的文件版本 {version}：{path}")
+
+
+def load_recording(path):
+    """读取采集文件，返回 (记录数组, 标签名列表)；用内存映射，不整体读入"""
+    check_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)) if count \
+        else np.empty(0, dtype=RECORD_DTYPE)
+    with open(labels_path(path), "r", encoding="utf-8") as f:
+        labels = json.load(f)["labels"]
+    return records, labels
+
+
+def export_npz(paths, output):
+    """
+    合并多个采集文件，导出 gesture_features.py 训练用的 npz（landmarks/labels）
+    landmarks 按每条记录的宽高比还原，与运行时 classify_points 送入分类器的坐标一致
+    """
+    landmarks, names = [], []
+    for path in paths:
+        records, labels = load_recording(path)
+        landmarks.append(apply_aspect(np.asarray(records["landmarks"]), np.asarray(records["aspect"])))
+        names.extend(labels[i] for i in records["label"])
+    np.savez_compressed(output, landmarks=np.concatenate(landmarks) if landmarks else np.empty((0, 21, 3)),
+                        labels=np.array(names))
+    return len(names)
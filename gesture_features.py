@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_features.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# MediaPipe 手部 21 个关键点：0=手腕，之后每根手指 4 个点（根部→指尖）
+WRIST = 0
+FINGER_NAMES = ("thumb", "index", "middle", "ring", "pinky")
+# 每根手指的关键点链：手腕 + 4 个关节点，形状 (5, 5)
+FINGER_CHAINS = np.array([[0, 1, 2, 3, 4],
+                          [0, 5, 6, 7, 8],
+                          [0, 9, 10, 11, 12],
+                          [0, 13, 14, 15, 16],
+                          [0, 17, 18, 19, 20]])
+MIDDLE_MCP = 9
+PINKY_MCP = 17
+INDEX_MCP = 5
+NUM_ANGLES = 15
+FEATURE_DIM = 21 * 3 + NUM_ANGLES
+
+# 关节弯曲角（弧度，0=完全伸直）的判定阈值
+FINGER_BEND_THRESHOLD = 1.0  # 食指-小指：PIP + DIP 弯曲角之和
+THUMB_BEND_THRESHOLD = 0.9  # 拇指：MCP + IP 弯曲角之和
+
+
+def landmarks_to_array(hand_landmarks):
+    """MediaPipe 的 NormalizedLandmarkList → (21, 3) float32 数组，每帧每只手只转换一次"""
+    return np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark], dtype=np.float32)
+
+
+def apply_aspect(points, aspect):
+    """
+    归一化坐标的 x、z 按画面宽度、y 按高度计算，乘以宽高比还原成等比例坐标再算几何特征
+    points 为 (21, 3) 时 aspect 为标量；为 (N, 21, 3) 时 aspect 可为 (N,) 数组
+    """
+    aspect = np.asarray(aspect, dtype=np.float32)
+    scale = np.stack([aspect, np.ones_like(aspect), aspect], axis=-1)
+    return points * (scale[:, None, :] if aspect.ndim else scale)
+
+
+def normalize_landmarks(points):
+    """平移到手腕为原点、按手腕→中指根部距离缩放，消除位置与远近的影响"""
+    centered = points - points[WRIST]
+    scale = np.linalg.norm(centered[MIDDLE_MCP])
+    return centered / scale if scale > 1e-6 else centered
+
+
+def joint_angles(points):
+    """
+    各手指 3 个关节的弯曲角（弧度），形状 (5, 3)，顺序为拇指→小指、根部→指尖
+    弯曲角 = π - 关节处两段骨骼的夹角，伸直时接近 0
+    """
+    chain = points[FINGER_CHAINS]  # (5, 5, 3)
+    bones = np.diff(chain, axis=1)  # (5, 4, 3)
+    bones = bones / np.maximum(np.linalg.norm(bones, axis=2, keepdims=True), 1e-6)
+    cos = np.clip(np.sum(bones[:, :-1] * bones[:, 1:], axis=2), -1.0, 1.0)  # 相邻骨骼方向的夹角余弦
+    return np.arccos(cos).astype(np.float32)
+
+
+def finger_extension(points, angles=None):
+    """
+    每根手指是否伸直，形状 (5,) 的 bool 数组
+    食指-小指看 PIP+DIP 的弯曲角；拇指看 MCP+IP 的弯曲角，并要求指尖比拇指根部离小指根部更远，
+    两者都只依赖关键点之间的相对几何，与左右手、画面镜像和手的朝向无关
+    """
+    if angles is None:
+        angles = joint_angles(points)
+    extended = np.empty(5, dtype=bool)
+    extended[1:] = angles[1:, 1:].sum(axis=1) < FINGER_BEND_THRESHOLD
+    reach = np.linalg.norm(points[4] - points[PINKY_MCP]) > np.linalg.norm(points[2] - points[PINKY_MCP])
+    extended[0] = angles[0, 1:].sum() < THUMB_BEND_THRESHOLD and reach
+    return extended
+
+
+def finger_status_string(extended):
+    """bool 数组 → "10110" 形式的 5 位字符串（拇指、食指、中指、无名指、小指）"""
+    return "".join("1" if e else "0" for e in extended)
+
+
+def feature_vector(points, angles=None):
+    """分类器输入：归一化坐标 (63) + 关节弯曲角/π (15)，float32"""
+    if angles is None:
+        angles = joint_angles(points)
+    return np.concatenate([normalize_landmarks(points).ravel(), angles.ravel() / np.pi]).astype(np.float32)
+
+
+class RuleGestureClassifier:
+    """按手指伸直状态查表的规则分类器（默认分类器）"""
+
+    def __init__(self, gesture_map):
+        self.gesture_map = gesture_map
+
+    def classify(self, points, angles=None):
+        """返回 (手势名, 置信度, 手指状态字符串)"""
+        status = finger_status_string(finger_extension(points, angles))
+        if status in self.gesture_map:
+            return self.gesture_map[status], 1.0, status
+        return f"未知（{status}）", 0.0, status
+
+
+class KNNGestureClassifier:
+    """
+    基于特征向量的 k 近邻分类器，可由录制的关键点样本训练
+    样本量在几千以内时单次预测为几十微秒量级
+    """
+
+    def __init__(self, k=5, max_distance=None, fallback=None):
+        self.k = k
+        self.max_distance = max_distance  # 最近邻距离超过该值时视为未知手势；None 表示不拒识
+        self.fallback = fallback  # 拒识或未训练时退回的分类器（如规则分类器）
+        self.features = np.empty((0, FEATURE_DIM), dtype=np.float32)
+        self.label_ids = np.empty(0, dtype=np.int32)
+        self.labels = []
+
+    def fit(self, landmark_arrays, labels):
+        """landmark_arrays: (N, 21, 3)；labels: 长度 N 的手势名"""
+        landmark_arrays = np.asarray(landmark_arrays, dtype=np.float32)
+        self.labels = sorted(set(labels))
+        index = {label: i for i, label in enumerate(self.labels)}
+        self.features = np.stack([feature_vector(p) for p in landmark_arrays]) if len(landmark_arrays) \
+            else np.empty((0, FEATURE_DIM), dtype=np.float32)
+        self.label_ids = np.array([index[label] for label in labels], dtype=np.int32)
+        return self
+
+    def classify(self, points, angles=None):
+        if angles is None:
+            angles = joint_angles(points)
+        status = finger_status_string(finger_extension(points, angles))
+        if not len(self.features):
+            return self.fallback.classify(points, angles) if self.fallback else (f"未知（{status}）", 0.0, status)
+
+        distances = np.linalg.norm(self.features - feature_vector(points, angles), axis=1)
+        k = min(self.k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        if self.max_distance is not None and distances[nearest].min() > self.max_distance:
+            return self.fallback.classify(points, angles) if self.fallback else (f"未知（{status}）", 0.0, status)
+        votes = np.bincount(self.label_ids[nearest], minlength=len(self.labels))
+        best = int(votes.argmax())
+        return self.labels[best], float(votes[best]) / k, status
+
+    def save(self, path):
+        np.savez_compressed(path, features=self.features, label_ids=self.label_ids,
+                            labels=np.array(self.labels), k=self.k,
+                            max_distance=-1.0 if self.max_distance is None else self.max_distance)
+
+    @classmethod
+    def load(cls, path, fallback=None):
+        data = np.load(path)
+        max_distance = float(data["max_distance"])
+        model = cls(k=int(data["k"]), max_distance=None if max_distance < 0 else max_distance, fallback=fallback)
+        model.features = data["features"].astype(np.float32)
+        model.label_ids = data["label_ids"].astype(np.int32)
+        model.labels = [str(label) for label in data["labels"]]
+        return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用录制的关键点样本训练 k 近邻手势分类器")
+    parser.add_argument("samples", help="npz 文件，包含 landmarks (N,21,3) 与 labels (N,)；"
+                                        "landmarks 需已按宽高比还原（gesture_replay.py --export-npz 的输出即是）")
+    parser.add_argument("--output", default="gesture_knn.npz")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--max-distance", type=float, default=None, help="拒识距离，超过则视为未知手势")
+    args = parser.parse_args()
+
+    data = np.load(args.samples)
+    landmarks, labels = data["landmarks"], [str(label) for label in data["labels"]]
+    model = KNNGestureClassifier(k=args.k, max_distance=args.max_distance).fit(landmarks, labels)
+    model.save(args.output)
+
+    start = time.perf_counter()
+    for points in landmarks[:1000]:
+        model.classify(points)
+    per_frame = (time.perf_counter() - start) / max(1, min(len(landmarks), 1000)) * 1000
+    print(f"样本 {len(labels)} 条、类别 {len(model.labels)} 个，模型已保存到 {args.output}，"
+          f"单帧分类 {per_frame:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
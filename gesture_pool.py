@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_pool.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gesture_profiler import NULL_PROFILER
+from gesture_recognizer import GRAPH_KEYS, LIVE_KEYS, HandGestureRecognizer, build_hands
+from gesture_temporal import TemporalGestureTracker
+
+
+class LatestFrameSlot:
+    """
+    单槽帧缓冲（最新帧优先）：采集端写入时直接覆盖尚未被取走的旧帧，
+    推理端每次只拿到最新的一帧，推理变慢时丢帧而不是积压延迟
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None  # (序号, 画面, 采集时刻)
+        self._seq = 0
+        self._closed = False
+        self.dropped = 0  # 被覆盖、未经推理的帧数
+        self.listener = None  # 写入新帧后调用（推理池用来唤醒负责该画面源的工作线程）
+
+    def put(self, frame, timestamp):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._seq += 1
+            self._item = (self._seq, frame, timestamp)
+            self._cond.notify()
+        listener = self.listener
+        if listener is not None:
+            listener()
+
+    def get(self, timeout=None):
+        """取走最新帧；超时或已关闭时返回 None（timeout=0 为非阻塞）"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._item = None
+            self._closed = False
+            self.dropped = 0
+
+
+class RateMeter:
+    """统计最近 window 秒内的事件频率（帧率）"""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self._times = deque()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self._times.append(now)
+        while self._times and now - self._times[0] > self.window:
+            self._times.popleft()
+
+    @property
+    def rate(self):
+        if len(self._times) < 2:
+            return 0.0
+        span = self._times[-1] - self._times[0]
+        return (len(self._times) - 1) / span if span > 0 else 0.0
+
+
+class _SourceState:
+    """某个画面源在推理池中的状态，只由负责它的工作线程访问 recognizer/tracker"""
+
+    def __init__(self, source_id, slot, on_result, recognizer_kwargs):
+        self.source_id = source_id
+        self.slot = slot
+        self.on_result = on_result
+        self.recognizer_kwargs = recognizer_kwargs  # 首次收到帧时按它创建识别器
+        self.recognizer = None
+        self.tracker = None
+        self.removed = False
+        self.config_queue = queue.Queue()  # 配置变更通道，由工作线程在两帧之间取出应用
+        self.graph_build = None  # (参数, Future) 正在后台构建的 Hands 图
+
+
+class _Worker:
+    def __init__(self, index):
+        self.index = index
+        self.wake = threading.Event()
+        self.sources = []  # 本线程负责的 _SourceState（已注销、待释放的也在其中）
+        self.thread = None
+
+
+class InferencePool:
+    """
+    多画面源共享的手势推理池：工作线程数默认等于 CPU 核数，启动后常驻
+    - 画面源按负载粘性分配给某个工作线程，同一画面源的帧始终由同一线程按顺序处理，
+      其 MediaPipe 跟踪状态（视频模式的 Hands 图）与时序平滑状态不会被别的画面打乱
+    - 每个画面源在所属工作线程上各自持有一个识别器；增删画面源只创建/释放该画面源的识别器，不影响工作线程
+    - 结果通过 on_result(frame, hands, events, captured_at) 在工作线程中回调：
+      hands 为平滑后的每只手（含 handedness），events 为 [(手标签, 新的稳定手势)]
+    """
+
+    def __init__(self, num_workers=None, recognizer_kwargs=None, tracker_kwargs=None, draw=True, profiler=None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.recognizer_kwargs = dict(recognizer_kwargs or {})
+        self.tracker_kwargs = tracker_kwargs or {}
+        self.draw = draw
+        self.profiler = profiler or NULL_PROFILER
+        self._lock = threading.Lock()
+        self._closed = False
+        self._owner = {}  # source_id -> (_Worker, _SourceState)
+        self.workers = [_Worker(i) for i in range(self.num_workers)]
+        # 重建 Hands 图放在单独的后台线程，期间旧图继续工作，构建完成后在两帧之间替换
+        self._builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gesture-graph-builder")
+        for worker in self.workers:
+            worker.thread = threading.Thread(target=self._worker_loop, args=(worker,),
+                                             name=f"gesture-worker-{worker.index}", daemon=True)
+            worker.thread.start()
+
+    @property
+    def sources(self):
+        with self._lock:
+            return list(self._owner)
+
+    def add_source(self, source_id, slot, on_result, **overrides):
+        """
+        登记画面源：分配给当前画面源最少的工作线程，之后该画面源的帧都由它处理
+        overrides 为该画面源单独的识别器参数，覆盖池的默认参数
+        """
+        with self._lock:
+            if source_id in self._owner:
+                raise ValueError(f"画面源已存在：{source_id}")
+            worker = min(self.workers, key=lambda w: sum(not s.removed for s in w.sources))
+            state = _SourceState(source_id, slot, on_result, {**self.recognizer_kwargs, **overrides})
+            worker.sources.append(state)
+            self._owner[source_id] = (worker, state)
+        slot.listener = worker.wake.set
+        worker.wake.set()
+
+    def remove_source(self, source_id):
+        """注销画面源：由所属工作线程在两帧之间释放它的识别器"""
+        with self._lock:
+            if source_id not in self._owner:
+                return
+            worker, state = self._owner.pop(source_id)
+            state.removed = True
+        state.slot.listener = None
+        worker.wake.set()
+
+    def configure(self, source_id=None, **changes):
+        """
+        线程安全的配置通道：source_id 为空时修改默认参数并下发给所有画面源
+        变更由各自的工作线程在两帧之间应用，需要重建 Hands 图的在后台构建后替换，不中断出帧
+        特殊参数 reset_tracking=True 清除 ROI 与时序平滑状态（画面来源切换时使用）
+        """
+        unknown = set(changes) - set(GRAPH_KEYS) - set(LIVE_KEYS) - {"reset_tracking"}
+        if unknown:
+            raise ValueError(f"未知的识别器参数：{', '.join(sorted(unknown))}")
+        with self._lock:
+            if source_id is None:
+                self.recognizer_kwargs.update({k: v for k, v in changes.items() if k != "reset_tracking"})
+                targets = [(w, s) for w in self.workers for s in w.sources if not s.removed]
+            else:
+                # 画面源已注销时忽略（可能刚被移除）
+                targets = [self._owner[source_id]] if source_id in self._owner else []
+        for worker, state in targets:
+            state.config_queue.put(dict(changes))
+            worker.wake.set()
+
+    def _apply_config(self, worker, state):
+        """工作线程在两帧之间调用：应用配置变更，并在后台构建好的新 Hands 图就绪时替换"""
+        while True:
+            try:
+                changes = state.config_queue.get_nowait()
+            except queue.Empty:
+                break
+            if changes.pop("reset_tracking", False) and state.recognizer is not None:
+                state.recognizer.reset_tracking()
+                state.tracker.reset()
+            state.recognizer_kwargs.update(changes)  # 记录该画面源的目标参数；识别器尚未创建时创建时直接使用
+            if state.recognizer is not None:
+                state.recognizer.configure(**changes)
+
+        recognizer = state.recognizer
+        if recognizer is None:
+            return
+        wanted = {key: state.recognizer_kwargs.get(key, value) for key, value in recognizer.graph_config.items()}
+        if state.graph_build is not None:
+            config, future = state.graph_build
+            if not future.done():
+                return
+            state.graph_build = None
+            try:
+                hands = future.result()
+            except Exception:
+                traceback.print_exc()
+                return
+            if config == wanted:
+                recognizer.swap_hands(hands, config)
+                return
+            hands.close()  # 构建期间参数又变了，丢弃这一版
+        if wanted != recognizer.graph_config:
+            future = self._builder.submit(build_hands, **wanted)
+            future.add_done_callback(lambda _: worker.wake.set())
+            state.graph_build = (wanted, future)
+
+    def _process(self, state, item):
+        seq, frame, captured_at = item
+        profiler = self.profiler
+        profiler.record("queue", captured_at, time.perf_counter(), source=state.source_id, frame=seq)
+        if state.recognizer is None:
+            state.recognizer = HandGestureRecognizer(**state.recognizer_kwargs)
+            state.recognizer.profiler = profiler
+            state.tracker = TemporalGestureTracker(state.recognizer.classify_points, **self.tracker_kwargs)
+        with profiler.stage("inference", source=state.source_id, frame=seq):
+            hands, results = state.recognizer.detect(frame)
+        image_height, image_width = frame.shape[:2]
+        with profiler.stage("temporal"):
+            hands, events = state.tracker.update(hands, captured_at, image_width / image_height)
+        if self.draw:
+            state.recognizer.draw(frame, results)
+        state.on_result(frame, hands, events, captured_at)
+
+    def _release(self, worker, state):
+        with self._lock:
+            if state in worker.sources:
+                worker.sources.remove(state)
+        if state.graph_build is not None:
+            state.graph_build[1].add_done_callback(lambda f: f.exception() or f.result().close())
+            state.graph_build = None
+        if state.recognizer is not None:
+            state.recognizer.release()
+
+    def _worker_loop(self, worker):
+        while not self._closed:
+            worker.wake.wait(timeout=0.5)
+            worker.wake.clear()
+            # 轮流处理本线程负责的各画面源，直到所有槽都没有新帧
+            busy = True
+            while busy and not self._closed:
+                busy = False
+                with self._lock:
+                    states = list(worker.sources)
+                for state in states:
+                    if state.removed:
+                        self._release(worker, state)
+                        continue
+                    try:
+                        self._apply_config(worker, state)
+                    except Exception:
+                        traceback.print_exc()
+                    item = state.slot.get(timeout=0)
+                    if item is None:
+                        continue
+                    busy = True
+                    try:
+                        self._process(state, item)
+                    except Exception:
+                        traceback.print_exc()  # 单个画面源出错不影响其他画面源
+        with self._lock:
+            states = list(worker.sources)
+        for state in states:
+            self._release(worker, state)
+
+    def close(self):
+        """停止全部工作线程并释放所有识别器"""
+        self._closed = True
+        for worker in self.workers:
+            worker.wake.set()
+        for worker in self.workers:
+            worker.thread.join()
+        self._builder.shutdown(wait=True)
+        with self._lock:
+            self._owner.clear()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_profiler.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+_NULL_CONTEXT = nullcontext()
+
+
+class StageProfiler:
+    """
+    手势流水线的分阶段计时：
+    - 每个阶段保留最近 window 次耗时，随时计算滚动 p50/p95
+    - 同时记录 Chrome trace 事件（最多 trace_capacity 条，环形覆盖），可导出后在 chrome://tracing 或 Perfetto 中查看慢帧
+    未启用时 stage() 返回共享的空上下文，开销可以忽略
+    """
+
+    def __init__(self, enabled=False, window=300, trace_capacity=20000):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations = {}  # 阶段名 -> deque(毫秒)
+        self._events = deque(maxlen=trace_capacity)
+        self._threads = {}  # 线程 id -> 线程名，用于 trace 中的线程标注
+        self._origin = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._events.clear()
+            self._threads.clear()
+            self._origin = time.perf_counter()
+
+    def stage(self, name, **args):
+        """with profiler.stage("mediapipe"): ... 记录一段耗时；args 会写入 trace 事件"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name, args)
+
+    @contextmanager
+    def _timed(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), **args)
+
+    def record(self, name, start, end, **args):
+        """记录一段已知起止时刻（perf_counter 秒）的耗时，用于跨线程的阶段（如排队、信号投递）"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        event = {"name": name, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+                 "ts": round((start - self._origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.window)
+            durations.append((end - start) * 1000)
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def summary(self):
+        """各阶段最近 window 次的 {count, p50, p95, max}（毫秒），按阶段首次出现的顺序"""
+        with self._lock:
+            snapshot = {name: sorted(values) for name, values in self._durations.items()}
+        result = {}
+        for name, values in snapshot.items():
+            if not values:
+                continue
+            pick = lambda p: values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+            result[name] = {"count": len(values), "p50": round(pick(50), 3), "p95": round(pick(95), 3),
+                            "max": round(values[-1], 3)}
+        return result
+
+    def overlay_lines(self):
+        """调试叠加层的文本行（cv2 只能画 ASCII）"""
+        return ["{:<10} p50 {:6.2f}  p95 {:6.2f} ms".format(name[:10], s["p50"], s["p95"])
+                for name, s in self.summary().items()]
+
+    def export_chrome_trace(self, path):
+        """导出 Chrome trace JSON（Trace Event Format），返回写入的事件数"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in threads.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms",
+                       "otherData": {"summary_ms": self.summary()}}, f, ensure_ascii=False)
+        return len(events)
+
+
+# 未配置分析器时使用的默认实例（始终关闭）
+NULL_PROFILER = StageProfiler(enabled=False, trace_capacity=1)
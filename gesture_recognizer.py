@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_recognizer.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from gesture_features import (KNNGestureClassifier, RuleGestureClassifier, apply_aspect, finger_extension,
+                              finger_status_string, joint_angles, landmarks_to_array)
+from gesture_profiler import NULL_PROFILER
+
+# 只有重建 MediaPipe Hands 图才能生效的参数（构造后修改 hands 的同名属性不会起作用）
+GRAPH_KEYS = ("static_image_mode", "max_num_hands", "min_detection_confidence", "min_tracking_confidence")
+# 可以在两帧之间直接修改的参数
+LIVE_KEYS = ("roi_tracking", "roi_margin", "redetect_interval", "min_roi_size", "model_path")
+# 手势映射：根据手指弯曲状态定义常见手势（界面的采集标签也从这里取）
+GESTURE_MAP = {
+    "00000": "石头（握拳）",
+    "11111": "布（张开手）",
+    "01100": "剪刀（食指+中指伸出）",
+    "10000": "点赞（拇指伸出）",
+    "11001": "OK（拇指+食指圈住）"
+}
+
+
+def build_hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.5):
+    """按参数构建一个 MediaPipe Hands 图（耗时在百毫秒量级，可放到后台线程执行）"""
+    return mp.solutions.hands.Hands(
+        static_image_mode=static_image_mode,  # False=实时视频（跟踪模式），True=逐张图片独立检测
+        max_num_hands=max_num_hands,  # 最多检测的手数
+        min_detection_confidence=min_detection_confidence,  # 检测置信度阈值
+        min_tracking_confidence=min_tracking_confidence  # 跟踪置信度阈值
+    )
+
+
+class HandGestureRecognizer:
+    """手势识别核心类（基于MediaPipe），不依赖 Qt，可在无界面环境中使用"""
+
+    def __init__(self, static_image_mode=False, max_num_hands=1,
+                 min_detection_confidence=0.7, min_tracking_confidence=0.5,
+                 roi_tracking=False, roi_margin=0.5, redetect_interval=30, min_roi_size=160,
+                 classifier=None, model_path=None):
+        # 初始化MediaPipe手势检测器
+        self.mp_hands = mp.solutions.hands
+        self.mp_drawing = mp.solutions.drawing_utils  # 用于绘制手部关键点
+        self.graph_config = {
+            "static_image_mode": static_image_mode,
+            "max_num_hands": max_num_hands,
+            "min_detection_confidence": min_detection_confidence,
+            "min_tracking_confidence": min_tracking_confidence,
+        }
+        self.hands = build_hands(**self.graph_config)
+
+        # 手势映射：根据手指弯曲状态定义常见手势
+        self.GESTURE_MAP = dict(GESTURE_MAP)
+        # 可替换的分类器：需实现 classify(points, angles) -> (手势名, 置信度, 手指状态)
+        # 指定 model_path 时加载训练好的 k 近邻模型，拒识时退回规则分类器
+        self.model_path = model_path
+        self.classifier = classifier or self.load_classifier(model_path)
+
+        # ROI 跟踪：检测到手后只把手部周围的区域送入 MediaPipe（cvtColor 也只做裁剪区域）
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin  # 包围框每边外扩的比例（相对包围框边长）
+        self.redetect_interval = redetect_interval  # 每隔多少帧强制整帧检测一次，用于发现新出现的手；0=不强制
+        self.min_roi_size = min_roi_size  # 裁剪区域的最小边长（像素）
+        self.roi = None  # 当前裁剪区域 (x0, y0, x1, y1)，None 表示整帧
+        self.frames_since_full = 0
+        self.roi_stats = {"roi_frames": 0, "full_frames": 0, "lost": 0}
+        self.profiler = NULL_PROFILER  # 分阶段计时（gesture_profiler.StageProfiler），默认关闭
+
+    def load_classifier(self, model_path):
+        if model_path:
+            return KNNGestureClassifier.load(model_path, fallback=RuleGestureClassifier(self.GESTURE_MAP))
+        return RuleGestureClassifier(self.GESTURE_MAP)
+
+    def configure(self, **changes):
+        """
+        在两帧之间调用：LIVE_KEYS 中的参数立即生效；
+        返回与当前不同、需要重建 Hands 图的参数（由调用方在后台 build_hands 后交给 swap_hands）
+        """
+        graph_changes = {}
+        for key, value in changes.items():
+            if key in GRAPH_KEYS:
+                if self.graph_config[key] != value:
+                    graph_changes[key] = value
+            elif key == "model_path":
+                if value != self.model_path:
+                    self.classifier = self.load_classifier(value)
+                    self.model_path = value
+            elif key in LIVE_KEYS:
+                setattr(self, key, value)
+                if key == "roi_tracking" and not value:
+                    self.reset_tracking()
+            else:
+                raise ValueError(f"未知的识别器参数：{key}")
+        return graph_changes
+
+    def swap_hands(self, hands, graph_config):
+        """在两帧之间换上后台构建好的 Hands 图，关闭旧图"""
+        old, self.hands = self.hands, hands
+        self.graph_config = dict(graph_config)
+        self.reset_tracking()  # 新图没有跟踪状态，下一帧先做整帧检测
+        old.close()
+
+    def get_finger_status(self, hand_landmarks, image_width=None, image_height=None):
+        """
+        判断每根手指的弯曲状态（0=弯曲，1=伸直）
+        返回值：5位字符串（拇指、食指、中指、无名指、小指）
+        基于关节角度判断（见 gesture_features.finger_extension），与图像尺寸无关，参数仅为兼容保留
+        """
+        return finger_status_string(finger_extension(landmarks_to_array(hand_landmarks)))
+
+    def hand_bbox(self, results, image_width, image_height):
+        """所有手部关键点的像素包围框 (x0, y0, x1, y1)"""
+        xs = [p.x for hand in results.multi_hand_landmarks for p in hand.landmark]
+        ys = [p.y for hand in results.multi_hand_landmarks for p in hand.landmark]
+        return min(xs) * image_width, min(ys) * image_height, max(xs) * image_width, max(ys) * image_height
+
+    def expand_roi(self, bbox, image_width, image_height):
+        """按 roi_margin 外扩包围框并取正方形，裁剪到画面范围内"""
+        x0, y0, x1, y1 = bbox
+        side = max(x1 - x0, y1 - y0) * (1 + 2 * self.roi_margin)
+        side = min(max(side, self.min_roi_size), image_width, image_height)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        left = int(min(max(cx - side / 2, 0), image_width - side))
+        top = int(min(max(cy - side / 2, 0), image_height - side))
+        return left, top, left + int(side), top + int(side)
+
+    def update_roi(self, bbox, image_width, image_height):
+        """
+        手仍在当前裁剪区域的内圈时保持区域不动，只有手靠近边缘或大小明显变化时才重新计算，
+        尽量让 MediaPipe 内部的跟踪在稳定的坐标系下工作
+        """
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            inset = (rx1 - rx0) * self.roi_margin / (1 + 2 * self.roi_margin) / 2
+            x0, y0, x1, y1 = bbox
+            inside = (x0 >= rx0 + inset and y0 >= ry0 + inset and x1 <= rx1 - inset and y1 <= ry1 - inset)
+            wanted = self.expand_roi(bbox, image_width, image_height)
+            if inside and 0.7 < (wanted[2] - wanted[0]) / (rx1 - rx0) < 1.3:
+                return
+        self.roi = self.expand_roi(bbox, image_width, image_height)
+
+    def process_region(self, frame, roi):
+        """对整帧或裁剪区域做颜色转换和推理，关键点坐标统一换算回整帧的归一化坐标"""
+        region = frame if roi is None else frame[roi[1]:roi[3], roi[0]:roi[2]]
+        with self.profiler.stage("cvtColor"):
+            rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+        with self.profiler.stage("mediapipe", roi=roi is not None):
+            results = self.hands.process(rgb)
+        if roi is None:
+            return results
+        x0, y0, x1, y1 = roi
+        image_height, image_width = frame.shape[:2]
+        crop_width, crop_height = x1 - x0, y1 - y0
+        for hand_landmarks in results.multi_hand_landmarks or []:
+            for p in hand_landmarks.landmark:
+                p.x = (p.x * crop_width + x0) / image_width
+                p.y = (p.y * crop_height + y0) / image_height
+                p.z = p.z * crop_width / image_width  # z 与 x 同尺度
+        return results
+
+    def run_hands(self, frame):
+        """按 ROI 模式调度一次推理：有裁剪区域时先在区域内推理，丢失后当帧回退整帧"""
+        image_height, image_width = frame.shape[:2]
+        if not self.roi_tracking:
+            return self.process_region(frame, None)
+
+        use_roi = self.roi is not None and not (
+            self.redetect_interval and self.frames_since_full >= self.redetect_interval)
+        results = None
+        if use_roi:
+            results = self.process_region(frame, self.roi)
+            self.roi_stats["roi_frames"] += 1
+            self.frames_since_full += 1
+            if not results.multi_hand_landmarks:
+                self.roi_stats["lost"] += 1
+                results = None
+        if results is None:
+            results = self.process_region(frame, None)
+            self.roi_stats["full_frames"] += 1
+            self.frames_since_full = 0
+
+        if results.multi_hand_landmarks:
+            self.update_roi(self.hand_bbox(results, image_width, image_height), image_width, image_height)
+        else:
+            self.roi = None
+        return results
+
+    def detect(self, frame):
+        """
+        只做检测与分类，不绘制
+        frame: OpenCV格式的画面（BGR）
+        返回：(hands, results)，hands 为每只手的 dict（handedness/score/finger_status/gesture/landmarks），
+        results 为 MediaPipe 原始结果（关键点为整帧归一化坐标），供绘制使用
+        """
+        image_height, image_width = frame.shape[:2]
+        results = self.run_hands(frame)
+        hands = []
+        for i, hand_landmarks in enumerate(results.multi_hand_landmarks or []):
+            handedness, score = None, None
+            if results.multi_handedness and i < len(results.multi_handedness):
+                classification = results.multi_handedness[i].classification[0]
+                handedness, score = classification.label, classification.score
+            points = landmarks_to_array(hand_landmarks)  # (21, 3) float32
+            with self.profiler.stage("classify"):
+                hands.append({"handedness": handedness, "score": score,
+                              **self.classify_points(points, image_width / image_height)})
+        return hands, results
+
+    def classify_points(self, points, aspect=1.0):
+        """
+        对一只手的 (21, 3) 归一化关键点数组分类，返回 finger_status/gesture/gesture_score/landmarks
+        aspect 为画面宽高比：归一化坐标的 x、z 按宽度缩放，先还原成等比例坐标再计算角度
+        """
+        geometry = apply_aspect(points, aspect) if aspect != 1.0 else points
+        gesture, gesture_score, finger_status = self.classifier.classify(geometry, joint_angles(geometry))
+        return {
+            "finger_status": finger_status,
+            "gesture": gesture,
+            "gesture_score": gesture_score,
+            "landmarks": points.tolist(),
+        }
+
+    def reset_tracking(self):
+        """清除 ROI 状态（切换画面来源时调用）"""
+        self.roi = None
+        self.frames_since_full = 0
+
+    def draw(self, frame, results):
+        """在画面上绘制手部关键点和连接线"""
+        with self.profiler.stage("draw"):
+            for hand_landmarks in results.multi_hand_landmarks or []:
+                self.mp_drawing.draw_landmarks(
+                    frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS,
+                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
+                    self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
+                )
+        return frame
+
+    def recognize_gesture(self, frame):
+        """
+        处理单帧画面，返回手势结果和绘制关键点后的画面
+        frame: OpenCV格式的画面（BGR）
+        返回：(gesture_name, annotated_frame)
+        """
+        hands, results = self.detect(frame)
+        self.draw(frame, results)
+        gesture_name = hands[-1]["gesture"] if hands else "未识别手势"
+        return gesture_name, frame
+
+    def release(self):
+        """释放资源"""
+        self.hands.close()
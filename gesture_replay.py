@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_replay.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import argparse
+import json
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from gesture_dataset import HAND_NAMES, export_npz, load_recording
+from gesture_features import KNNGestureClassifier, RuleGestureClassifier, apply_aspect
+from gesture_recognizer import HandGestureRecognizer
+from gesture_temporal import TemporalGestureTracker
+
+
+def load_all(paths):
+    """按顺序合并多个采集文件，返回 (landmarks, 标签名, 左右手, 宽高比, 时间戳)"""
+    landmarks, names, hands, aspects, timestamps = [], [], [], [], []
+    for path in paths:
+        records, labels = load_recording(path)
+        landmarks.append(np.asarray(records["landmarks"]))
+        names.extend(labels[i] for i in records["label"])
+        hands.extend(HAND_NAMES.get(int(h)) for h in records["hand"])
+        aspects.append(np.asarray(records["aspect"]))
+        timestamps.append(np.asarray(records["timestamp"]))
+    if not names:
+        return np.empty((0, 21, 3), np.float32), [], [], np.empty(0), np.empty(0)
+    return (np.concatenate(landmarks), names, hands, np.concatenate(aspects), np.concatenate(timestamps))
+
+
+def split_by_time(names, train_ratio):
+    """每个标签按时间顺序取前 train_ratio 作训练集、其余作测试集，避免相邻帧同时出现在两边"""
+    by_label = defaultdict(list)
+    for i, name in enumerate(names):
+        by_label[name].append(i)
+    train, test = [], []
+    for indexes in by_label.values():
+        cut = int(len(indexes) * train_ratio)
+        train.extend(indexes[:cut])
+        test.extend(indexes[cut:])
+    return sorted(train), sorted(test)
+
+
+def evaluate(recognizer, landmarks, names, hands, aspects, timestamps, indexes, temporal):
+    """
+    逐帧把关键点送入 recognizer.classify_points（不需要摄像头，也不跑 MediaPipe 推理），统计准确率与单帧耗时
+    temporal=True 时再经过 TemporalGestureTracker，按稳定手势计算准确率
+    """
+    tracker = TemporalGestureTracker(recognizer.classify_points) if temporal else None
+    stable = {}
+    predictions, costs = [], []
+    for i in indexes:
+        start = time.perf_counter()
+        if tracker is None:
+            predicted = recognizer.classify_points(landmarks[i], float(aspects[i]))["gesture"]
+        else:
+            hand = {"handedness": hands[i], "score": None, "landmarks": landmarks[i]}
+            _, events = tracker.update([hand], float(timestamps[i]), float(aspects[i]))
+            for key, gesture in events:
+                stable[key] = gesture
+            predicted = stable.get(tracker.hand_key(hand, 0))
+        costs.append((time.perf_counter() - start) * 1000)
+        predictions.append(predicted)
+
+    truth = [names[i] for i in indexes]
+    confusion = defaultdict(Counter)
+    for actual, predicted in zip(truth, predictions):
+        confusion[actual][predicted] += 1
+    per_label = {}
+    for label in sorted(confusion):
+        total = sum(confusion[label].values())
+        predicted_as = sum(row[label] for row in confusion.values())
+        per_label[label] = {
+            "support": total,
+            "recall": round(confusion[label][label] / total, 4) if total else None,
+            "precision": round(confusion[label][label] / predicted_as, 4) if predicted_as else None,
+        }
+    correct = sum(a == p for a, p in zip(truth, predictions))
+    return {
+        "frames": len(truth),
+        "accuracy": round(correct / len(truth), 4) if truth else None,
+        "per_label": per_label,
+        "confusion": {label: dict(row) for label, row in confusion.items()},
+        "cost_ms": {"p50": round(float(np.percentile(costs, 50)), 4), "p95": round(float(np.percentile(costs, 95)), 4),
+                    "mean": round(float(np.mean(costs)), 4)} if costs else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放关键点采集文件：离线评估手势识别的准确率与单帧开销")
+    parser.add_argument("recordings", nargs="+", help="GestureRecognitionWindow 采集的 .glm 文件")
+    parser.add_argument("--model", default=None, help="已训练的 k 近邻模型；不指定时使用规则分类器")
+    parser.add_argument("--train-ratio", type=float, default=0.0,
+                        help="大于 0 时按时间切分，用前一部分训练 k 近邻、其余评估")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--save-model", default=None, help="保存训练得到的 k 近邻模型")
+    parser.add_argument("--temporal", action="store_true", help="同时评估时序平滑与去抖后的稳定手势")
+    parser.add_argument("--export-npz", default=None, help="导出 landmarks/labels npz 后退出")
+    parser.add_argument("--output", default=None, help="评估结果 JSON 路径")
+    args = parser.parse_args()
+
+    if args.export_npz:
+        print(f"已导出 {export_npz(args.recordings, args.export_npz)} 条样本到 {args.export_npz}")
+        return
+
+    landmarks, names, hands, aspects, timestamps = load_all(args.recordings)
+    if not names:
+        parser.error("采集文件中没有记录")
+    print(f"共 {len(names)} 帧，标签分布：{dict(Counter(names))}")
+
+    recognizer = HandGestureRecognizer(static_image_mode=True, model_path=args.model)
+    indexes = list(range(len(names)))
+    if args.train_ratio > 0:
+        train, indexes = split_by_time(names, args.train_ratio)
+        if not indexes:
+            parser.error("--train-ratio 过大，没有留下评估用的帧")
+        start = time.perf_counter()
+        recognizer.classifier = KNNGestureClassifier(
+            k=args.k, fallback=RuleGestureClassifier(recognizer.GESTURE_MAP)).fit(
+            apply_aspect(landmarks[train], aspects[train]),
+            [names[i] for i in train])
+        print(f"用 {len(train)} 帧训练 k 近邻，耗时 {time.perf_counter() - start:.2f}s，评估 {len(indexes)} 帧")
+        if args.save_model:
+            recognizer.classifier.save(args.save_model)
+
+    report = {"recordings": args.recordings, "classifier": type(recognizer.classifier).__name__,
+              "per_frame": evaluate(recognizer, landmarks, names, hands, aspects, timestamps, indexes, False)}
+    if args.temporal:
+        report["temporal"] = evaluate(recognizer, landmarks, names, hands, aspects, timestamps, indexes, True)
+    recognizer.release()
+
+    for mode in ("per_frame", "temporal"):
+        if mode in report:
+            r = report[mode]
+            print(f"[{mode}] 准确率 {r['accuracy']:.2%}，单帧 p50/p95 {r['cost_ms']['p50']}/{r['cost_ms']['p95']} ms")
+            for label, stats in r["per_label"].items():
+                print(f"  {label}: 召回 {stats['recall']}，精确 {stats['precision']}，样本 {stats['support']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入：{args.output}")
+
+
+if __name__ == "__main__":
+    main()
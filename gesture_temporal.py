@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : gesture_temporal.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import math
+from collections import Counter, deque
+
+import numpy as np
+
+NO_GESTURE = "未识别手势"
+
+
+class OneEuroFilter:
+    """
+    One-Euro 低通滤波（Casiez 等，CHI 2012），对整组关键点一次性向量化计算
+    静止时截止频率低、抖动被压住；快速移动时截止频率随速度升高，延迟小
+    min_cutoff 越小越平滑，beta 越大对快速移动越灵敏
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, t):
+        """x: 任意形状的数组（如 (21, 3) 关键点）；t: 时间戳（秒）"""
+        x = np.asarray(x, dtype=np.float32)
+        if self.x_prev is None or t <= self.t_prev:
+            self.x_prev, self.dx_prev, self.t_prev = x, np.zeros_like(x), t
+            return x
+        dt = t - self.t_prev
+        a_d = self._alpha(self.d_cutoff, dt)
+        dx = a_d * (x - self.x_prev) / dt + (1 - a_d) * self.dx_prev
+        cutoff = self.min_cutoff + self.beta * np.abs(dx)
+        a = self._alpha(cutoff, dt)
+        x_hat = a * x + (1 - a) * self.x_prev
+        self.x_prev, self.dx_prev, self.t_prev = x_hat.astype(np.float32), dx, t
+        return self.x_prev
+
+
+class GestureDebouncer:
+    """
+    滑动窗口投票 + 迟滞：新手势在最近 window 帧中占比达到 enter_ratio 才会替换当前稳定手势，
+    当前手势占比仍不低于 stay_ratio 时不切换，避免在两个手势的边界上来回跳
+    """
+
+    def __init__(self, window=8, enter_ratio=0.6, stay_ratio=0.3):
+        self.window = window
+        self.enter_ratio = enter_ratio
+        self.stay_ratio = stay_ratio
+        self.votes = deque(maxlen=window)
+        self.stable = NO_GESTURE
+
+    def reset(self):
+        self.votes.clear()
+        self.stable = NO_GESTURE
+
+    def update(self, label):
+        """加入一帧的标签；稳定手势发生变化时返回新手势，否则返回 None"""
+        self.votes.append(label)
+        counts = Counter(self.votes)
+        candidate, count = counts.most_common(1)[0]
+        if candidate == self.stable:
+            return None
+        if counts[self.stable] / self.window >= self.stay_ratio:
+            return None
+        if count / self.window < self.enter_ratio:
+            return None
+        self.stable = candidate
+        return candidate
+
+
+class TemporalGestureTracker:
+    """
+    识别器之上的时序层：按手（左右手标签）分别平滑关键点、用平滑后的关键点重新分类并投票，
+    只在某只手的稳定手势变化时产生事件；手离开画面时该手的稳定手势变为 NO_GESTURE
+    classify: 与 HandGestureRecognizer.classify_points 相同签名的函数
+    """
+
+    def __init__(self, classify, min_cutoff=1.0, beta=0.05, window=8, enter_ratio=0.6, stay_ratio=0.3,
+                 lost_timeout=0.5):
+        self.classify = classify
+        self.filter_args = {"min_cutoff": min_cutoff, "beta": beta}
+        self.debounce_args = {"window": window, "enter_ratio": enter_ratio, "stay_ratio": stay_ratio}
+        self.lost_timeout = lost_timeout  # 某只手消失超过该时间（秒）且已回到 NO_GESTURE 后丢弃其状态
+        self.filters = {}
+        self.debouncers = {}
+        self.last_seen = {}
+
+    @staticmethod
+    def hand_key(hand, index):
+        return hand.get("handedness") or f"hand{index}"
+
+    def reset(self):
+        self.filters.clear()
+        self.debouncers.clear()
+        self.last_seen.clear()
+
+    def update(self, hands, timestamp, aspect=1.0):
+        """
+        hands: HandGestureRecognizer.detect 返回的列表；timestamp: 采集时刻（秒）
+        返回 (平滑后的 hands, 事件列表 [(手标签, 新的稳定手势)])
+        """
+        smoothed, labels = [], {}
+        for i, hand in enumerate(hands):
+            key = self.hand_key(hand, i)
+            if key not in self.filters:
+                self.filters[key] = OneEuroFilter(**self.filter_args)
+            self.last_seen[key] = timestamp
+            raw = np.asarray(hand["landmarks"], dtype=np.float32)
+            points = self.filters[key](raw, timestamp)
+            # landmarks 换成平滑后的坐标，raw_landmarks 保留检测器原始输出（采集数据集时使用）
+            smoothed.append({**hand, **self.classify(points, aspect), "raw_landmarks": raw})
+            labels[key] = smoothed[-1]["gesture"]
+
+        events = []
+        for key in set(self.debouncers) | set(labels):
+            debouncer = self.debouncers.setdefault(key, GestureDebouncer(**self.debounce_args))
+            changed = debouncer.update(labels.get(key, NO_GESTURE))
+            if changed is not None:
+                events.append((key, changed))
+
+        for key in [k for k, t in self.last_seen.items() if timestamp - t > self.lost_timeout]:
+            if self.debouncers[key].stable == NO_GESTURE:
+                del self.filters[key], self.debouncers[key], self.last_seen[key]
+            else:
+                self.filters[key].reset()  # 重新出现时不要从很久以前的位置开始平滑
+        return smoothed, events
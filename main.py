@@ -1,166 +1,333 @@
+import os
+import queue
 import sys
+import threading
+import time
 import cv2
 import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                             QHBoxLayout, QLabel, QSlider, QPushButton, QSizePolicy)
+                             QHBoxLayout, QLabel, QSlider, QPushButton, QSizePolicy, QComboBox, QCheckBox)
 from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap
-import mediapipe as mp
-
-
-class HandGestureRecognizer:
-    """手势识别核心类（基于MediaPipe）"""
-
-    def __init__(self):
-        # 初始化MediaPipe手势检测器
-        self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils  # 用于绘制手部关键点
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,  # 非静态图片模式（实时视频）
-            max_num_hands=1,  # 最多检测1只手
-            min_detection_confidence=0.7,  # 检测置信度阈值
-            min_tracking_confidence=0.5  # 跟踪置信度阈值
-        )
-
-        # 手势映射：根据手指弯曲状态定义常见手势
-        self.GESTURE_MAP = {
-            "00000": "石头（握拳）",
-            "11111": "布（张开手）",
-            "01100": "剪刀（食指+中指伸出）",
-            "10000": "点赞（拇指伸出）",
-            "11001": "OK（拇指+食指圈住）"
-        }
-
-    def get_finger_status(self, hand_landmarks, image_width, image_height):
-        """
-        判断每根手指的弯曲状态（0=弯曲，1=伸直）
-        返回值：5位字符串（拇指、食指、中指、无名指、小指）
-        """
-        finger_status = []
-
-        # 1. 拇指判断（特殊：需结合x坐标，避免左右手方向影响）
-        thumb_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.THUMB_TIP]
-        thumb_ip = hand_landmarks.landmark[self.mp_hands.HandLandmark.THUMB_IP]
-        # 拇指伸直条件：指尖x坐标 > 指节x坐标（右手）或 指尖x坐标 < 指节x坐标（左手）
-        if (thumb_tip.x > thumb_ip.x and image_width / 2 < thumb_tip.x) or \
-                (thumb_tip.x < thumb_ip.x and image_width / 2 > thumb_tip.x):
-            finger_status.append("1")
-        else:
-            finger_status.append("0")
-
-        # 2. 食指-小指判断（通用：指尖y坐标 < 第三指节y坐标即伸直）
-        for finger_tip_idx in [
-            self.mp_hands.HandLandmark.INDEX_FINGER_TIP,
-            self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP,
-            self.mp_hands.HandLandmark.RING_FINGER_TIP,
-            self.mp_hands.HandLandmark.PINKY_TIP
-        ]:
-            finger_tip = hand_landmarks.landmark[finger_tip_idx]
-            finger_pip = hand_landmarks.landmark[finger_tip_idx - 2]  # 第三指节（PIP）
-            if finger_tip.y < finger_pip.y:
-                finger_status.append("1")
+from PyQt5.QtGui import QImage, QPainter
+
+from gesture_dataset import LandmarkRecorder
+from gesture_pool import InferencePool, LatestFrameSlot, RateMeter
+from gesture_profiler import NULL_PROFILER, StageProfiler
+from gesture_recognizer import GESTURE_MAP, GRAPH_KEYS, LIVE_KEYS
+from gesture_temporal import NO_GESTURE
+
+HAND_NAMES = {"Left": "左手", "Right": "右手"}
+
+
+class _Surface:
+    """一块显示缓冲及包装它的 QImage；QImage 不拥有 numpy 内存，两者必须一起保留、一起丢弃"""
+
+    def __init__(self, source_shape, max_width, max_height):
+        source_height, source_width = source_shape[:2]
+        scale = min(max_width / source_width, max_height / source_height)
+        width, height = max(1, int(source_width * scale)), max(1, int(source_height * scale))
+        self.source_shape = source_shape
+        self.buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        # QImage 直接引用 numpy 内存，不拷贝
+        self.image = QImage(self.buffer.data, width, height, 3 * width, QImage.Format_RGB888)
+        self.scaled = np.empty((height, width, 3), dtype=np.uint8) if (width, height) != (
+            source_width, source_height) else None  # 缩放中间结果（BGR），同样复用
+
+
+class DisplayBuffer:
+    """
+    预览画面的双缓冲：工作线程把画面按预览区域缩放、BGR→RGB 后写入后台缓冲，
+    UI 线程收到通知后只交换前后台索引并直接绘制前台缓冲
+    缓冲与包装它的 QImage 只在画面尺寸变化时重建，平时没有逐帧分配和拷贝；
+    重建只发生在后台那一块上，UI 线程可能正在绘制的前台缓冲在交换之前始终保留
+    """
+
+    def __init__(self, max_width, max_height):
+        self.max_width = max_width
+        self.max_height = max_height
+        self._lock = threading.Lock()  # 保护后台缓冲的写入与前后台交换
+        self._surfaces = [None, None]
+        self.front = 0
+        self._pending = False
+        self.written_at = 0.0  # 最近一次写入完成的时刻，用于统计信号投递耗时
+
+    def write(self, frame):
+        """工作线程调用：把 BGR 画面写入后台缓冲（尺寸不符时只重建后台这一块）"""
+        with self._lock:
+            back = 1 - self.front
+            surface = self._surfaces[back]
+            if surface is None or surface.source_shape != frame.shape:
+                surface = self._surfaces[back] = _Surface(frame.shape, self.max_width, self.max_height)
+            if surface.scaled is None:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=surface.buffer)
             else:
-                finger_status.append("0")
-
-        return "".join(finger_status)
-
-    def recognize_gesture(self, frame):
+                height, width = surface.buffer.shape[:2]
+                cv2.resize(frame, (width, height), dst=surface.scaled, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(surface.scaled, cv2.COLOR_BGR2RGB, dst=surface.buffer)
+            self._pending = True
+            self.written_at = time.perf_counter()
+
+    def swap(self):
+        """UI 线程调用：有新画面时交换前后台，返回是否交换"""
+        with self._lock:
+            if not self._pending:
+                return False
+            self.front = 1 - self.front
+            self._pending = False
+            return True
+
+    def front_image(self):
         """
-        处理单帧画面，返回手势结果和绘制关键点后的画面
-        frame: OpenCV格式的画面（BGR）
-        返回：(gesture_name, annotated_frame)
+        UI 线程调用：当前前台缓冲对应的 QImage，尚未交换过时为 None
+        前台只会是写完并交换过来的那一块，工作线程只写、只重建后台，绘制期间不会被改写或释放
         """
-        # 转换颜色空间（OpenCV默认BGR，MediaPipe需要RGB）
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image_height, image_width, _ = frame.shape
-        gesture_name = "未识别手势"
-
-        # 处理帧并检测手势
-        results = self.hands.process(rgb_frame)
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # 1. 绘制手部关键点和连接线
-                self.mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
-                    self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
-                )
+        surface = self._surfaces[self.front]
+        return surface.image if surface is not None else None
 
-                # 2. 判断手指状态并识别手势
-                finger_status = self.get_finger_status(hand_landmarks, image_width, image_height)
-                gesture_name = self.GESTURE_MAP.get(finger_status, f"未知（{finger_status}）")
 
-        return gesture_name, frame
+class FrameView(QLabel):
+    """预览区域：有画面时直接绘制 DisplayBuffer 的前台 QImage，否则按 QLabel 显示提示文字"""
 
-    def release(self):
-        """释放资源"""
-        self.hands.close()
+    def __init__(self, width, height, border=2):
+        super().__init__()
+        self.display = DisplayBuffer(width - 2 * border, height - 2 * border)
+        self.showing_frame = False
+        self.profiler = NULL_PROFILER
+
+    def setText(self, text):
+        self.showing_frame = False
+        super().setText(text)
+
+    def on_frame_ready(self):
+        # 从工作线程写完缓冲到UI线程处理该信号的耗时
+        self.profiler.record("signal", self.display.written_at, time.perf_counter())
+        if self.display.swap():
+            if not self.showing_frame:
+                self.showing_frame = True
+                self.clear()
+            self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)  # 边框、背景与提示文字
+        image = self.display.front_image() if self.showing_frame else None
+        if image is None:
+            return
+        with self.profiler.stage("paint"):
+            painter = QPainter(self)
+            painter.drawImage((self.width() - image.width()) // 2, (self.height() - image.height()) // 2, image)
+            painter.end()
 
 
 class CameraThread(QThread):
-    """摄像头采集与手势识别线程（避免阻塞UI）"""
-    # 信号：传递处理后的画面和手势结果
-    frame_signal = pyqtSignal(np.ndarray, str)
-    # 信号：传递摄像头是否打开成功
-    camera_status_signal = pyqtSignal(bool)
-
-    def __init__(self, camera_index=0):
+    """
+    单个摄像头的采集线程（避免阻塞UI）
+    采集与推理分离，通过 LatestFrameSlot 衔接：
+    - 本线程只负责 read + 镜像翻转，节奏由摄像头自身（或视频文件的时间戳）决定，不再固定 sleep
+    - 推理由所有摄像头共享的 InferencePool 完成，每次取最新帧识别，识别慢时旧帧被丢弃，延迟不会累积
+    """
+    # 信号：新画面已写入 display 的后台缓冲（不携带画面数据）
+    frame_ready_signal = pyqtSignal()
+    # 信号：某只手的稳定手势发生变化（画面源, 左右手, 手势），经过关键点平滑与投票去抖
+    gesture_changed_signal = pyqtSignal(str, str, str)
+    # 信号：传递摄像头是否打开成功（画面源, 是否成功）
+    camera_status_signal = pyqtSignal(str, bool)
+
+    # 由采集线程自己应用的参数；其余（识别器参数）转交推理池
+    CAMERA_KEYS = ("camera_index", "show_overlay", "mirror")
+
+    def __init__(self, camera_index=0, pool=None, display=None):
         super().__init__()
         self.camera_index = camera_index  # 摄像头索引（默认0=内置摄像头）
+        self.source_id = f"camera{camera_index}"  # 在推理池和识别结果中标识本画面源（切换索引后不变）
+        self.pool = pool  # 共享的推理池
+        self.display = display  # 预览画面双缓冲（DisplayBuffer），不在预览中时为 None
         self.is_running = False  # 线程运行状态
         self.cap = None  # OpenCV摄像头对象
-        self.recognizer = HandGestureRecognizer()  # 手势识别器
-        self.confidence = 0.7  # 识别置信度（可通过UI调节）
+        self.show_overlay = True  # 是否在画面上叠加帧率/延迟
+        self.mirror = True  # 是否镜像翻转画面
+        self.config_queue = queue.Queue()  # 配置变更通道，采集线程在两帧之间取出应用
+        self.recognizer_overrides = {}  # 本画面源的识别器参数，登记到推理池时带上
+        self._opening = None  # 后台打开中的新摄像头 (索引, 线程, 结果)
+        self.frame_slot = LatestFrameSlot()
+        self.capture_meter = RateMeter()
+        self.inference_meter = RateMeter()
+        self.latency_ms = 0.0  # 最近一帧从采集到完成识别的耗时
+        self.recording = None  # 采集模式下为 (LandmarkRecorder, 标签)，识别到的每只手的原始关键点都写入数据集
+
+    def configure(self, **changes):
+        """
+        线程安全的配置入口（可在UI线程调用）：摄像头参数放入 config_queue 由采集线程在两帧之间应用，
+        识别器参数交给推理池的配置通道，需要重建 Hands 图的由推理池在后台构建后替换
+        """
+        unknown = set(changes) - set(self.CAMERA_KEYS) - set(GRAPH_KEYS) - set(LIVE_KEYS)
+        if unknown:
+            raise ValueError(f"未知的参数：{', '.join(sorted(unknown))}")
+        camera_changes = {k: v for k, v in changes.items() if k in self.CAMERA_KEYS}
+        recognizer_changes = {k: v for k, v in changes.items() if k not in self.CAMERA_KEYS}
+        if camera_changes:
+            if self.is_running:
+                self.config_queue.put(camera_changes)
+            else:
+                for key, value in camera_changes.items():
+                    setattr(self, key, value)
+        if recognizer_changes:
+            self.recognizer_overrides.update(recognizer_changes)
+            if self.source_id in self.pool.sources:
+                self.pool.configure(self.source_id, **recognizer_changes)
 
     def set_camera_index(self, index):
-        """切换摄像头索引"""
-        self.camera_index = index
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = cv2.VideoCapture(self.camera_index)
+        """切换摄像头索引：运行中时在后台打开新摄像头，就绪后在两帧之间替换"""
+        self.configure(camera_index=index)
 
     def set_confidence(self, confidence):
-        """更新识别置信度"""
-        self.confidence = confidence
-        self.recognizer.hands.min_detection_confidence = confidence
+        """更新识别置信度（MediaPipe 构造后不接受修改，由推理池在后台重建 Hands 图后替换）"""
+        self.configure(min_detection_confidence=confidence)
+
+    def _open_in_background(self, index):
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault("cap", cv2.VideoCapture(index)),
+                                  name=f"{self.source_id}-open", daemon=True)
+        thread.start()
+        self._opening = (index, thread, result)
+
+    def _apply_config(self):
+        """采集线程在两帧之间调用：应用配置变更；后台打开的新摄像头就绪后替换旧的"""
+        while True:
+            try:
+                changes = self.config_queue.get_nowait()
+            except queue.Empty:
+                break
+            for key, value in changes.items():
+                if key == "camera_index":
+                    if value != self.camera_index:
+                        self._open_in_background(value)
+                else:
+                    setattr(self, key, value)
+
+        if self._opening is None or self._opening[1].is_alive():
+            return
+        index, _, result = self._opening
+        self._opening = None
+        new_cap = result.get("cap")
+        if new_cap is None or not new_cap.isOpened():
+            if new_cap is not None:
+                new_cap.release()
+            self.camera_status_signal.emit(self.source_id, False)  # 保持使用原摄像头
+            return
+        old_cap, self.cap = self.cap, new_cap
+        old_cap.release()
+        self.camera_index = index
+        self.pool.configure(self.source_id, reset_tracking=True)
+        self.camera_status_signal.emit(self.source_id, True)
+
+    def draw_overlay(self, frame):
+        """左上角叠加采集/推理帧率、端到端延迟和丢帧数（cv2 只能画 ASCII 字符）"""
+        text = "{} | cap {:.1f} fps | inf {:.1f} fps | lat {:.0f} ms | drop {}".format(
+            self.source_id, self.capture_meter.rate, self.inference_meter.rate, self.latency_ms,
+            self.frame_slot.dropped)
+        cv2.putText(frame, text, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(frame, text, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1, cv2.LINE_AA)
+        # 性能分析开启时逐行列出各阶段的滚动 p50/p95
+        if self.pool.profiler.enabled:
+            for i, line in enumerate(self.pool.profiler.overlay_lines()):
+                y = 50 + 18 * i
+                cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 3, cv2.LINE_AA)
+                cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 0), 1, cv2.LINE_AA)
+
+    def handle_result(self, frame, hands, events, captured_at):
+        """推理池工作线程回调：统计、叠加信息、写入预览缓冲并发送手势变化"""
+        now = time.perf_counter()
+        self.inference_meter.tick(now)
+        self.latency_ms = (now - captured_at) * 1000
+
+        # 只有正在预览的画面源才做缩放与颜色转换
+        display = self.display
+        if display is not None:
+            profiler = self.pool.profiler
+            if self.show_overlay:
+                with profiler.stage("overlay"):
+                    self.draw_overlay(frame)
+            with profiler.stage("display"):
+                display.write(frame)
+            self.frame_ready_signal.emit()
+        recording = self.recording
+        if recording is not None and hands:
+            recorder, label = recording
+            image_height, image_width = frame.shape[:2]
+            timestamp = time.time() - (now - captured_at)  # 换算成采集时刻的 Unix 时间
+            for hand in hands:
+                recorder.append(hand["raw_landmarks"], label, hand.get("handedness"), hand.get("score"),
+                                timestamp=timestamp, aspect=image_width / image_height)
+        for hand, gesture in events:
+            self.gesture_changed_signal.emit(self.source_id, hand, gesture)
 
     def run(self):
-        """线程主逻辑：读取摄像头→识别手势→发送信号"""
+        """线程主逻辑：登记到推理池，循环读取画面写入单槽缓冲"""
+        threading.current_thread().name = f"capture-{self.source_id}"  # 便于在 trace 中区分线程
         self.is_running = True
         self.cap = cv2.VideoCapture(self.camera_index)
 
         # 检查摄像头是否打开成功
         if not self.cap.isOpened():
-            self.camera_status_signal.emit(False)
+            self.camera_status_signal.emit(self.source_id, False)
             self.is_running = False
             return
-        self.camera_status_signal.emit(True)
-
-        # 循环读取帧
-        while self.is_running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break  # 读取失败则退出
-
-            # 镜像翻转画面（更符合用户操作习惯）
-            frame = cv2.flip(frame, 1)
-
-            # 手势识别
-            gesture_name, annotated_frame = self.recognizer.recognize_gesture(frame)
-
-            # 发送画面和手势结果到UI线程
-            self.frame_signal.emit(annotated_frame, gesture_name)
-
-            # 控制帧率（避免CPU占用过高）
-            QThread.msleep(30)  # 约33帧/秒
+        self.camera_status_signal.emit(self.source_id, True)
+
+        self.frame_slot.reopen()
+        self.pool.add_source(self.source_id, self.frame_slot, self.handle_result, **self.recognizer_overrides)
+        try:
+            # 实时摄像头的 read() 本身按设备帧率阻塞；视频文件则按 CAP_PROP_POS_MSEC 对齐墙钟时间回放
+            cap = None
+            while self.is_running:
+                self._apply_config()
+                if self.cap is not cap:  # 首次或刚切换了摄像头
+                    cap = self.cap
+                    is_file = cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+                    clock_start = media_start = None
+                if not cap.isOpened():
+                    break
+                with self.pool.profiler.stage("capture", source=self.source_id):
+                    ret, frame = cap.read()
+                if not ret:
+                    break  # 读取失败则退出
+                captured_at = time.perf_counter()
+
+                if is_file:
+                    media_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                    if clock_start is None:
+                        clock_start, media_start = captured_at, media_ms
+                    delay = (media_ms - media_start) / 1000.0 - (captured_at - clock_start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                # 镜像翻转画面（更符合用户操作习惯）
+                if self.mirror:
+                    with self.pool.profiler.stage("flip"):
+                        frame = cv2.flip(frame, 1)
+                self.capture_meter.tick(captured_at)
+                self.frame_slot.put(frame, captured_at)
+        finally:
+            # 只注销本画面源，推理池的工作线程继续为其他摄像头服务
+            self.pool.remove_source(self.source_id)
+            self.frame_slot.close()
 
     def stop(self):
-        """停止线程并释放资源"""
+        """停止线程并释放摄像头"""
         self.is_running = False
+        self.wait()  # 等待线程退出（当前这次 read 结束后）
         if self.cap is not None:
             self.cap.release()
-        self.recognizer.release()
-        self.wait()  # 等待线程退出
+        if self._opening is not None:
+            index, thread, result = self._opening
+            self._opening = None
+            thread.join()
+            if result.get("cap") is not None:
+                result["cap"].release()
+        # 未应用的摄像头参数直接生效，下次启动时使用
+        while not self.config_queue.empty():
+            for key, value in self.config_queue.get_nowait().items():
+                setattr(self, key, value)
 
 
 class GestureRecognitionWindow(QMainWindow):
@@ -173,13 +340,30 @@ class GestureRecognitionWindow(QMainWindow):
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
 
+        # 所有摄像头共享的推理池（工作线程数=CPU核数）；每个画面最多识别2只手，
+        # 检测到手后只处理手部区域；设置 GESTURE_MODEL 时使用训练好的 k 近邻模型
+        # 分阶段计时：GESTURE_PROFILE=1 时启动即开启，也可在界面上勾选「性能分析」
+        self.profiler = StageProfiler(enabled=os.environ.get("GESTURE_PROFILE") == "1")
+        self.pool = InferencePool(recognizer_kwargs={
+            "max_num_hands": 2,
+            "roi_tracking": True,
+            "model_path": os.environ.get("GESTURE_MODEL"),
+        }, profiler=self.profiler)
+        self.cameras = {}  # source_id -> CameraThread
+        self.gestures = {}  # (source_id, 左右手) -> 稳定手势
+        self.is_running = False
+        # 数据集采集：按当前标签把每只手的原始关键点追加写入 GESTURE_DATASET（默认 gesture_dataset.glm），
+        # 之后用 gesture_replay.py 离线回放评估，或导出 npz 训练 k 近邻模型
+        self.dataset_path = os.environ.get("GESTURE_DATASET", "gesture_dataset.glm")
+        self.recorder = None
+        self.record_timer = QTimer(self)
+        self.record_timer.timeout.connect(self.refresh_record_count)
+
         # 初始化UI组件
         self.init_ui()
 
-        # 初始化摄像头线程
-        self.camera_thread = CameraThread(camera_index=0)
-        self.camera_thread.frame_signal.connect(self.update_frame)
-        self.camera_thread.camera_status_signal.connect(self.update_camera_status)
+        # 默认打开内置摄像头
+        self.add_camera(0)
 
     def init_ui(self):
         """构建UI布局（修复预览框变大问题）"""
@@ -189,7 +373,7 @@ class GestureRecognitionWindow(QMainWindow):
         main_layout.setContentsMargins(20, 20, 20, 20)
 
         # 2. 摄像头预览区域（核心修改：固定尺寸+禁止拉伸）
-        self.preview_label = QLabel()
+        self.preview_label = FrameView(640, 480)
         # 固定预览框尺寸（如 640x480，符合常见摄像头分辨率）
         self.preview_label.setMinimumSize(640, 480)
         self.preview_label.setMaximumSize(640, 480)
@@ -197,20 +381,33 @@ class GestureRecognitionWindow(QMainWindow):
         self.preview_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         self.preview_label.setStyleSheet("border: 2px solid #333; background-color: #000;")
         self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.profiler = self.profiler
         main_layout.addWidget(self.preview_label, stretch=0)  # 取消拉伸权重（stretch=0）
 
-        # 3. 手势结果显示区域（不变）
+        # 3. 手势结果显示区域（按画面源和左右手列出）
         self.result_label = QLabel("手势结果：未识别")
         self.result_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #2c3e50;")
         self.result_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(self.result_label, stretch=0)
 
-        # 4. 控制区域（水平布局：不变）
-        control_layout = QHBoxLayout()
+        # 4. 摄像头管理（预览哪一路、增删摄像头）
+        source_layout = QHBoxLayout()
+        source_layout.addWidget(QLabel("预览："))
+        self.source_combo = QComboBox()
+        self.source_combo.currentTextChanged.connect(self.select_preview)
+        source_layout.addWidget(self.source_combo)
+
+        self.add_camera_btn = QPushButton("添加摄像头")
+        self.add_camera_btn.clicked.connect(lambda: self.add_camera())
+        source_layout.addWidget(self.add_camera_btn)
 
-        self.camera_btn = QPushButton("切换摄像头（当前：内置）")
-        self.camera_btn.clicked.connect(self.switch_camera)
-        control_layout.addWidget(self.camera_btn)
+        self.remove_camera_btn = QPushButton("移除摄像头")
+        self.remove_camera_btn.clicked.connect(self.remove_camera)
+        source_layout.addWidget(self.remove_camera_btn)
+        main_layout.addLayout(source_layout, stretch=0)
+
+        # 5. 控制区域（水平布局）
+        control_layout = QHBoxLayout()
 
         self.confidence_slider = QSlider(Qt.Horizontal)
         self.confidence_slider.setRange(50, 90)
@@ -226,85 +423,188 @@ class GestureRecognitionWindow(QMainWindow):
         self.start_stop_btn.clicked.connect(self.toggle_camera)
         control_layout.addWidget(self.start_stop_btn)
 
+        self.profile_checkbox = QCheckBox("性能分析")
+        self.profile_checkbox.setChecked(self.profiler.enabled)
+        self.profile_checkbox.toggled.connect(self.toggle_profiling)
+        control_layout.addWidget(self.profile_checkbox)
+
+        self.export_trace_btn = QPushButton("导出Trace")
+        self.export_trace_btn.clicked.connect(self.export_trace)
+        control_layout.addWidget(self.export_trace_btn)
+
         main_layout.addLayout(control_layout, stretch=0)
 
-        # 5. 固定主窗口尺寸（防止窗口整体变大）
-        self.setFixedSize(700, 650)  # 宽度700（预览框640+左右边距20*2），高度650（预览框480+其他区域）
+        # 6. 数据集采集（标签可从已有手势中选，也可直接输入新标签）
+        record_layout = QHBoxLayout()
+        record_layout.addWidget(QLabel("采集标签："))
+        self.label_combo = QComboBox()
+        self.label_combo.setEditable(True)
+        self.label_combo.addItems(list(GESTURE_MAP.values()))
+        record_layout.addWidget(self.label_combo)
+
+        self.record_btn = QPushButton("开始采集")
+        self.record_btn.clicked.connect(self.toggle_recording)
+        record_layout.addWidget(self.record_btn)
+        self.record_count_label = QLabel("0 条")
+        record_layout.addWidget(self.record_count_label)
+        main_layout.addLayout(record_layout, stretch=0)
+
+        # 7. 固定主窗口尺寸（防止窗口整体变大）
+        self.setFixedSize(700, 750)  # 宽度700（预览框640+左右边距20*2），高度750（预览框480+其他区域+状态栏）
         # 禁止窗口最大化（可选，进一步防止拉伸）
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowMaximizeButtonHint)
 
-    def update_frame(self, frame, gesture_name):
-        """更新摄像头预览画面和手势结果"""
-        # 1. 转换OpenCV帧为PyQt可用的QPixmap
-        image_height, image_width, channel = frame.shape
-        bytes_per_line = channel * image_width
-        # OpenCV是BGR格式，需转换为RGB
-        q_image = QImage(frame.data, image_width, image_height, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-        pixmap = QPixmap.fromImage(q_image)
-
-        # 2. 缩放画面以适应预览区域（保持比例）
-        scaled_pixmap = pixmap.scaled(
-            self.preview_label.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
-        self.preview_label.setPixmap(scaled_pixmap)
-
-        # 3. 更新手势结果
-        self.result_label.setText(f"手势结果：{gesture_name}")
-
-    def update_camera_status(self, is_success):
+    def add_camera(self, camera_index=None):
+        """添加一路摄像头（默认取下一个未使用的索引）；识别运行中则立即启动，不影响其他摄像头"""
+        if camera_index is None:
+            used = {thread.camera_index for thread in self.cameras.values()}
+            camera_index = next(i for i in range(len(used) + 1) if i not in used)
+        thread = CameraThread(camera_index=camera_index, pool=self.pool)
+        thread.frame_ready_signal.connect(self.preview_label.on_frame_ready)
+        thread.gesture_changed_signal.connect(self.update_gesture)
+        thread.camera_status_signal.connect(self.update_camera_status)
+        thread.recording = self.current_recording()
+        self.cameras[thread.source_id] = thread
+        self.source_combo.addItem(thread.source_id)
+        self.source_combo.setCurrentText(thread.source_id)
+        if self.is_running:
+            thread.start()
+
+    def remove_camera(self):
+        """移除当前预览的摄像头，只停止它自己的采集线程"""
+        source_id = self.source_combo.currentText()
+        thread = self.cameras.pop(source_id, None)
+        if thread is None:
+            return
+        thread.display = None
+        if thread.is_running:
+            thread.stop()
+        self.source_combo.removeItem(self.source_combo.findText(source_id))
+        for key in [k for k in self.gestures if k[0] == source_id]:
+            del self.gestures[key]
+        self.refresh_gestures()
+        if not self.cameras:
+            self.preview_label.setText("没有摄像头\n点击「添加摄像头」")
+
+    def select_preview(self, source_id):
+        """切换预览的画面源：只有被预览的一路写入预览缓冲"""
+        for sid, thread in self.cameras.items():
+            thread.display = self.preview_label.display if sid == source_id else None
+        if source_id in self.cameras and self.is_running:
+            self.preview_label.setText(f"正在切换到 {source_id}...")
+
+    def update_gesture(self, source_id, hand, gesture_name):
+        """某只手的稳定手势变化时更新手势结果"""
+        if gesture_name == NO_GESTURE:
+            self.gestures.pop((source_id, hand), None)
+        else:
+            self.gestures[(source_id, hand)] = gesture_name
+        self.refresh_gestures()
+
+    def refresh_gestures(self):
+        if not self.gestures:
+            self.result_label.setText("手势结果：未识别")
+            return
+        parts = [f"{sid} {HAND_NAMES.get(hand, hand)}：{gesture}"
+                 for (sid, hand), gesture in sorted(self.gestures.items())]
+        self.result_label.setText("手势结果：" + " | ".join(parts))
+
+    def update_camera_status(self, source_id, is_success):
         """更新摄像头状态提示"""
-        if not is_success:
-            self.preview_label.setText("摄像头打开失败！\n请检查摄像头是否连接或被占用")
-            self.start_stop_btn.setText("开始识别")
+        if not is_success and source_id == self.source_combo.currentText():
+            self.preview_label.setText(f"{source_id} 打开失败！\n请检查摄像头是否连接或被占用")
 
     def toggle_camera(self):
-        """启停摄像头识别"""
-        if not self.camera_thread.is_running:
+        """启停全部摄像头的识别（推理池常驻，不随启停重建）"""
+        if not self.is_running:
             # 开始识别
-            self.camera_thread.start()
+            self.is_running = True
+            for thread in self.cameras.values():
+                thread.start()
             self.start_stop_btn.setText("停止识别")
             self.preview_label.setText("正在启动摄像头...")
         else:
             # 停止识别
-            self.camera_thread.stop()
+            self.is_running = False
+            for thread in self.cameras.values():
+                thread.stop()
+            self.gestures.clear()
+            self.refresh_gestures()
             self.start_stop_btn.setText("开始识别")
             self.preview_label.setText("摄像头已停止\n点击「开始识别」重新启动")
 
-    def switch_camera(self):
-        """切换摄像头（内置→外接，或外接→内置）"""
-        current_index = self.camera_thread.camera_index
-        new_index = 1 if current_index == 0 else 0
-        self.camera_thread.set_camera_index(new_index)
-
-        # 更新按钮文本
-        btn_text = "切换摄像头（当前：外接）" if new_index == 1 else "切换摄像头（当前：内置）"
-        self.camera_btn.setText(btn_text)
-
-        # 若摄像头正在运行，重启以应用新索引
-        if self.camera_thread.is_running:
-            self.camera_thread.stop()
-            self.camera_thread.start()
-            self.preview_label.setText("正在切换摄像头...")
-
     def update_confidence(self, value):
         """更新识别置信度"""
         confidence = value / 100.0  # 转换为0.0~1.0
-        self.camera_thread.set_confidence(confidence)
+        # 经推理池的配置通道下发给所有画面源：后台重建 Hands 图，就绪后在两帧之间替换，不停帧
+        self.pool.configure(min_detection_confidence=confidence)
         self.confidence_label.setText(f"{value}%")
 
+    def toggle_profiling(self, enabled):
+        """开启时清空旧数据重新统计"""
+        if enabled:
+            self.profiler.reset()
+        self.profiler.enabled = enabled
+
+    def export_trace(self):
+        """导出 Chrome trace（chrome://tracing 或 ui.perfetto.dev 打开），路径显示在状态栏"""
+        path = os.path.abspath(f"gesture_trace_{time.strftime('%Y%m%d%H%M%S')}.json")
+        count = self.profiler.export_chrome_trace(path)
+        self.statusBar().showMessage(f"已导出 {count} 个事件：{path}", 8000)
+
+    def current_recording(self):
+        if self.recorder is None:
+            return None
+        return self.recorder, self.label_combo.currentText().strip()
+
+    def toggle_recording(self):
+        """开始/停止采集；采集中修改标签需先停止，避免前后两段数据混用一个标签"""
+        if self.recorder is None:
+            if not self.label_combo.currentText().strip():
+                self.statusBar().showMessage("请先选择或输入采集标签", 5000)
+                return
+            try:
+                self.recorder = LandmarkRecorder(self.dataset_path)
+            except (OSError, ValueError) as e:
+                self.statusBar().showMessage(f"无法打开采集文件：{e}", 8000)
+                return
+            self.label_combo.setEnabled(False)
+            self.record_btn.setText("停止采集")
+            self.record_timer.start(500)
+        else:
+            self.stop_recording()
+        recording = self.current_recording()
+        for thread in self.cameras.values():
+            thread.recording = recording
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        recorder, self.recorder = self.recorder, None
+        for thread in self.cameras.values():
+            thread.recording = None
+        recorder.close()
+        self.record_timer.stop()
+        self.label_combo.setEnabled(True)
+        self.record_btn.setText("开始采集")
+        self.statusBar().showMessage(f"已采集 {recorder.count} 条：{os.path.abspath(recorder.path)}", 8000)
+
+    def refresh_record_count(self):
+        if self.recorder is not None:
+            self.record_count_label.setText(f"{self.recorder.count} 条")
+
     def closeEvent(self, event):
         """窗口关闭时释放资源"""
-        if self.camera_thread.is_running:
-            self.camera_thread.stop()
+        for thread in self.cameras.values():
+            if thread.is_running:
+                thread.stop()
+        self.stop_recording()
+        self.pool.close()
         event.accept()
 
 
 if __name__ == "__main__":
     # 解决PyQt5与OpenCV的Qt版本冲突（部分环境需添加）
-    import os
-
     os.environ["QT_QPA_PLATFORM_PLUGIN_PATH"] = ""
 
     app = QApplication(sys.argv)
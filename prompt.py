@@ -5,14 +5,8 @@
 @Date    : 2025/8/21 14:14
 """
 from typing import List, Dict, Any, Optional
-from policy_utils import get_policy_info, parts, ori_data
 import json
 
-policy_file_name_cache = {
-    pid: pdata.get("file_name", f"政策 {pid}")
-    for pid, pdata in ori_data.get("debug_data", {}).get("policy_toolbox_parts", {}).items()
-}
-
 def empty_company_info_dict() -> Dict[str, Any]:
     return {
         "name": "",
@@ -44,7 +38,8 @@ def empty_company_info_dict() -> Dict[str, Any]:
     }
 
 def build_policy_elements_prompt(part_id: str, policy_info: Dict[str, Any]) -> str:
-    policy_name = policy_file_name_cache.get(part_id, f"政策 {part_id}")
+    # 政策接口返回的 policy_info 自带 file_name
+    policy_name = policy_info.get("file_name") or f"政策 {part_id}"
     policy_text_lines = [f"{key}: {value}" for key, value in policy_info.items()]
     policy_text = "\n".join(policy_text_lines)
     prompt = f"""
@@ -7,6 +7,7 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, AsyncGenerator, Optional, Any
+from dataclasses import dataclass, field
 import httpx
 import logging
 import json
@@ -14,7 +15,8 @@ import uuid
 import asyncio
 import time
 import os
-from contextlib import asynccontextmanager
+import random
+from contextlib import asynccontextmanager, suppress
 
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import StreamingResponse
@@ -25,6 +27,7 @@ from prompt import (
     build_company_judgment_prompt,
     build_company_standardization_prompt
 )
+from tolerant_parser import TolerantParser
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +36,8 @@ API_URL = "http://192.168.2.233:58000/v1/chat/completions"
 SESSIONS_FILE = "data/sessions.json"
 MAX_RECORDS = 100
 EXPIRY_HOURS = 1
+# 同一 session 上一轮还在输出时新请求的处理方式：queue 排队等待 / reject 返回 409 / cancel 中止旧的输出
+SESSION_BUSY_POLICY = os.getenv("SESSION_BUSY_POLICY", "queue")
 
 # -------------------------- 请求/响应模型 --------------------------
 class NewCheckRequest(BaseModel):
@@ -64,6 +69,15 @@ class BaseUtils:
             cleaned_data[key] = value
         return cleaned_data
 
+    @staticmethod
+    def scalars_to_text(value: Any) -> Any:
+        """数字、布尔值转成字符串（列表逐项处理），与会话中已保存的标准化字段类型保持一致"""
+        if isinstance(value, list):
+            return [BaseUtils.scalars_to_text(v) for v in value]
+        if isinstance(value, (bool, int, float)):
+            return json.dumps(value)
+        return value
+
     @staticmethod
     def load_json(file: str) -> Dict[str, Any]:
         if not os.path.exists(file):
@@ -82,47 +96,102 @@ class BaseUtils:
 baseutils =  BaseUtils()
 # -------------------------- 会话管理类 --------------------------
 class SessionManager:
+    """
+    会话存储：每个 session 只保存一份当前企业画像，外加按 part_id 分组的增量和用户输入
+        {
+            "profile": {...},                   # 合并后的最新企业画像
+            "parts": {
+                part_id: {
+                    "first_output_done": true,  # 是否已展示过该政策的要素
+                    "inputs": [...],            # 去重后的用户输入，按出现顺序
+                    "deltas": [{"ts": ..., "input": ..., "changes": {...}}]  # 每轮标准化新增的字段，最多 max_records 条
+                }
+            },
+            "last_update": ts
+        }
+    会话常驻内存，读操作不再解析文件；写操作整体落盘
+    """
+
     def __init__(self, file_path: str = SESSIONS_FILE, max_records: int = MAX_RECORDS, expiry_hours: int = EXPIRY_HOURS):
         self.file_path = file_path
         self.max_records = max_records
         self.expiry_hours = expiry_hours
+        self._sessions: Optional[Dict[str, Any]] = None
 
     def load_sessions(self) -> Dict[str, Any]:
-        return baseutils.load_json(self.file_path)
+        if self._sessions is None:
+            self._sessions = {sid: self._migrate(data) for sid, data in baseutils.load_json(self.file_path).items()}
+        return self._sessions
 
-    def save_sessions(self, sessions: Dict[str, Any]):
-        baseutils.save_json(self.file_path, sessions)
+    def save_sessions(self, sessions: Optional[Dict[str, Any]] = None):
+        if sessions is not None:
+            self._sessions = sessions
+        if os.path.dirname(self.file_path):
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        baseutils.save_json(self.file_path, self.load_sessions())
 
-    def save_session_record(self, session_id: str, merged_info: str, part_id: str, user_input_text: Optional[str] = None):
-        if not merged_info:
-            return
-        now = time.time()
+    @staticmethod
+    def _migrate(data: Dict[str, Any]) -> Dict[str, Any]:
+        """旧格式（records 列表，每条保存完整画像快照）转换为 profile + parts"""
+        if "records" not in data:
+            return data
+        session = {"profile": {}, "parts": {}, "last_update": data.get("last_update", 0)}
+        for rec in data["records"]:
+            part = session["parts"].setdefault(rec["part_id"], {"first_output_done": True, "inputs": [], "deltas": []})
+            text = (rec.get("user_input_text") or "").strip()
+            if text and text not in part["inputs"]:
+                part["inputs"].append(text)
+            if rec.get("content"):
+                try:
+                    session["profile"] = json.loads(rec["content"])
+                except (TypeError, ValueError):
+                    pass
+        return session
+
+    def _part(self, session_id: str, part_id: str) -> Dict[str, Any]:
         sessions = self.load_sessions()
-        self.cleanup_sessions(sessions)
-
-        if session_id not in sessions:
-            sessions[session_id] = {"records": [], "last_update": now}
-        session = sessions[session_id]
-
-        first_done = not any(rec["part_id"] == part_id for rec in session["records"])
-        session["records"].append({
-            "role": "user",
-            "user_input_text": user_input_text,
-            "content": merged_info,
-            "part_id": part_id,
-            "first_output_done": first_done
-        })
-        if len(session["records"]) > self.max_records:
-            session["records"] = session["records"][-self.max_records:]
-        session["last_update"] = now
-        self.save_sessions(sessions)
+        session = sessions.setdefault(session_id, {"profile": {}, "parts": {}, "last_update": time.time()})
+        return session["parts"].setdefault(part_id, {"first_output_done": False, "inputs": [], "deltas": []})
+
+    def get_profile(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """最新企业画像的副本，会话不存在或还没有画像时返回 None"""
+        profile = self.load_sessions().get(session_id, {}).get("profile")
+        return dict(profile) if profile else None
+
+    def get_history_text(self, session_id: str, part_id: str) -> str:
+        """该 part_id 下用户历次输入（已去重），按行拼接"""
+        part = self.load_sessions().get(session_id, {}).get("parts", {}).get(part_id)
+        return "\n".join(part["inputs"]) if part else ""
+
+    def save_session_record(self, session_id: str, profile: Dict[str, Any], part_id: str,
+                            user_input_text: Optional[str] = None, changes: Optional[Dict[str, Any]] = None):
+        """更新企业画像，并在 part_id 下记录本轮输入和新增字段"""
+        if not profile:
+            return
+        part = self._part(session_id, part_id)
+        part["first_output_done"] = True
+        text = (user_input_text or "").strip()
+        if text and text not in part["inputs"]:
+            part["inputs"].append(text)
+        if changes:
+            part["deltas"].append({"ts": time.time(), "input": text, "changes": changes})
+            if len(part["deltas"]) > self.max_records:
+                part["deltas"] = part["deltas"][-self.max_records:]
+
+        session = self.load_sessions()[session_id]
+        session["profile"] = profile
+        session["last_update"] = time.time()
+        self.cleanup_sessions()
+
+    def mark_first_output_done(self, session_id: str, part_id: str):
+        """政策要素已展示，同一会话再次查询该政策时不再重复"""
+        self._part(session_id, part_id)["first_output_done"] = True
+        self.load_sessions()[session_id]["last_update"] = time.time()
+        self.save_sessions()
 
     def check_first_output_done(self, session_id: str, part_id: str) -> bool:
-        sessions = self.load_sessions()
-        for rec in sessions.get(session_id, {}).get("records", []):
-            if rec["part_id"] == part_id:
-                return rec.get("first_output_done", False)
-        return False
+        part = self.load_sessions().get(session_id, {}).get("parts", {}).get(part_id)
+        return bool(part and part.get("first_output_done"))
 
     def cleanup_sessions(self, sessions: Optional[Dict[str, Any]] = None):
         if sessions is None:
@@ -141,48 +210,264 @@ class SessionManager:
             self.cleanup_sessions()
             await asyncio.sleep(interval_hours * 3600)
 
+# -------------------------- 会话锁 --------------------------
+class SessionBusyError(Exception):
+    pass
+
+
+class _LockEntry:
+    __slots__ = ("lock", "refs", "superseded")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.refs = 0                                   # 持有者 + 等待者数量，归零时回收
+        self.superseded: Optional[asyncio.Event] = None  # 当前持有者的中止信号
+
+
+class KeyedLockManager:
+    """
+    按 key（session_id）分配 asyncio.Lock：
+    不同会话互不阻塞，同一会话的读-改-写串行执行；没有持有者和等待者的锁立即回收
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _LockEntry] = {}
+
+    def locked(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.lock.locked()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @asynccontextmanager
+    async def hold(self, key: str, preempt: bool = False,
+                   blocking: bool = True) -> AsyncGenerator[asyncio.Event, None]:
+        """
+        获取 key 对应的锁，返回本次持有的中止信号
+        preempt 为 True 时先通知当前持有者中止，再排队获取
+        blocking 为 False 时不排队：已有持有者或等待者则抛出 SessionBusyError；
+        检查与获取之间没有 await（无人竞争时 Lock.acquire 不会挂起），并发请求中只有一个能拿到
+        """
+        entry = self._entries.get(key)
+        if entry is not None and not blocking:
+            raise SessionBusyError(key)
+        if entry is None:
+            entry = self._entries[key] = _LockEntry()
+        entry.refs += 1
+        try:
+            if preempt and entry.superseded is not None:
+                entry.superseded.set()
+            async with entry.lock:
+                superseded = entry.superseded = asyncio.Event()
+                try:
+                    yield superseded
+                finally:
+                    if entry.superseded is superseded:
+                        entry.superseded = None
+        finally:
+            entry.refs -= 1
+            if entry.refs == 0:
+                del self._entries[key]
+
+# -------------------------- 模型后端路由 --------------------------
+@dataclass
+class Upstream:
+    """一个 OpenAI 兼容的模型上游及其运行时健康状态"""
+    name: str
+    url: str
+    model: str
+    params: Dict[str, Any] = field(default_factory=dict)   # 采样参数等请求体字段
+    api_key_env: Optional[str] = None                     # 从该环境变量读取 API Key，不在代码中保存
+    weight: float = 1.0
+    first_token_timeout: float = 30.0
+    # 运行时状态
+    healthy: bool = True
+    failures: int = 0
+    retry_at: float = 0.0
+    ewma_ttft: Optional[float] = None
+
+    def payload(self, prompt: str) -> Dict[str, Any]:
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}], **self.params, "stream": True}
+
+    def headers(self) -> Dict[str, str]:
+        key = os.getenv(self.api_key_env) if self.api_key_env else None
+        return {"Authorization": f"Bearer {key}"} if key else {}
+
+    def available(self, now: float) -> bool:
+        return self.healthy or now >= self.retry_at
+
+
+# 内置后端：本地 vLLM 上的 Qwen3-32B，以及原 deepseek_r1.py 使用的远程网关
+BACKEND_PROFILES: Dict[str, Dict[str, Any]] = {
+    "local-qwen": {
+        "url": API_URL,
+        "model": "qwen3_32b",
+        "params": {"chat_template_kwargs": {"enable_thinking": False}, "temperature": 0.3, "top_p": 0.3},
+    },
+    # 原 deepseek_r1.py 服务的请求参数（网关上部署的同样是 qwen3_32b，名称沿用旧服务）
+    "gateway-deepseek": {
+        "url": "https://mcc-pre.3xmt.com/gateway/ai-service/v1/chat/completions",
+        "model": "qwen3_32b",
+        "params": {"chat_template_kwargs": {"enable_thinking": False}, "temperature": 0.25, "top_k": 3, "top_p": 0.9},
+        "api_key_env": "GATEWAY_API_KEY",
+    },
+}
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class BackendRouter:
+    """
+    按调用类型在多个上游之间选择：
+    - 候选上游按 权重 / 首 token 延迟(EWMA) 加权随机排序，延迟低、权重高的优先
+    - 首 token 之前失败（连接错误、HTTP 错误、空响应、超时）自动换下一个上游
+    - 连续失败的上游按指数退避暂时摘除，到期后重新参与或由健康检查恢复
+
+    LLM_BACKENDS 配置启用的后端及权重，如 "local-qwen:3,gateway-deepseek:1"；
+    LLM_ROUTES 按调用类型指定后端，如 "standardization=gateway-deepseek;judgment=local-qwen"，
+    未指定的调用类型使用全部已启用后端
+    """
+
+    def __init__(self, upstreams: List[Upstream], routes: Optional[Dict[str, List[str]]] = None,
+                 ewma_alpha: float = 0.3, base_backoff: float = 5.0, max_backoff: float = 300.0):
+        self.upstreams: Dict[str, Upstream] = {u.name: u for u in upstreams}
+        self.routes = routes or {}
+        self.ewma_alpha = ewma_alpha
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    @classmethod
+    def from_env(cls) -> "BackendRouter":
+        upstreams = []
+        for item in os.getenv("LLM_BACKENDS", "local-qwen").split(","):
+            name, _, weight = item.strip().partition(":")
+            if name not in BACKEND_PROFILES:
+                raise ValueError(f"未知的模型后端: {name}，可选 {', '.join(BACKEND_PROFILES)}")
+            upstreams.append(Upstream(name=name, weight=float(weight or 1), **BACKEND_PROFILES[name]))
+        routes = {}
+        for item in filter(None, os.getenv("LLM_ROUTES", "").split(";")):
+            call_type, _, names = item.partition("=")
+            routes[call_type.strip()] = [n.strip() for n in names.split(",") if n.strip()]
+        return cls(upstreams, routes)
+
+    def candidates(self, call_type: str = "default") -> List[Upstream]:
+        """本次调用依次尝试的上游；全部不可用时仍按原顺序返回，至少尝试一次"""
+        names = self.routes.get(call_type) or list(self.upstreams)
+        pool = [self.upstreams[n] for n in names if n in self.upstreams]
+        now = time.time()
+        alive = [u for u in pool if u.available(now)] or pool
+        ordered = []
+        while alive:
+            scores = [u.weight / (u.ewma_ttft or 1.0) for u in alive]
+            pick = random.choices(alive, weights=scores)[0]
+            ordered.append(pick)
+            alive.remove(pick)
+        return ordered
+
+    def record_success(self, upstream: Upstream, ttft: float):
+        upstream.healthy, upstream.failures = True, 0
+        if upstream.ewma_ttft is None:
+            upstream.ewma_ttft = ttft
+        else:
+            upstream.ewma_ttft += self.ewma_alpha * (ttft - upstream.ewma_ttft)
+
+    def record_failure(self, upstream: Upstream, reason: str):
+        upstream.failures += 1
+        upstream.healthy = False
+        backoff = min(self.base_backoff * 2 ** (upstream.failures - 1), self.max_backoff)
+        upstream.retry_at = time.time() + backoff
+        logger.warning(f"模型后端 {upstream.name} 调用失败（{reason}），{backoff:.0f}s 内不再优先选择")
+
+    async def check_health(self, upstream: Upstream):
+        """请求上游的 /models 接口探活"""
+        url = upstream.url.rsplit("/chat/completions", 1)[0] + "/models"
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                resp = await client.get(url, headers=upstream.headers())
+            if resp.status_code < 400:
+                upstream.healthy, upstream.failures = True, 0
+                return
+            reason = f"HTTP {resp.status_code}"
+        except httpx.HTTPError as e:
+            reason = type(e).__name__
+        if upstream.healthy:
+            self.record_failure(upstream, f"健康检查失败: {reason}")
+
+    async def periodic_health_check(self, interval_seconds: float = 30):
+        while True:
+            await asyncio.gather(*[self.check_health(u) for u in self.upstreams.values()])
+            await asyncio.sleep(interval_seconds)
+
+
 # -------------------------- 大模型调用类 --------------------------
 class LLMClient:
-    def __init__(self, api_url: str = API_URL):
-        self.api_url = api_url
-
-    async def stream_model_response(self, prompt: str, buffer_size: int = 2, flush_interval: float = 0.04) -> AsyncGenerator[str, None]:
-        payload = {
-            "model": "qwen3_32b",
-            "messages": [{"role": "user", "content": prompt}],
-            "chat_template_kwargs": {"enable_thinking": False},
-            "temperature": 0.3,
-            # "top_k": 5,
-            "top_p": 0.3,
-            "stream": True
-        }
+    def __init__(self, router: Optional[BackendRouter] = None):
+        self.router = router or BackendRouter.from_env()
+
+    async def _stream_upstream(self, upstream: Upstream, prompt: str) -> AsyncGenerator[str, None]:
+        """逐段产出一个上游的增量内容；首 token 前的失败以 UpstreamError 抛出（首 token 超时由调用方控制）"""
+        # 读超时不设上限：长回答中途的停顿不算失败，只有首 token 受 first_token_timeout 约束
+        timeout = httpx.Timeout(None, connect=5.0)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("POST", upstream.url, json=upstream.payload(prompt),
+                                     headers=upstream.headers()) as response:
+                if response.status_code >= 400:
+                    raise UpstreamError(f"HTTP {response.status_code}")
+                async for line_bytes in response.aiter_lines():
+                    if not line_bytes or not line_bytes.startswith("data:"):
+                        continue
+                    line_str = line_bytes[len("data:"):].strip()
+                    if not line_str:
+                        continue
+                    try:
+                        data = json.loads(line_str)
+                        delta = data["choices"][0]["delta"].get("content", "")
+                        if delta:
+                            yield delta
+                        if data["choices"][0].get("finish_reason") == "stop":
+                            break
+                    except json.JSONDecodeError:
+                        continue
+
+    async def stream_model_response(self, prompt: str, buffer_size: int = 2, flush_interval: float = 0.04,
+                                    call_type: str = "default") -> AsyncGenerator[str, None]:
         buffer = ""
         finished = False
 
         async def fetch_model():
             nonlocal buffer, finished
-            try:
-                async with httpx.AsyncClient(timeout=None) as client:
-                    async with client.stream("POST", self.api_url, json=payload) as response:
-                        async for line_bytes in response.aiter_lines():
-                            if not line_bytes or not line_bytes.startswith("data:"):
-                                continue
-                            line_str = line_bytes[len("data:"):].strip()
-                            if not line_str:
-                                continue
-                            try:
-                                data = json.loads(line_str)
-                                delta = data["choices"][0]["delta"].get("content", "")
-                                if delta:
-                                    buffer += delta
-                                if data["choices"][0].get("finish_reason") == "stop":
-                                    finished = True
-                                    break
-                            except json.JSONDecodeError:
-                                continue
-            except httpx.RequestError:
-                buffer += "[模型服务请求失败]"
-                finished = True
+            for upstream in self.router.candidates(call_type):
+                start = time.perf_counter()
+                got_first = False
+                stream = self._stream_upstream(upstream, prompt)
+                try:
+                    try:
+                        delta = await asyncio.wait_for(stream.__anext__(), upstream.first_token_timeout)
+                    except StopAsyncIteration:
+                        raise UpstreamError("空响应")
+                    except asyncio.TimeoutError:
+                        raise UpstreamError(f"首 token 超时（{upstream.first_token_timeout}s）")
+                    got_first = True
+                    self.router.record_success(upstream, time.perf_counter() - start)
+                    buffer += delta
+                    async for delta in stream:
+                        buffer += delta
+                    finished = True
+                    return
+                except (httpx.HTTPError, UpstreamError) as e:
+                    if got_first:
+                        # 已经开始输出，无法再切换后端
+                        buffer += "[模型服务请求失败]"
+                        finished = True
+                        return
+                    self.router.record_failure(upstream, str(e) or type(e).__name__)
+                finally:
+                    await stream.aclose()
+            buffer += "[模型服务请求失败]"
+            finished = True
 
         fetch_task = asyncio.create_task(fetch_model())
         try:
@@ -196,9 +481,10 @@ class LLMClient:
             fetch_task.cancel()
             await asyncio.sleep(0)
 
-    async def collect_model_output(self, prompt: str) -> str:
+    async def collect_model_output(self, prompt: str, call_type: str = "default") -> str:
         result = ""
-        async for chunk in self.stream_model_response(prompt, buffer_size=64, flush_interval=0.02):
+        async for chunk in self.stream_model_response(prompt, buffer_size=64, flush_interval=0.02,
+                                                      call_type=call_type):
             result += chunk
         return result.strip()
 
@@ -210,10 +496,54 @@ async def chunked_response(generator: AsyncGenerator[Dict[str, Any], None]):
             yield b"data:" + resp_bytes + b"\n\n"
     return StreamingResponse(iterate(), media_type="text/event-stream")
 
+
+async def guarded_stream(session_id: str, stream: AsyncGenerator[Dict[str, Any], None],
+                         background_tasks: set) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    在会话锁内输出一轮对话，保证同一 session 的状态读写不会交错
+    SESSION_BUSY_POLICY=cancel 时，被新请求抢占的旧输出以 finish_reason=cancelled 结束；
+    SESSION_BUSY_POLICY=reject 时不排队获取锁，拿到后先产出一个 None，由 open_guarded_stream 在返回响应前取走；
+    结束或中止时取消本轮仍在运行的后台任务，避免它们在下一轮开始后再写会话
+    """
+    preempt = SESSION_BUSY_POLICY == "cancel"
+    blocking = SESSION_BUSY_POLICY != "reject"
+    async with session_locks.hold(session_id, preempt=preempt, blocking=blocking) as superseded:
+        if not blocking:
+            yield None
+        step, last = None, None
+        try:
+            while True:
+                step = asyncio.ensure_future(stream.__anext__())
+                if preempt:
+                    stop = asyncio.ensure_future(superseded.wait())
+                    await asyncio.wait({step, stop}, return_when=asyncio.FIRST_COMPLETED)
+                    stop.cancel()
+                    if not step.done():
+                        logger.info(f"session {session_id} 的输出被新请求中止")
+                        if last is not None:
+                            choice = dict(last["choices"][0], finish_reason="cancelled",
+                                          message={"content": "", "role": "assistant"})
+                            yield dict(last, choices=[choice])
+                        return
+                try:
+                    last = await step
+                except StopAsyncIteration:
+                    return
+                yield last
+        finally:
+            if step is not None and not step.done():
+                step.cancel()
+                with suppress(asyncio.CancelledError, StopAsyncIteration):
+                    await step
+            await stream.aclose()
+            for task in background_tasks:
+                task.cancel()
+
 # -------------------------- FastAPI应用 --------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     asyncio.create_task(session_manager.periodic_cleanup(interval_hours=0.5))
+    asyncio.create_task(llm_client.router.periodic_health_check())
     yield
 
 app = FastAPI(lifespan=lifespan)
@@ -226,8 +556,24 @@ app.add_middleware(
 )
 
 session_manager = SessionManager()
+session_locks = KeyedLockManager()
 llm_client = LLMClient()
 
+
+async def open_guarded_stream(session_id: str, stream: AsyncGenerator[Dict[str, Any], None],
+                              background_tasks: set) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    创建本轮的 guarded_stream；reject 策略下在返回响应之前就占住会话锁，会话忙时返回 409
+    （响应开始输出后就不能再改状态码）。已启动的生成器即使响应没被读取，回收时也会由事件循环关闭并释放锁
+    """
+    guarded = guarded_stream(session_id, stream, background_tasks)
+    if SESSION_BUSY_POLICY == "reject":
+        try:
+            await guarded.__anext__()
+        except SessionBusyError:
+            raise HTTPException(status_code=409, detail="该会话上一轮还在处理中，请稍后再试。")
+    return guarded
+
 # -------------------------- 核心接口 --------------------------
 @app.post("/check_policy")
 async def check_policy(req: NewCheckRequest):
@@ -242,6 +588,7 @@ async def check_policy(req: NewCheckRequest):
         policy_elements_prompt = build_policy_elements_prompt(req.part_id, policy_info)
         session_id = req.session_id
         choice_index = 0
+        background_tasks = set()
 
         async def event_stream() -> AsyncGenerator[Dict[str, Any], None]:
             nonlocal choice_index
@@ -264,53 +611,31 @@ async def check_policy(req: NewCheckRequest):
             elem_queue: asyncio.Queue[str] = asyncio.Queue()
             judge_queue: asyncio.Queue[str] = asyncio.Queue()
 
-            async def model_to_queue(prompt: str, queue: asyncio.Queue):
-                async for chunk in llm_client.stream_model_response(prompt):
+            async def model_to_queue(prompt: str, queue: asyncio.Queue, call_type: str):
+                async for chunk in llm_client.stream_model_response(prompt, call_type=call_type):
                     await queue.put(chunk)
                 await queue.put(None)
 
             async def run_standardization() -> Dict[str, Any]:
-                sessions = session_manager.load_sessions()
-                session = sessions.get(session_id, {})
-                records = session.get("records", [])
-
-                if records:
-                    try:
-                        last_record = next(
-                            rec for rec in reversed(records) if rec.get("content")
-                        )
-                        merged_info = json.loads(last_record["content"])
-                    except Exception:
-                        merged_info = req.metadata.dict().copy()
-                else:
-                    merged_info = req.metadata.dict().copy()
+                merged_info = session_manager.get_profile(session_id) or req.metadata.dict().copy()
 
                 if not req.user_input_text or not req.user_input_text.strip():
                     cleaned = baseutils.remove_empty_values(merged_info)
                     logger.info(f"====当前公司信息（用户没有输出）====：{json.dumps(cleaned, ensure_ascii=False, indent=2)}")
-                    session_manager.save_session_record(session_id, json.dumps(cleaned, ensure_ascii=False),
-                                        req.part_id,user_input_text=req.user_input_text)
+                    session_manager.save_session_record(session_id, cleaned, req.part_id,
+                                                        user_input_text=req.user_input_text)
                     return cleaned
 
                 std_prompt = build_company_standardization_prompt(req.user_input_text)
-                std_result = await llm_client.collect_model_output(std_prompt)
-
-                new_data = {}
-                for line in std_result.splitlines():
-                    line = line.strip()
-                    if not line or '": ' not in line:
-                        continue
-                    key_part, value_part = line.split('": ', 1)
-                    key = key_part.strip('"')
-                    value_str = value_part.strip().rstrip(',').strip()
-                    if value_str.startswith("[") and value_str.endswith("]"):
-                        try:
-                            value = [v.strip().strip('"') for v in value_str[1:-1].split(",")]
-                        except:
-                            value = value_str
-                    else:
-                        value = value_str.strip('"')
-                    new_data[key] = value
+                # 边接收模型输出边解析，流结束时只剩最后一个字段待处理
+                parser = TolerantParser()
+                async for chunk in llm_client.stream_model_response(std_prompt, buffer_size=64, flush_interval=0.02,
+                                                                    call_type="standardization"):
+                    parser.feed(chunk)
+                parsed = parser.finish()
+                for err in parsed.errors:
+                    logger.warning(f"标准化输出第{err.start}-{err.end}个字符解析异常（{err.message}）：{err.text}")
+                new_data = {k: baseutils.scalars_to_text(v) for k, v in parsed.data.items()}
 
                 for k, v in new_data.items():
                     if k in merged_info and isinstance(merged_info[k], list) and isinstance(v, list):
@@ -320,31 +645,23 @@ async def check_policy(req: NewCheckRequest):
 
                 cleaned = baseutils.remove_empty_values(merged_info)
 
-                session_manager.save_session_record(session_id, json.dumps(cleaned, ensure_ascii=False),
-                                    req.part_id,req.user_input_text)
+                session_manager.save_session_record(session_id, cleaned, req.part_id,
+                                                    user_input_text=req.user_input_text, changes=new_data)
                 logger.info(f"====更新后企业信息====：{json.dumps(cleaned, ensure_ascii=False, indent=2)}")
                 return cleaned
 
             std_task = asyncio.create_task(run_standardization())
+            background_tasks.add(std_task)
 
             if not first_output_done:
-                elem_task = asyncio.create_task(model_to_queue(policy_elements_prompt, elem_queue))
+                elem_task = asyncio.create_task(model_to_queue(policy_elements_prompt, elem_queue, "elements"))
+                background_tasks.add(elem_task)
             else:
                 elem_task = None
 
             async def run_judgment():
                 cleaned_info = await std_task
-                sessions = session_manager.load_sessions()
-                session = sessions.get(session_id, {})
-                records = session.get("records", [])
-                history_inputs = [
-                    rec.get("user_input_text", "").strip()
-                    for rec in records
-                    if rec.get("user_input_text") and rec["part_id"] == req.part_id
-                ]
-                history_inputs = list(dict.fromkeys(history_inputs))
-
-                history_text = "\n".join(history_inputs)
+                history_text = session_manager.get_history_text(session_id, req.part_id)
 
                 logger.info(f"===历史信息====\n{history_text}")
                 logger.info(f"=============")
@@ -356,9 +673,10 @@ async def check_policy(req: NewCheckRequest):
                     check_mode=req.check_mode
                 )
 
-                await model_to_queue(judge_prompt, judge_queue)
+                await model_to_queue(judge_prompt, judge_queue, "judgment")
 
             judge_task = asyncio.create_task(run_judgment())
+            background_tasks.add(judge_task)
 
             async def typing_output(text: str) -> AsyncGenerator[Dict[str, Any], None]:
                 nonlocal choice_index
@@ -404,7 +722,7 @@ async def check_policy(req: NewCheckRequest):
                     ).dict()
                     choice_index += 1
 
-                session_manager.save_session_record(session_id, "", req.part_id)
+                session_manager.mark_first_output_done(session_id, req.part_id)
 
             second_intro = (
                 "经AI对政策申报要求与贵司画像特征智能分析，您当前还不满足政策申报条件，"
@@ -458,7 +776,7 @@ async def check_policy(req: NewCheckRequest):
                 }]
             ).dict()
 
-        return await chunked_response(event_stream())
+        return await chunked_response(await open_guarded_stream(session_id, event_stream(), background_tasks))
 
     else:
         if not req.session_id or not req.session_id.strip():
@@ -477,25 +795,11 @@ async def check_policy(req: NewCheckRequest):
             created_ts = int(time.time())
 
             # 获取最新公司信息
-            sessions = session_manager.load_sessions()
-            records = sessions.get(session_id, {}).get("records", [])
-            if records:
-                try:
-                    last_record = next(rec for rec in reversed(records) if rec.get("content"))
-                    merged_info = json.loads(last_record["content"])
-                except Exception:
-                    merged_info = req.metadata.dict().copy()
-            else:
-                merged_info = req.metadata.dict().copy()
+            merged_info = session_manager.get_profile(session_id) or req.metadata.dict().copy()
             merged_info = BaseUtils.remove_empty_values(merged_info)
 
             # 收集历史输入
-            history_inputs = [
-                rec.get("user_input_text", "").strip()
-                for rec in records
-                if rec.get("user_input_text") and rec["part_id"] == req.part_id
-            ]
-            history_text = "\n".join(list(dict.fromkeys(history_inputs)))
+            history_text = session_manager.get_history_text(session_id, req.part_id)
 
             judge_prompt = build_company_judgment_prompt(
                 merged_info,
@@ -505,7 +809,7 @@ async def check_policy(req: NewCheckRequest):
             )
 
             # 流式发送大模型判断结果
-            async for chunk in llm_client.stream_model_response(judge_prompt):
+            async for chunk in llm_client.stream_model_response(judge_prompt, call_type="judgment"):
                 yield PolicyStreamResponse(
                     id=stream_id,
                     model="qwen3_32b",
@@ -532,7 +836,7 @@ async def check_policy(req: NewCheckRequest):
                 }]
             ).dict()
 
-        return await chunked_response(event_stream())
+        return await chunked_response(await open_guarded_stream(session_id, event_stream(), set()))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : conftest.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 仓库没有打包配置，模块都按脚本目录平铺导入
+for path in (ROOT, os.path.join(ROOT, "auto_data_async")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
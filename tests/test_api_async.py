@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_api_async.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import api_async
+
+
+def run_request(handler, n=1):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await api_async._request_choices(client, "提示词", n, seed=7)
+    return asyncio.run(main())
+
+
+def completion(count):
+    return httpx.Response(200, json={"choices": [
+        {"index": i, "message": {"content": f" 补全{i} "}} for i in range(count)]})
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    async def no_sleep(_):
+        return None
+    monkeypatch.setattr(api_async, "_n_supported", None)
+    monkeypatch.setattr(api_async.asyncio, "sleep", no_sleep)
+
+
+def test_retries_server_errors_then_succeeds():
+    responses = [httpx.Response(500, text="busy"), httpx.Response(200, json={"error": "overloaded"}), completion(1)]
+    assert run_request(lambda request: responses.pop(0)) == ["补全0"]
+    assert not responses
+
+
+def test_raises_after_retries_and_keeps_n_undetected():
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(500, text="busy")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run_request(handler, n=4)
+    assert len(calls) == api_async.MAX_RETRIES + 1
+    assert calls[0]["n"] == 4
+    assert api_async._n_supported is None
+
+
+def test_n_support_detected_from_successful_response():
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return completion(1)
+
+    assert run_request(handler, n=3) == ["补全0"]
+    assert api_async._n_supported is False
+    run_request(handler, n=3)
+    assert sent[0]["n"] == 3 and "n" not in sent[1]
+
+
+def test_invalid_output_is_not_cached(monkeypatch):
+    stored = []
+    monkeypatch.setattr(api_async, "cache_lookup", lambda payload, mode: ("key", "坏的缓存"))
+    monkeypatch.setattr(api_async, "cache_store", lambda *args: stored.append(args))
+
+    def handler(request):
+        return httpx.Response(200, json={"choices": [{"message": {"content": '"name": "X公司'}}]})
+
+    client_class = httpx.AsyncClient
+    monkeypatch.setattr(api_async.httpx, "AsyncClient",
+                        lambda **kwargs: client_class(transport=httpx.MockTransport(handler)))
+
+    def call(validate):
+        return asyncio.run(api_async.call_local_model_async("提示词", stream=False, validate=validate))
+
+    # 命中的缓存不可用时重新请求；新输出同样不可用时不写回
+    assert call(lambda text: text.endswith("}")) == '"name": "X公司'
+    assert stored == []
+    assert call(lambda text: True) == "坏的缓存"
+
+
+def test_batch_merges_only_unseeded_prompts(monkeypatch):
+    sent = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        sent.append((body.get("n", 1), body.get("seed")))
+        return completion(1)  # 不支持 n 的后端，缺少的部分逐条补齐
+
+    client_class = httpx.AsyncClient
+    monkeypatch.setattr(api_async.httpx, "AsyncClient",
+                        lambda **kwargs: client_class(transport=httpx.MockTransport(handler)))
+
+    asyncio.run(api_async.call_local_model_batch_async(["甲", "甲"], seeds=[7, 8]))
+    assert sorted(sent) == [(1, 7), (1, 8)]
+
+    sent.clear()
+    asyncio.run(api_async.call_local_model_batch_async("乙", n=3))
+    assert sent == [(3, None), (1, None), (1, None)]
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_backend_router.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+
+import httpx
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.fixture
+def module():
+    spec = importlib.util.spec_from_file_location("qwen32b_class", os.path.join(ROOT, "qwen32b-class.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def sse(content=None, finish=None):
+    delta = {"content": content} if content is not None else {}
+    return ("data: " + json.dumps({"choices": [{"delta": delta, "finish_reason": finish}]}) + "\n\n").encode()
+
+
+def serve(monkeypatch, module, streams):
+    """streams: 上游名 -> (首 token 前等待, token 间隔, token 列表)"""
+    async def handler(request):
+        ttft, gap, tokens = streams[request.url.host]
+
+        async def body():
+            await asyncio.sleep(ttft)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(gap)
+                yield sse(token)
+            yield sse(finish="stop")
+        return httpx.Response(200, content=body(), headers={"content-type": "text/event-stream"})
+
+    client_class = httpx.AsyncClient
+    timeouts = []
+
+    def factory(**kw):
+        timeouts.append(kw.get("timeout"))
+        return client_class(transport=httpx.MockTransport(handler), **kw)
+    monkeypatch.setattr(module.httpx, "AsyncClient", factory)
+    return timeouts
+
+
+def make_client(module, *names):
+    upstreams = [module.Upstream(name=n, url=f"http://{n}/v1/chat/completions", model="m", first_token_timeout=0.2)
+                 for n in names]
+    return module.LLMClient(module.BackendRouter(upstreams))
+
+
+async def collect(client):
+    return "".join([chunk async for chunk in client.stream_model_response("问", flush_interval=0.01)])
+
+
+def test_slow_tokens_after_first_are_not_timed_out(module, monkeypatch):
+    # 首 token 之后的间隔超过 first_token_timeout 也不应中断
+    timeouts = serve(monkeypatch, module, {"a": (0.0, 0.3, ["符合", "条件"])})
+    client = make_client(module, "a")
+    assert asyncio.run(collect(client)) == "符合条件\n"
+    assert timeouts[0].read is None  # MockTransport 不执行读超时，直接检查客户端配置
+    assert client.router.upstreams["a"].failures == 0
+
+
+def test_first_token_timeout_fails_over(module, monkeypatch):
+    serve(monkeypatch, module, {"slow": (1.0, 0.0, ["慢"]), "fast": (0.0, 0.0, ["快"])})
+    client = make_client(module, "slow", "fast")
+    client.router.upstreams["fast"].weight = 1e-9  # 让 slow 排在前面
+    assert asyncio.run(collect(client)) == "快\n"
+    assert client.router.upstreams["slow"].failures == 1
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_company_schema.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import pytest
+
+try:
+    from company_schema import enforce_field_types
+except FileNotFoundError:
+    # policy_loader 导入时读取 ../data/database.json，数据不在时跳过
+    pytest.skip("需要在 data/database.json 旁边的目录中运行", allow_module_level=True)
+
+
+def test_scalar_choice_accepts_single_item_list():
+    assert enforce_field_types({"size": ["小型企业"]}) == {"size": "小型企业"}
+
+
+@pytest.mark.parametrize("value", [["小型企业", "中型企业"], [], {"v": "小型企业"}, ["其他"], "其他"])
+def test_scalar_choice_drops_invalid_values(value):
+    assert enforce_field_types({"size": value, "name": "X公司"}) == {"name": "X公司"}
+
+
+def test_list_choice_keeps_allowed_items():
+    data = enforce_field_types({"rank": "高新技术企业，其他", "person_size": "85", "cap_size": "未知"})
+    assert data == {"rank": ["高新技术企业"], "person_size": 85, "cap_size": 0.0}
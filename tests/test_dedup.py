@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_dedup.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from dedup import DedupSink, NearDuplicateIndex
+
+
+@pytest.mark.parametrize("threshold", [1.0, 0.95, 0.9, 0.8])
+def test_index_matches_brute_force(threshold):
+    rng = random.Random(0)
+    index = NearDuplicateIndex(threshold)
+    stored = [rng.getrandbits(64) for _ in range(200)]
+    for fp in stored:
+        index._add(fp)
+    k = index.max_distance
+    for _ in range(500):
+        fp = rng.choice(stored)
+        for bit in rng.sample(range(64), rng.randint(0, k + 2)):
+            fp ^= 1 << bit
+        assert index.contains_near(fp) == any(bin(fp ^ x).count("1") <= k for x in stored)
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    async def write(self, record):
+        self.records.append(record)
+        return True
+
+
+def test_input_seen_before_judging():
+    sink = DedupSink(ListSink(), NearDuplicateIndex(0.9))
+    input_text = "[企业信息]\n上海云智科技有限公司，人工智能企业，员工两百余人\n\n[政策信息]\n申报对象：中小企业"
+    assert sink.is_novel_input(input_text)
+    assert asyncio.run(sink.write({"input": input_text, "output": "满足项：..."}))
+    # 政策信息不同、企业部分相同，仍视为已见过
+    assert not sink.is_novel_input(input_text.replace("中小企业", "高新技术企业"))
+    assert sink.index.duplicates == 1
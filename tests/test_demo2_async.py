@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_demo2_async.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import asyncio
+
+import pytest
+
+try:
+    import demo2_async
+except FileNotFoundError:
+    # policy_loader 导入时读取 ../data/database.json，数据不在时跳过
+    pytest.skip("需要在 data/database.json 旁边的目录中运行", allow_module_level=True)
+
+SAMPLE = {"part_id": "p1", "seed": 7, "policy_info": {"申报对象": "中小企业"},
+          "company_info_from_text": {"name": "X公司"}, "company_text": "X公司是一家中小企业"}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    prompts = []
+
+    async def fake_call(prompt, **kwargs):
+        prompts.append(prompt)
+        return "没有结构的输出"  # 本地打分会判为 REJECT
+    monkeypatch.setattr(demo2_async, "call_local_model_async", fake_call)
+    return prompts
+
+
+def test_prescore_does_not_drop_samples_without_verify(calls):
+    record = asyncio.run(demo2_async.judge_sample_async(SAMPLE, enable_verify=False))
+    assert record["output"] == "没有结构的输出"
+    assert len(calls) == 1
+
+
+def test_prescore_rejects_before_verify(calls):
+    assert asyncio.run(demo2_async.judge_sample_async(SAMPLE, enable_verify=True)) is None
+    assert len(calls) == 1
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_gesture_dataset.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import numpy as np
+
+from gesture_dataset import LandmarkRecorder, export_npz, load_recording
+from gesture_features import apply_aspect
+
+
+def test_export_npz_applies_recorded_aspect(tmp_path):
+    path = str(tmp_path / "rec.glm")
+    points = np.random.default_rng(0).random((21, 3), dtype=np.float32)
+    recorder = LandmarkRecorder(path)
+    recorder.append(points, "布（张开手）", "Right", 0.9, timestamp=1.0, aspect=16 / 9)
+    recorder.append(points, "石头（握拳）", "Left", 0.8, timestamp=2.0, aspect=1.0)
+    recorder.close()
+
+    records, labels = load_recording(path)
+    assert [labels[i] for i in records["label"]] == ["布（张开手）", "石头（握拳）"]
+
+    output = str(tmp_path / "samples.npz")
+    assert export_npz([path], output) == 2
+    data = np.load(output)
+    expected = points * np.array([16 / 9, 1.0, 16 / 9], dtype=np.float32)
+    np.testing.assert_allclose(data["landmarks"][0], expected, rtol=1e-6)
+    np.testing.assert_allclose(data["landmarks"][1], points)
+    # 批量与单帧（classify_points 使用的形式）结果一致
+    np.testing.assert_allclose(apply_aspect(points, 16 / 9), expected, rtol=1e-6)
+
+
+def test_reopen_truncates_torn_tail(tmp_path):
+    path = str(tmp_path / "rec.glm")
+    points = np.zeros((21, 3), dtype=np.float32)
+    recorder = LandmarkRecorder(path)
+    recorder.append(points, "布（张开手）", timestamp=1.0)
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 100)  # 模拟写到一半被中断的记录
+
+    recorder = LandmarkRecorder(path)
+    recorder.append(points, "石头（握拳）", timestamp=2.0)
+    recorder.close()
+
+    records, labels = load_recording(path)
+    assert list(records["timestamp"]) == [1.0, 2.0]
+    assert [labels[i] for i in records["label"]] == ["布（张开手）", "石头（握拳）"]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_gesture_pool.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+from gesture_pool import LatestFrameSlot
+
+
+def test_slot_counts_overwritten_frames():
+    slot = LatestFrameSlot()
+    for i in range(3):
+        slot.put(f"frame{i}", i)
+    assert slot.dropped == 2
+    assert slot.get(timeout=0) == (3, "frame2", 2)
+    assert slot.get(timeout=0) is None
+
+    # 已取走的帧不算丢弃
+    slot.put("frame3", 3)
+    assert slot.dropped == 2
+    slot.close()
+    slot.reopen()
+    assert slot.dropped == 0 and slot.get(timeout=0) is None
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_gesture_profiler.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+from gesture_profiler import StageProfiler
+
+
+def test_summary_uses_nearest_rank_percentiles():
+    profiler = StageProfiler(enabled=True, window=100)
+    for ms in range(100, 0, -1):
+        profiler.record("mediapipe", 0.0, ms / 1000)
+    profiler.record("classify", 0.0, 0.002)
+    summary = profiler.summary()
+    assert summary["mediapipe"] == {"count": 100, "p50": 50.0, "p95": 95.0, "max": 100.0}
+    assert summary["classify"] == {"count": 1, "p50": 2.0, "p95": 2.0, "max": 2.0}
+    assert list(summary) == ["mediapipe", "classify"]
+
+
+def test_summary_keeps_only_recent_window():
+    profiler = StageProfiler(enabled=True, window=10)
+    for ms in range(1, 21):
+        profiler.record("queue", 0.0, ms / 1000)
+    assert profiler.summary()["queue"] == {"count": 10, "p50": 15.0, "p95": 20.0, "max": 20.0}
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StageProfiler(enabled=False)
+    with profiler.stage("mediapipe"):
+        pass
+    profiler.record("queue", 0.0, 0.001)
+    assert profiler.summary() == {}
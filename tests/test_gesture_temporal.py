@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_gesture_temporal.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import numpy as np
+
+from gesture_temporal import NO_GESTURE, GestureDebouncer, TemporalGestureTracker
+
+
+def feed(debouncer, labels):
+    return [debouncer.update(label) for label in labels]
+
+
+def test_debouncer_holds_current_gesture_at_stay_ratio():
+    debouncer = GestureDebouncer(window=10, enter_ratio=0.6, stay_ratio=0.3)
+    assert feed(debouncer, ["A"] * 10)[5] == "A"
+    # 7 帧 B 之后 A 仍占 3/10 = stay_ratio，不切换；第 8 帧 B 时 A 低于 stay_ratio 才切换
+    assert feed(debouncer, ["B"] * 7) == [None] * 7
+    assert debouncer.update("B") == "B"
+
+
+def test_debouncer_switches_exactly_at_enter_ratio():
+    debouncer = GestureDebouncer(window=10, enter_ratio=0.6, stay_ratio=0.3)
+    feed(debouncer, ["A"] * 10)
+    # 窗口变为 A×2、C×3、B×5：A 已低于 stay_ratio，但 B 只有 0.5，不切换
+    assert feed(debouncer, ["C"] * 3 + ["B"] * 5) == [None] * 8
+    assert debouncer.stable == "A"
+    # 再来一帧 B：窗口 A×1、C×3、B×6，B 恰好达到 enter_ratio
+    assert debouncer.update("B") == "B"
+
+
+def test_lost_hand_decays_to_no_gesture_and_is_dropped():
+    tracker = TemporalGestureTracker(lambda points, aspect: {"gesture": "石头"}, window=8, lost_timeout=0.5)
+    hand = {"handedness": "Right", "score": 0.9, "landmarks": np.zeros((21, 3), np.float32)}
+    events = []
+    for i in range(8):
+        events += tracker.update([hand], i * 0.1)[1]
+    assert events == [("Right", "石头")]
+
+    # 手离开画面：超过 lost_timeout 但稳定手势尚未衰减时保留状态
+    events = []
+    for i in range(5):
+        events += tracker.update([], 0.8 + i * 0.1)[1]
+    assert events == [] and "Right" in tracker.debouncers
+    # 第 6 帧 NO_GESTURE 达到 enter_ratio，稳定手势变为 NO_GESTURE，随即丢弃该手的状态
+    assert tracker.update([], 1.3)[1] == [("Right", NO_GESTURE)]
+    assert not tracker.debouncers and not tracker.filters and not tracker.last_seen
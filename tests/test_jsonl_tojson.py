@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_jsonl_tojson.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import gzip
+import json
+
+import pytest
+
+from jsonl_tojson import jsonl_tojson
+
+
+def write_jsonl(path, bad_at=None, count=6):
+    lines = [json.dumps({"instruction": "i", "input": f"x{i}", "output": "y"}, ensure_ascii=False)
+             for i in range(count)]
+    if bad_at is not None:
+        lines[bad_at] = "{坏行"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_strict_failure_removes_partial_output(tmp_path, workers):
+    src = tmp_path / "in.jsonl"
+    write_jsonl(src, bad_at=4)
+    with pytest.raises(ValueError):
+        jsonl_tojson(str(src), str(tmp_path / "out.json"), shard_size=2, compress="gzip",
+                     workers=workers, strict=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.jsonl"]
+
+
+def test_sharded_gzip_output_round_trips(tmp_path):
+    src = tmp_path / "in.jsonl"
+    write_jsonl(src, bad_at=1)
+    stats = jsonl_tojson(str(src), str(tmp_path / "out.json"), shard_size=2, compress="gzip")
+    records = [r for path in stats["outputs"] for r in json.load(gzip.open(path, "rt", encoding="utf-8"))]
+    assert stats["records"] == 5 and len(stats["outputs"]) == 3
+    assert [r["input"] for r in records] == ["x0", "x2", "x3", "x4", "x5"]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_session_lock.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import asyncio
+import gc
+import importlib.util
+import os
+
+import httpx
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    # 文件名含连字符，只能按路径导入
+    spec = importlib.util.spec_from_file_location("qwen32b_class", os.path.join(ROOT, "qwen32b-class.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.session_manager.file_path = str(tmp_path / "sessions.json")
+    monkeypatch.setattr(module, "SESSION_BUSY_POLICY", "reject")
+    monkeypatch.setattr(module, "get_policy_info", lambda part_id: {"申报对象": "中小企业"})
+
+    async def slow_stream(prompt, call_type="default", **kwargs):
+        for chunk in ("符合", "条件"):
+            await asyncio.sleep(0.1)
+            yield chunk
+    monkeypatch.setattr(module.llm_client, "stream_model_response", slow_stream)
+    return module
+
+
+def check_request(client, session_id="s1"):
+    return client.post("/check_policy", json={
+        "part_id": "p1", "session_id": session_id, "check_mode": 2, "metadata": {"name": "X公司"}})
+
+
+def test_reject_policy_admits_one_of_concurrent_requests(service):
+    async def main():
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first, second, other = await asyncio.gather(
+                check_request(client), check_request(client), check_request(client, "s2"))
+            after = await check_request(client)
+        return first, second, other, after
+
+    first, second, other, after = asyncio.run(main())
+    assert sorted([first.status_code, second.status_code]) == [200, 409]
+    assert other.status_code == 200  # 不同会话互不影响
+    assert after.status_code == 200  # 上一轮结束后锁已释放
+    assert len(service.session_locks) == 0
+
+
+def test_hold_without_blocking_raises_when_busy(service):
+    async def main():
+        locks = service.KeyedLockManager()
+        async with locks.hold("s1", blocking=False):
+            with pytest.raises(service.SessionBusyError):
+                async with locks.hold("s1", blocking=False):
+                    pass
+        async with locks.hold("s1", blocking=False):
+            pass
+        return len(locks)
+
+    assert asyncio.run(main()) == 0
+
+
+def test_reserved_stream_releases_lock_when_never_read(service):
+    async def main():
+        async def never_read():
+            yield {}
+
+        guarded = await service.open_guarded_stream("s1", never_read(), set())
+        assert service.session_locks.locked("s1")
+        del guarded
+        gc.collect()
+        await asyncio.sleep(0.01)  # 事件循环执行被回收生成器的 aclose
+        return service.session_locks.locked("s1")
+
+    assert asyncio.run(main()) is False
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_tolerant_parser.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import pytest
+
+from tolerant_parser import TolerantParser, parse_tolerant
+
+
+def test_full_width_comma_separates_object_entries():
+    result = parse_tolerant('{"a": 1，"b": 2}')
+    assert result.data == {"a": 1, "b": 2}
+    assert not result.errors
+
+
+def test_full_width_colon_and_comma_without_braces():
+    text = '"name"："X公司"，"industry"：["软件"，"技术推广服务"]，"person_size"：85'
+    assert parse_tolerant(text).data == {"name": "X公司", "industry": ["软件", "技术推广服务"], "person_size": 85}
+
+
+def test_full_width_comma_inside_string_is_kept():
+    assert parse_tolerant('{"description": "专注AI，服务政企"，"size": "小型企业"}').data == {
+        "description": "专注AI，服务政企", "size": "小型企业"}
+
+
+def test_bare_value_with_full_width_comma_is_rejoined():
+    data = parse_tolerant('"description": 一家科技公司，专注人工智能\n"size": "小型企业"').data
+    assert data == {"description": "一家科技公司，专注人工智能", "size": "小型企业"}
+
+
+@pytest.mark.parametrize("size", [1, 3, 7])
+def test_streaming_chunks_match_whole_text(size):
+    text = '以下是结果：\n{"name"："X公司"，"rank"：["高新技术企业"，"科技型中小企业"]，"cap_size"：1000.0}'
+    parser = TolerantParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    assert parser.finish().data == parse_tolerant(text).data == {
+        "name": "X公司", "rank": ["高新技术企业", "科技型中小企业"], "cap_size": 1000.0}
+
+
+@pytest.mark.parametrize("size", [1, 4, 100])
+def test_text_after_outer_object_is_ignored(size):
+    text = '{"name": "A"，"person_size": 85} 注意：以上为生成信息，\n"备注": "无"'
+    parser = TolerantParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    result = parser.finish()
+    assert result.data == {"name": "A", "person_size": 85}
+    assert not result.errors
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : tolerant_parser.py
+@Author  : qy
+@Date    : 2026/10/19
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# 字符串定界符：开引号 -> 闭引号（中文引号按一对处理）
+_QUOTES = {'"': '"', "'": "'", "“": "”", "‘": "’"}
+# 字符串外的全角标点按半角处理
+_PUNCT = {"，": ",", "：": ":", "［": "[", "］": "]", "｛": "{", "｝": "}", "、": ","}
+_BARE_END = set(',:[]{}\n') | set(_PUNCT)
+_LITERALS = {"null": None, "none": None, "true": True, "false": False}
+_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][-+]?\d+)?$")
+_KEY_STRIP = " \t\r\n\"'“”‘’-*•`"
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*$")
+
+
+@dataclass
+class ErrorSpan:
+    start: int      # 在完整输出中的起始字符位置
+    end: int
+    message: str
+    text: str
+
+
+@dataclass
+class ParseResult:
+    data: Dict[str, Any] = field(default_factory=dict)
+    errors: List[ErrorSpan] = field(default_factory=list)
+    complete: bool = False      # 是否已调用 finish，False 表示仍是流式中途的部分结果
+
+
+def _bare_token(token: str) -> str:
+    """无引号的值：数字、字面量原样保留，其余当作字符串"""
+    if _NUMBER.match(token):
+        return token
+    if token.lower() in _LITERALS:
+        return json.dumps(_LITERALS[token.lower()])
+    return json.dumps(token, ensure_ascii=False)
+
+
+def _strip_trailing_comma(out: List[str]):
+    while out and (out[-1].isspace() or out[-1] == ","):
+        out.pop()
+
+
+def repair_json_value(s: str) -> str:
+    """
+    把模型输出的近似 JSON 改写成合法 JSON：
+    - 单引号、中文引号字符串统一为双引号，内部双引号与换行转义
+    - 字符串外的全角逗号、冒号、括号、顿号按半角处理
+    - 无引号的词当作字符串，None/True/False 转成 JSON 字面量
+    - 去掉多余的尾逗号，补齐未闭合的字符串和括号
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    i, n = 0, len(s)
+    while i < n:
+        ch = _PUNCT.get(s[i], s[i])
+        if s[i] in _QUOTES:
+            close = _QUOTES[s[i]]
+            j = i + 1
+            buf = []
+            while j < n and s[j] != close:
+                c = s[j]
+                if c == "\\" and j + 1 < n:
+                    buf.append(s[j:j + 2])
+                    j += 2
+                    continue
+                buf.append({'"': '\\"', "\n": "\\n", "\r": "", "\t": "\\t"}.get(c, c))
+                j += 1
+            out.append('"' + "".join(buf) + '"')
+            i = j + 1
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+            out.append(ch)
+            i += 1
+        elif ch in "]}":
+            _strip_trailing_comma(out)
+            if stack and stack[-1] == ch:
+                stack.pop()
+                out.append(ch)
+            i += 1
+        elif ch in ",:" or ch.isspace():
+            out.append(ch)
+            i += 1
+        else:
+            j = i
+            while j < n and s[j] not in _BARE_END:
+                j += 1
+            token = s[i:j].strip()
+            if token:
+                out.append(_bare_token(token))
+            i = j
+    _strip_trailing_comma(out)
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def parse_value(raw: str) -> Tuple[Any, Optional[str]]:
+    """解析一个字段值，返回 (值, 错误信息)；无法修复时退化为原始字符串"""
+    raw = raw.strip().rstrip(",，").strip()
+    if not raw:
+        return None, "字段值为空"
+    try:
+        return json.loads(raw), None
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json_value(raw)), None
+    except json.JSONDecodeError as e:
+        return raw.strip(_KEY_STRIP), f"无法修复为 JSON，按原文保留: {e.msg}"
+
+
+def _split_key(entry: str) -> Optional[Tuple[str, str]]:
+    """在字符串外找到第一个冒号，切分 key 与 value"""
+    close = None
+    for i, ch in enumerate(entry):
+        if close:
+            if ch == close:
+                close = None
+        elif ch in ('"', "“"):
+            close = _QUOTES[ch]
+        elif ch in ":：":
+            return entry[:i], entry[i + 1:]
+    return None
+
+
+class TolerantParser:
+    """
+    增量容错解析器，兼容两种模型输出：
+    1. 标准/近似 JSON 对象 {"k": v, ...}
+    2. 提示词要求的无大括号 "k": v 逐行格式
+
+    feed() 边接收流式分片边切分顶层条目，已完整的条目立即解析，
+    整体只扫描一遍；finish() 处理最后一个条目并返回最终结果
+    """
+
+    def __init__(self):
+        self.result = ParseResult()
+        self._buf = ""          # 待扫描文本，_buf[:_start] 是已切分完的部分
+        self._offset = 0        # _buf[0] 在完整输出中的位置
+        self._start = 0         # 当前条目在 _buf 中的起点
+        self._pos = 0           # 下一个待扫描字符在 _buf 中的位置
+        self._close = None      # 当前所在字符串的闭引号
+        self._escape = False
+        self._depth = 0
+        self._base = 0          # 遇到外层 { 后为 1，条目在该层切分
+        self._closed = False    # 外层对象已结束，之后的文本（如“注意：以上为生成信息”）不再解析
+        self._last: Optional[Tuple[str, int, str]] = None  # 上一个裸值条目 (key, 起始位置, 原文)
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """输入一段流式文本，返回本次新解析出的字段"""
+        if self._closed:
+            return {}
+        # 丢掉已切分的前缀，只保留未完成的条目，避免缓冲区随输出长度增长
+        self._offset += self._start
+        self._pos -= self._start
+        self._buf = self._buf[self._start:] + chunk
+        self._start = 0
+
+        updates: Dict[str, Any] = {}
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._close:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\" and self._close == '"':
+                    self._escape = True
+                elif ch == self._close:
+                    self._close = None
+            elif ch in ('"', "“"):
+                self._close = _QUOTES[ch]
+            elif ch in "[{［｛":
+                if (ch in "{｛" and self._depth == 0 and self._base == 0
+                        and not self._has_quoted_key(buf[self._start:i])):
+                    # 外层对象的左括号：之前的内容（如“以下是结果：”）是前言，丢弃
+                    self._start = i + 1
+                    self._base = 1
+                self._depth += 1
+            elif ch in "]}］｝":
+                if self._depth == self._base == 1 and ch in "}｝":
+                    # 外层对象结束：切出最后一个条目，丢弃右括号及之后的全部文本
+                    self._cut(i, updates)
+                    self._closed = True
+                    self._buf, self._start, self._pos = "", 0, 0
+                    break
+                self._depth = max(self._depth - 1, 0)
+            elif self._depth == self._base and (
+                    ch in ",，" or (ch == "\n" and not self._awaiting_value(buf[self._start:i]))):
+                self._cut(i + 1, updates)
+            i += 1
+        else:
+            self._pos = i
+        self.result.data.update(updates)
+        return updates
+
+    def finish(self) -> ParseResult:
+        """流结束：解析最后一个条目（容忍截断的字符串和括号）"""
+        updates: Dict[str, Any] = {}
+        self._cut(len(self._buf), updates)
+        self.result.data.update(updates)
+        self.result.complete = True
+        return self.result
+
+    @staticmethod
+    def _has_quoted_key(entry: str) -> bool:
+        """当前条目是否已有带引号的字段名，有则后面的 { 是字段值而不是外层对象"""
+        parts = _split_key(entry)
+        return parts is not None and parts[0].strip()[:1] in ('"', "“", "'")
+
+    @staticmethod
+    def _awaiting_value(entry: str) -> bool:
+        """key 与 value 分在两行时，冒号后的换行不算条目结束"""
+        return entry.rstrip().endswith((":", "："))
+
+    def _cut(self, end: int, updates: Dict[str, Any]):
+        """切出 _buf[_start:end] 作为一个条目并解析"""
+        entry, start = self._buf[self._start:end], self._offset + self._start
+        self._start = end
+        if not entry.strip(" \t\r\n,，") or _FENCE.match(entry):
+            return
+        self._parse_entry(entry, start, updates)
+
+    def _parse_entry(self, entry: str, start: int, updates: Dict[str, Any]):
+        parts = _split_key(entry)
+        if parts is None:
+            if self._last is not None:
+                # 没有 key 的片段视为上一个值的延续（如未加引号的值里出现逗号）
+                key, last_start, last_text = self._last
+                self._last = None
+                self._parse_entry(last_text + entry, last_start, updates)
+                return
+            self._error(start, entry, "缺少字段名，已跳过")
+            return
+        key_raw, value_raw = parts
+        key = key_raw.strip(_KEY_STRIP)
+        if not key:
+            self._error(start, entry, "字段名为空，已跳过")
+            return
+        if _FENCE.match(value_raw):
+            return
+        value, err = parse_value(value_raw)
+        if err:
+            self._error(start, entry, err)
+            if value is None:
+                return
+        updates[key] = value
+        # 未加引号/括号的裸值可能被其中的逗号截断，记下来以便拼接后续片段
+        bare = value_raw.strip()[:1] not in ('"', "“", "'", "[", "{", "［", "｛")
+        self._last = (key, start, entry) if bare and entry.rstrip().endswith((",", "，")) else None
+
+    def _error(self, start: int, text: str, message: str):
+        self.result.errors.append(ErrorSpan(start, start + len(text), message, text.strip()))
+
+
+def parse_tolerant(text: str) -> ParseResult:
+    """一次性解析完整文本"""
+    parser = TolerantParser()
+    parser.feed(text)
+    return parser.finish()